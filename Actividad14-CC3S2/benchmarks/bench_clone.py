@@ -0,0 +1,64 @@
+"""
+Benchmark de clonación: `json_clone` frente a `copy.deepcopy`.
+
+Mide clones por segundo para la forma null_resource que produce la Factory
+y para estructuras anidadas más profundas.
+
+Uso:
+    python3 benchmarks/bench_clone.py [--seconds 0.5]
+"""
+
+import argparse
+import copy
+import sys
+import timeit
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar iac_patterns
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iac_patterns.factory import NullResourceFactory
+from iac_patterns.prototype import json_clone
+
+
+def nested_shape(depth: int, fanout: int = 3) -> dict:
+    """Construye un recurso con triggers anidados `depth` niveles."""
+    node = {"value": "leaf", "n": 1, "ok": True, "ratio": 0.5, "none": None}
+    for level in range(depth):
+        node = {f"k{i}": node if i == 0 else [level, f"s{i}"] for i in range(fanout)}
+    resource = NullResourceFactory.create("nested")
+    resource["resource"][0]["null_resource"][0]["nested"][0]["triggers"]["tree"] = node
+    return resource
+
+
+def clones_per_second(copier, data, seconds: float) -> float:
+    """Ejecuta `copier(data)` durante ~`seconds` y devuelve clones por segundo."""
+    timer = timeit.Timer(lambda: copier(data))
+    number, elapsed = timer.autorange()
+    repeats = max(1, int(seconds / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeats, number=number))
+    return number / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=0.5,
+                        help="tiempo aproximado por medición")
+    args = parser.parse_args()
+
+    shapes = {
+        "null_resource (factory)": NullResourceFactory.create("placeholder"),
+        "anidado profundidad 4": nested_shape(4),
+        "anidado profundidad 8": nested_shape(8),
+    }
+
+    print(f"{'forma':<26}{'deepcopy/s':>14}{'json_clone/s':>16}{'speedup':>10}")
+    for label, data in shapes.items():
+        assert json_clone(data) == copy.deepcopy(data)
+        slow = clones_per_second(copy.deepcopy, data, args.seconds)
+        fast = clones_per_second(json_clone, data, args.seconds)
+        print(f"{label:<26}{slow:>14,.0f}{fast:>16,.0f}{fast / slow:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Reporte de memoria: recursos como diccionarios anidados frente a `CompactResource`.
+
+Uso:
+    python3 benchmarks/bench_compact.py [--count 1000000]
+"""
+
+import argparse
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar iac_patterns
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iac_patterns.composite import CompositeModule
+from iac_patterns.factory import NullResourceFactory
+from iac_patterns.streaming import dump_blocks
+
+
+def measure(count: int, compact: bool):
+    """Memoria retenida por el módulo (bytes) y tiempo de exportación en streaming."""
+    names = [f"res_{i}" for i in range(count)]
+    tracemalloc.start()
+    module = CompositeModule("bench")
+    for resource in NullResourceFactory.create_many(names, {"tier": "web"}, compact=compact):
+        module.add(resource)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    dump_blocks(module.iter_blocks(), io.StringIO())
+    return retained, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'representación':<16}{'memoria (MB)':>14}{'bytes/recurso':>15}{'export (s)':>12}")
+    results = {}
+    for label, compact in (("dict", False), ("compacta", True)):
+        retained, export_time = measure(args.count, compact)
+        results[label] = retained
+        print(f"{label:<16}{retained / 1e6:>14.1f}{retained / args.count:>15.0f}{export_time:>12.2f}")
+    print(f"Ahorro: {1 - results['compacta'] / results['dict']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark de memoria: clones completos frente a clones delta (`DeltaResource`).
+
+Clona N veces un prototipo null_resource con `extra_triggers` triggers comunes,
+cambiando en cada clon solo el nombre y un trigger de índice.
+
+Uso:
+    python3 benchmarks/bench_delta.py [--count 100000] [--extra-triggers 20]
+"""
+
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar iac_patterns
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iac_patterns.factory import NullResourceFactory
+from iac_patterns.mutators import add_trigger, rename_resource
+from iac_patterns.prototype import ResourcePrototype, json_clone
+
+
+def measure(proto: ResourcePrototype, count: int, delta: bool) -> int:
+    """Devuelve los bytes retenidos por `count` clones."""
+    tracemalloc.start()
+    clones = []
+    for i in range(count):
+        def mutator(d, idx=i):
+            rename_resource(d, "base", f"base_{idx}")
+            add_trigger(d, "index", idx)
+        if delta:
+            clones.append(proto.clone(mutator, delta=True).resource)
+        else:
+            clones.append(proto.clone(mutator, copier=json_clone).data)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--extra-triggers", type=int, default=20)
+    args = parser.parse_args()
+
+    triggers = {f"tag_{i}": f"valor-compartido-{i}" for i in range(args.extra_triggers)}
+    proto = ResourcePrototype(NullResourceFactory.create("base", triggers))
+
+    full = measure(proto, args.count, delta=False)
+    delta = measure(proto, args.count, delta=True)
+    print(f"clones: {args.count:,}  triggers comunes: {args.extra_triggers}")
+    print(f"completo: {full / 2**20:8.1f} MiB ({full / args.count:6.0f} B/clon)")
+    print(f"delta:    {delta / 2**20:8.1f} MiB ({delta / args.count:6.0f} B/clon)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark de creación en lote: `create` en bucle frente a `create_many`.
+
+Uso:
+    python3 benchmarks/bench_factory.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar iac_patterns
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iac_patterns.factory import NullResourceFactory, TimestampedNullResourceFactory
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    """Mejor tiempo de `repeat` ejecuciones, en segundos."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tags = {"group": "web_tier", "tier": "frontend", "env": "prod"}
+    print(f"{'fábrica':<18}{'tamaño':>10}{'create (s)':>13}{'create_many (s)':>17}{'speedup':>10}")
+    for factory in (NullResourceFactory, TimestampedNullResourceFactory):
+        for size in args.sizes:
+            names = [f"res_{i}" for i in range(size)]
+            loop = best_of(lambda: [factory.create(n, dict(tags)) for n in names], args.repeat)
+            batch = best_of(lambda: factory.create_many(names, tags), args.repeat)
+            print(f"{factory.__name__[:17]:<18}{size:>10,}{loop:>13.3f}{batch:>17.3f}{loop / batch:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Tamaño de archivo y tiempos del formato compacto (`export(merged=True)`) frente al actual.
+
+Además del tiempo de escritura se mide el de lectura con `json.load`, como aproximación
+del costo de parseo del lado de Terraform.
+
+Uso:
+    python3 benchmarks/bench_merged_export.py [--resources 200000] [--groups 20]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar iac_patterns
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iac_patterns.builder import InfrastructureBuilder
+
+FORMATS = [
+    ("json (indent=4)", {}),
+    ("streaming", {"stream": True}),
+    ("compacto", {"merged": True}),
+]
+
+
+def build(resources: int, groups: int) -> InfrastructureBuilder:
+    per_group = resources // groups
+    builder = InfrastructureBuilder("bench", deterministic=True)
+    for g in range(groups):
+        builder.build_group(f"group_{g}", [f"res_{g}_{i}" for i in range(per_group)],
+                            {"tier": "web", "index": g})
+    return builder
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--resources", type=int, default=200_000)
+    parser.add_argument("--groups", type=int, default=20)
+    args = parser.parse_args()
+
+    builder = build(args.resources, args.groups)
+    total = builder._module.count_resources()
+    print(f"{total} recursos")
+    print(f"{'formato':<18}{'tamaño (MB)':>13}{'bytes/recurso':>15}"
+          f"{'escritura (s)':>15}{'lectura (s)':>13}")
+    sizes = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for label, options in FORMATS:
+            path = os.path.join(tmpdir, "main.tf.json")
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                builder.export(path, **options)
+            write_time = time.perf_counter() - start
+            size = os.path.getsize(path)
+
+            start = time.perf_counter()
+            with open(path) as f:
+                json.load(f)
+            read_time = time.perf_counter() - start
+            sizes[label] = size
+            print(f"{label:<18}{size / 1e6:>13.1f}{size / total:>15.0f}"
+                  f"{write_time:>15.2f}{read_time:>13.2f}")
+    print(f"Reducción de tamaño: {1 - sizes['compacto'] / sizes['json (indent=4)']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark del modo paralelo: construir y exportar un entorno con N workers.
+
+Uso:
+    python3 benchmarks/bench_parallel.py [--resources 200000] [--groups 64] [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar iac_patterns
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iac_patterns.builder import InfrastructureBuilder
+
+
+def run(resources: int, groups: int, workers, path: str) -> float:
+    """Construye y exporta el entorno; devuelve los segundos transcurridos."""
+    per_group = resources // groups
+    start = time.perf_counter()
+    builder = InfrastructureBuilder("bench", deterministic=True, workers=workers)
+    for g in range(groups):
+        builder.build_group(f"group_{g}", [f"res_{g}_{i}" for i in range(per_group)], {"tier": g % 3})
+    builder.export(path)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--resources", type=int, default=200_000)
+    parser.add_argument("--groups", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f"CPUs disponibles: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "main.tf.json")
+        baseline = run(args.resources, args.groups, None, path)
+        print(f"{'workers':>8}{'tiempo (s)':>12}{'speedup':>10}")
+        print(f"{'serie':>8}{baseline:>12.2f}{1.0:>9.1f}x")
+        for workers in args.workers:
+            elapsed = run(args.resources, args.groups, workers, path)
+            print(f"{workers:>8}{elapsed:>12.2f}{baseline / elapsed:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
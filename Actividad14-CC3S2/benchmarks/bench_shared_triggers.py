@@ -0,0 +1,74 @@
+"""
+Reporte de memoria de `build_group`: triggers por recurso frente a triggers compartidos.
+
+Uso:
+    python3 benchmarks/bench_shared_triggers.py [--groups 50] [--members 10000]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar iac_patterns
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iac_patterns.builder import InfrastructureBuilder
+
+# Tags con strings construidos en tiempo de ejecución, como los de una configuración real
+TAG_KEYS = ["tier", "env", "owner", "cost_center", "region"]
+
+
+def build(groups: int, names, compact: bool, shared: bool) -> InfrastructureBuilder:
+    builder = InfrastructureBuilder("bench", compact=compact, shared_triggers=shared)
+    for g in range(groups):
+        # Claves y valores nuevos en cada grupo ("".join copia el string)
+        tags = {"".join(key): "-".join(["valor", key, str(g % 5)]) for key in TAG_KEYS}
+        builder.build_group(f"group_{g}", names[g], tags)
+    return builder
+
+
+def measure(groups: int, members: int, compact: bool, shared: bool):
+    """Memoria retenida por el builder (bytes), tiempo de construcción y de recorrido."""
+    names = [[f"res_{g}_{i}" for i in range(members)] for g in range(groups)]
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    builder = build(groups, names, compact, shared)
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del builder
+
+    # Tiempos sin tracemalloc, que los distorsiona
+    start = time.perf_counter()
+    builder = build(groups, names, compact, shared)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in builder._module.iter_blocks():
+        pass
+    return retained, build_time, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--members", type=int, default=10_000)
+    args = parser.parse_args()
+    total = args.groups * args.members
+
+    print(f"{args.groups} grupos x {args.members} miembros = {total} recursos")
+    print(f"{'representación':<20}{'memoria (MB)':>14}{'bytes/recurso':>15}"
+          f"{'build (s)':>11}{'recorrido (s)':>15}")
+    results = {}
+    for label, compact, shared in (("dict", False, False), ("compacta", True, False),
+                                   ("compartida", False, True)):
+        retained, build_time, walk_time = measure(args.groups, args.members, compact, shared)
+        results[label] = retained
+        print(f"{label:<20}{retained / 1e6:>14.1f}{retained / total:>15.0f}"
+              f"{build_time:>11.2f}{walk_time:>15.2f}")
+    print(f"Ahorro frente a dict: {1 - results['compartida'] / results['dict']:.0%}, "
+          f"frente a compacta: {1 - results['compartida'] / results['compacta']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
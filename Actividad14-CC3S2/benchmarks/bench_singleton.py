@@ -0,0 +1,77 @@
+"""
+Lecturas por segundo de ConfigSingleton con varios hilos, con y sin un escritor concurrente.
+
+Uso:
+    python3 benchmarks/bench_singleton.py [--reads 400000] [--threads 1 2 4 8]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar iac_patterns
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iac_patterns.singleton import ConfigSingleton
+
+
+def read_loop(count: int) -> None:
+    for _ in range(count):
+        ConfigSingleton().get("region")
+
+
+def snapshot_loop(count: int) -> None:
+    for _ in range(count):
+        snapshot = ConfigSingleton().snapshot()
+        snapshot.get("region")
+        snapshot.get("port")
+
+
+def measure(target, reads: int, threads: int, with_writer: bool) -> float:
+    """Lecturas por segundo repartidas entre `threads` hilos."""
+    config = ConfigSingleton()
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            config.set("port", i)
+            i += 1
+            time.sleep(0.001)
+
+    workers = [threading.Thread(target=target, args=(reads // threads,)) for _ in range(threads)]
+    background = threading.Thread(target=writer) if with_writer else None
+    if background:
+        background.start()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    if background:
+        background.join()
+    return reads / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reads", type=int, default=400_000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    config = ConfigSingleton(env_name="bench")
+    config.update({"region": "local", "port": 0})
+    print(f"{'hilos':>6}{'get() (lect/s)':>18}{'con escritor':>16}{'snapshot (lect/s)':>20}")
+    for threads in args.threads:
+        plain = measure(read_loop, args.reads, threads, False)
+        contended = measure(read_loop, args.reads, threads, True)
+        snapshots = measure(snapshot_loop, args.reads, threads, False)
+        print(f"{threads:>6}{plain:>18,.0f}{contended:>16,.0f}{snapshots:>20,.0f}")
+
+
+if __name__ == "__main__":
+    main()
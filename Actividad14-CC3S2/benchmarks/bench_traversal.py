@@ -0,0 +1,103 @@
+"""
+Benchmark de recorrido de CompositeModule: `iter_resources()` frente al export recursivo.
+
+Escenarios:
+  - profundo: una cadena de `--depth` submódulos con un recurso por nivel.
+  - ancho: un único módulo con `--wide` recursos.
+
+Para cada uno mide export(), iter_resources() y la escritura en streaming, y compara
+con la implementación recursiva original (que falla por límite de recursión en el
+escenario profundo).
+
+Uso:
+    python3 benchmarks/bench_traversal.py [--depth 10000] [--wide 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar iac_patterns
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iac_patterns.composite import CompositeModule
+from iac_patterns.streaming import dump_blocks
+
+
+def resource(i: int) -> dict:
+    """Recurso mínimo con la forma que produce NullResourceFactory."""
+    return {"resource": [{"null_resource": [{f"r{i}": [{"triggers": {"index": i}}]}]}]}
+
+
+def legacy_export(module: CompositeModule) -> dict:
+    """Export recursivo original: copia cada bloque una vez por nivel de anidamiento."""
+    aggregated = {"resource": []}
+    for child in module._children:
+        if isinstance(child, CompositeModule):
+            aggregated["resource"].extend(legacy_export(child).get("resource", []))
+        else:
+            aggregated["resource"].extend(child.get("resource", []))
+    return aggregated
+
+
+def build_deep(depth: int) -> CompositeModule:
+    """Construye la cadena de abajo hacia arriba."""
+    module = CompositeModule(name="level_0")
+    module.add(resource(0))
+    for level in range(1, depth):
+        parent = CompositeModule(name=f"level_{level}")
+        parent.add(resource(level))
+        parent.add_submodule(module)
+        module = parent
+    return module
+
+
+def build_wide(width: int) -> CompositeModule:
+    module = CompositeModule(name="wide")
+    for i in range(width):
+        module.add(resource(i))
+    return module
+
+
+def timed(label: str, fn) -> None:
+    start = time.perf_counter()
+    try:
+        result = fn()
+    except RecursionError:
+        print(f"  {label:<28} RecursionError")
+        return
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed * 1000:10.1f} ms  -> {result}")
+
+
+def run(label: str, module: CompositeModule) -> None:
+    print(f"{label}: {module.count_resources():,} recursos")
+    timed("export recursivo (original)", lambda: len(legacy_export(module)["resource"]))
+    module._export_cache = None
+    timed("export (iter_resources)", lambda: len(module.export()["resource"]))
+    timed("export en cache", lambda: len(module.export()["resource"]))
+    timed("iter_resources()", lambda: sum(1 for _ in module.iter_resources()))
+    timed("count_resources()", module.count_resources)
+
+    def stream() -> str:
+        with open(os.devnull, "w") as f:
+            dump_blocks(module.iter_blocks(), f)
+        return "ok"
+
+    timed("streaming a /dev/null", stream)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depth", type=int, default=10_000)
+    parser.add_argument("--wide", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    run(f"profundo ({args.depth:,} niveles)", build_deep(args.depth))
+    run("ancho", build_wide(args.wide))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Suite de benchmarks de iac_patterns con baseline en JSON y detección de regresiones.
+
+Mide tiempo (mejor de `--repeat` ejecuciones) y pico de memoria (tracemalloc, en una
+ejecución aparte sin cronometrar) de las rutas principales: fábrica, clonado,
+mutadores, export del Composite a varias profundidades y export del Builder.
+
+Uso:
+    python3 benchmarks/suite.py --save                 # guarda el baseline
+    python3 benchmarks/suite.py                        # compara contra el baseline
+    python3 benchmarks/suite.py --full                 # tamaños de 10^3 a 10^6
+    python3 benchmarks/suite.py --cases composite.export --depths 1 10 100
+
+Termina con código 1 si algún caso supera el baseline en más de `--threshold`
+(tiempo) o `--memory-threshold` (memoria). El baseline depende de la máquina: se
+genera una vez por equipo y no se versiona.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Agregar el directorio raíz al path para importar iac_patterns
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iac_patterns.builder import InfrastructureBuilder
+from iac_patterns.composite import CompositeModule
+from iac_patterns.factory import NullResourceFactory
+from iac_patterns.mutators import (MutatorPipeline, add_trigger, convert_null_to_local_file,
+                                   index_resource, rename_resource)
+from iac_patterns.prototype import ResourcePrototype, json_clone
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+QUICK_SIZES = [1_000, 10_000, 100_000]
+FULL_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_DEPTHS = [1, 10, 100]
+
+Run = Callable[[], Any]
+
+TRIGGERS = {"tier": "web", "env": "bench"}
+
+
+#  Casos: cada uno prepara los datos (sin cronometrar) y devuelve la función a medir
+
+def case_factory_create(size: int, depth: int) -> Run:
+    names = [f"res_{i}" for i in range(size)]
+    return lambda: [NullResourceFactory.create(name, dict(TRIGGERS)) for name in names]
+
+
+def case_factory_create_many(size: int, depth: int) -> Run:
+    names = [f"res_{i}" for i in range(size)]
+    return lambda: NullResourceFactory.create_many(names, TRIGGERS)
+
+
+def case_prototype_clone(size: int, depth: int) -> Run:
+    prototype = ResourcePrototype(NullResourceFactory.create("base", dict(TRIGGERS)))
+    return lambda: [prototype.clone(partial(index_resource, idx=i)).data for i in range(size)]
+
+
+# Cadena de mutadores medida en secuencia y como pipeline fusionado
+MUTATOR_STEPS = [
+    (add_trigger, "region", "us-east-1"),
+    (rename_resource, "base", "renamed"),
+    (convert_null_to_local_file, "renamed.txt", "contenido"),
+]
+
+
+def case_mutators(size: int, depth: int) -> Run:
+    base = NullResourceFactory.create("base", dict(TRIGGERS))
+    clones = [json_clone(base) for _ in range(size)]
+
+    def run() -> None:
+        for clone in clones:
+            for mutator, *args in MUTATOR_STEPS:
+                mutator(clone, *args)
+    return run
+
+
+def case_mutators_pipeline(size: int, depth: int) -> Run:
+    base = NullResourceFactory.create("base", dict(TRIGGERS))
+    clones = [json_clone(base) for _ in range(size)]
+    pipeline = MutatorPipeline(*MUTATOR_STEPS)
+    return lambda: pipeline.apply_many(clones)
+
+
+def _nested_module(size: int, depth: int) -> CompositeModule:
+    """Cadena de `depth` módulos con los `size` recursos repartidos entre los niveles."""
+    resources = NullResourceFactory.create_many([f"res_{i}" for i in range(size)], TRIGGERS)
+    root = CompositeModule("root")
+    current = root
+    per_level = -(-size // depth)
+    for level in range(depth):
+        if level:
+            child = CompositeModule(f"level_{level}")
+            current.add_submodule(child)
+            current = child
+        for resource in resources[level * per_level:(level + 1) * per_level]:
+            current.add(resource)
+    return root
+
+
+def case_composite_export(size: int, depth: int) -> Run:
+    module = _nested_module(size, depth)
+    return module.export
+
+
+def case_builder_export(size: int, depth: int) -> Run:
+    builder = InfrastructureBuilder("bench", deterministic=True)
+    groups = max(1, size // 1_000)
+    for g in range(groups):
+        names = [f"res_{g}_{i}" for i in range(g * size // groups, (g + 1) * size // groups)]
+        builder.build_group(f"group_{g}", names, {"tier": g % 3})
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "main.tf.json")
+
+    def run() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            builder.export(path, stream=True)
+        os.unlink(path)
+        os.rmdir(directory)
+    return run
+
+
+CASES: Dict[str, Callable[[int, int], Run]] = {
+    "factory.create": case_factory_create,
+    "factory.create_many": case_factory_create_many,
+    "prototype.clone": case_prototype_clone,
+    "mutators": case_mutators,
+    "mutators.pipeline": case_mutators_pipeline,
+    "composite.export": case_composite_export,
+    "builder.export": case_builder_export,
+}
+
+# Casos cuyo costo depende de la profundidad del árbol
+DEPTH_CASES = {"composite.export"}
+
+
+#  Ejecución y comparación
+
+def case_key(case: str, size: int, depth: int) -> str:
+    return f"{case}[n={size},depth={depth}]"
+
+
+def measure(case: str, size: int, depth: int, repeat: int) -> Dict[str, float]:
+    """Mejor tiempo de `repeat` ejecuciones y pico de memoria de una ejecución extra."""
+    best = float("inf")
+    for _ in range(repeat):
+        run = CASES[case](size, depth)
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+        del run
+
+    run = CASES[case](size, depth)
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def run_suite(cases: List[str], sizes: List[int], depths: List[int], repeat: int = 3,
+              report: Optional[Callable[[str, Dict[str, float]], None]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Ejecuta los casos pedidos a todos los tamaños (y profundidades, si aplica).
+
+    Returns:
+        Diccionario ``clave del caso -> {"seconds", "peak_bytes"}``.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    for case in cases:
+        for size in sizes:
+            for depth in (depths if case in DEPTH_CASES else [1]):
+                key = case_key(case, size, depth)
+                results[key] = measure(case, size, depth, repeat)
+                if report:
+                    report(key, results[key])
+    return results
+
+
+def compare(baseline: Dict[str, Dict[str, float]], results: Dict[str, Dict[str, float]],
+            threshold: float, memory_threshold: float, min_seconds: float = 0.01) -> List[str]:
+    """
+    Casos que empeoraron respecto del baseline.
+
+    Args:
+        baseline: Resultados guardados con `--save`.
+        results: Resultados de esta ejecución.
+        threshold: Aumento relativo de tiempo tolerado (0.25 = 25%).
+        memory_threshold: Aumento relativo del pico de memoria tolerado.
+        min_seconds: Los tiempos por debajo de este valor se consideran ruido.
+
+    Returns:
+        Una línea descriptiva por regresión (lista vacía si no hay ninguna).
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if (current["seconds"] >= min_seconds
+                and current["seconds"] > previous["seconds"] * (1 + threshold)):
+            regressions.append(f"{key}: tiempo {previous['seconds']:.4f}s -> {current['seconds']:.4f}s")
+        if current["peak_bytes"] > previous["peak_bytes"] * (1 + memory_threshold):
+            regressions.append(f"{key}: memoria {previous['peak_bytes'] / 1e6:.1f}MB -> "
+                               f"{current['peak_bytes'] / 1e6:.1f}MB")
+    return regressions
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(path: Path, results: Dict[str, Dict[str, float]]) -> None:
+    """Guarda los resultados (fusionados con los de un baseline previo, si existe)."""
+    merged = load_baseline(path) if path.exists() else {}
+    merged.update(results)
+    document = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": merged,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--full", action="store_true", help="tamaños de 10^3 a 10^6")
+    parser.add_argument("--depths", type=int, nargs="+", default=DEFAULT_DEPTHS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="guarda los resultados como baseline")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--memory-threshold", type=float, default=0.25)
+    parser.add_argument("--min-seconds", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (FULL_SIZES if args.full else QUICK_SIZES)
+
+    def report(key: str, result: Dict[str, float]) -> None:
+        print(f"{key:<45}{result['seconds']:>10.4f}s{result['peak_bytes'] / 1e6:>10.1f}MB", flush=True)
+
+    results = run_suite(args.cases, sizes, args.depths, args.repeat, report)
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Baseline guardado en {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"Sin baseline en {args.baseline}; ejecutar con --save para crearlo")
+        return 0
+
+    regressions = compare(load_baseline(args.baseline), results,
+                          args.threshold, args.memory_threshold, args.min_seconds)
+    if regressions:
+        print(f"{len(regressions)} regresión(es) respecto de {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,19 +9,43 @@ El archivo resultante puede aplicarse con:
     $ terraform apply
 
 No se requieren credenciales de nube, demonio de Docker, ni dependencias externas.
+
+Con `--reproducible` dos ejecuciones generan exactamente los mismos bytes.
+Con `--profile` se imprime el tiempo, los recursos y la memoria de cada paso (o se
+guardan en JSON con `--profile-json ruta`). Con `--catalog ruta.db` cada recurso
+exportado se registra además en un catálogo SQLite (ver `iac_patterns.catalog`).
+Con `--merged` el archivo se escribe en formato compacto: un bloque por tipo de
+recurso y sin indentación.
 """
 
+import argparse
 import os
 from iac_patterns.builder import InfrastructureBuilder
+from iac_patterns.instrumentation import SummaryReporter
 from iac_patterns.singleton import ConfigSingleton
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Genera terraform/main.tf.json")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="identificadores deterministas y timestamp fijo")
+    parser.add_argument("--profile", action="store_true",
+                        help="imprime un resumen de tiempo y memoria por paso")
+    parser.add_argument("--profile-json", metavar="RUTA",
+                        help="guarda el resumen por paso en formato JSON")
+    parser.add_argument("--catalog", metavar="RUTA",
+                        help="registra los recursos exportados en un catálogo SQLite")
+    parser.add_argument("--merged", action="store_true",
+                        help="un bloque por tipo de recurso y JSON sin indentación")
+    args = parser.parse_args()
+    reporter = SummaryReporter(trace_memory=True) if args.profile or args.profile_json else None
+
     # Inicializa una configuración global única para el entorno "local-dev"
     config = ConfigSingleton(env_name="desarrollo-local")
     config.set("proyecto", "patrones_iac_locales")
 
     # Construye la infraestructura usando el nombre de entorno desde la configuración global
-    builder = InfrastructureBuilder(env_name=config.env_name)
+    builder = InfrastructureBuilder(env_name=config.env_name, deterministic=args.reproducible,
+                                    instrumentation=reporter)
 
     # Construye 15 recursos null ficticios para demostrar escalabilidad (>1000 líneas en total)
     builder.build_null_fleet(count=15)
@@ -33,7 +57,13 @@ def main() -> None:
     )
 
     # Exporta el resultado a un archivo Terraform JSON en el directorio especificado
-    builder.export(path=os.path.join("terraform", "main.tf.json"))
+    builder.export(path=os.path.join("terraform", "main.tf.json"), catalog=args.catalog,
+                   merged=args.merged)
+
+    if args.profile:
+        print(reporter.format_table())
+    if args.profile_json:
+        reporter.write_json(args.profile_json)
 
 # Ejecuta la función principal si el archivo se ejecuta directamente
 if __name__ == "__main__":
@@ -11,14 +11,37 @@ from iac_patterns.builder import InfrastructureBuilder
 builder = InfrastructureBuilder(env_name="demo")
 builder.build_null_fleet(count=3)
 builder.export(path="terraform/main.tf.json")
+```
+
+Los atributos del paquete se cargan de forma perezosa (PEP 562): `import iac_patterns`
+no importa ningún submódulo, y cada uno se importa la primera vez que se accede a uno
+de sus nombres. Así las CLIs que solo usan la fábrica no pagan el import del Builder
+(multiprocessing, sqlite3) ni el de los adapters (PyYAML).
 """
 
-from .singleton import ConfigSingleton
-from .factory import NullResourceFactory
-from .prototype import ResourcePrototype
-from .composite import CompositeModule
-from .builder import InfrastructureBuilder
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:  # Para los analizadores estáticos y los IDEs
+    from .adapter import AnsibleToTerraformAdapter, CloudFormationToTerraformAdapter
+    from .builder import InfrastructureBuilder
+    from .composite import CompositeModule
+    from .factory import NullResourceFactory
+    from .prototype import ResourcePrototype
+    from .singleton import ConfigSingleton
 
+# Nombre público -> submódulo que lo define
+_LAZY_ATTRIBUTES = {
+    "ConfigSingleton": ".singleton",
+    "NullResourceFactory": ".factory",
+    "ResourcePrototype": ".prototype",
+    "CompositeModule": ".composite",
+    "InfrastructureBuilder": ".builder",
+    "AnsibleToTerraformAdapter": ".adapter",
+    "CloudFormationToTerraformAdapter": ".adapter",
+}
+
+# Los adapters quedan fuera de `import *` porque requieren PyYAML
 __all__ = [
     "ConfigSingleton",
     "NullResourceFactory",
@@ -26,3 +49,17 @@ __all__ = [
     "CompositeModule",
     "InfrastructureBuilder",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Importa el submódulo que define `name` en el primer acceso y guarda el valor."""
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # Los accesos siguientes no vuelven a pasar por aquí
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
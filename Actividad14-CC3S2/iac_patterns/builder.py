@@ -2,54 +2,140 @@
 Construye de manera fluida configuraciones Terraform locales combinando los patrones Factory, Prototype y Composite.
 """
 
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, Optional, Union
+from functools import partial
 import os
 import json
 
-from .factory import NullResourceFactory
+from .factory import NullResourceFactory, Clock, _resolve_clock
 from .composite import CompositeModule
-from .prototype import ResourcePrototype
+from .prototype import ResourcePrototype, json_clone
+from .fleet import VirtualFleet
+from .streaming import dump_blocks, dump_merged, write_encoded
+from .sharding import write_shards
+from .merkle import build_manifest, diff_trees
+from .mutators import index_resource
+from .parallel import PendingModule, build_group_recipe, fleet_chunk_recipe, write_parallel
+from .instrumentation import Instrumentation, NULL_INSTRUMENTATION
+
+if TYPE_CHECKING:
+    from .catalog import ResourceCatalog
 
 class InfrastructureBuilder:
     """Builder fluido que combina los patrones Factory, Prototype y Composite para crear módulos Terraform."""
 
-    def __init__(self, env_name: str) -> None:
+    def __init__(self, env_name: str, deterministic: bool = False,
+                 clock: Optional[Clock] = None, workers: Optional[int] = None,
+                 compact: bool = False, memory_budget: Optional[int] = None,
+                 spill_dir: Optional[str] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 shared_triggers: bool = False, fragment_cache: bool = False) -> None:
         """
         Inicializa el builder con un nombre de entorno y una instancia de módulo compuesto.
+
+        Args:
+            env_name: nombre del entorno (y del módulo raíz).
+            deterministic: modo reproducible: los identificadores de los recursos son
+                           hashes estables de su nombre y triggers y el timestamp sale de
+                           `clock` (fijo si no se indica), por lo que dos ejecuciones con
+                           las mismas entradas generan los mismos bytes.
+            clock: reloj inyectable para los timestamps de la fábrica.
+            workers: si se indica, modo paralelo: los grupos y flotas se registran como
+                     recetas (`PendingModule`) que `export()` construye y codifica en
+                     `workers` procesos. La salida no depende del número de workers.
+                     Tiene prioridad sobre `memory_budget` al exportar (ambos escriben
+                     en streaming) y no se combina con `fragment_cache`.
+            compact: si es True, los recursos se guardan como `CompactResource` y se
+                     expanden a la estructura JSON anidada solo al exportar.
+            memory_budget: bytes (estimados) de recursos que el builder mantiene en
+                           memoria; al superarlos, los grupos y recursos ya construidos
+                           se vuelcan a segmentos temporales en disco y `export()` los
+                           vuelve a leer en orden, siempre en streaming.
+            spill_dir: directorio de los segmentos temporales (por defecto el del sistema).
+            instrumentation: receptor de eventos por paso (tiempo, recursos y memoria),
+                             por ejemplo un `SummaryReporter`. Incluye los clones y el
+                             export del Composite ejecutados dentro de cada paso.
+            shared_triggers: si es True, los miembros de cada `build_group` comparten
+                             un único layout de triggers (grupo y tags internados) y
+                             guardan solo su `factory_uuid`; un recurso pasa a tener su
+                             propio dict de triggers solo si se modifica.
+            fragment_cache: si es True, `export()` guarda el JSON codificado de cada
+                            recurso y en las siguientes exportaciones solo concatena los
+                            fragmentos de los recursos que no cambiaron (los cambios deben
+                            hacerse con `mutate_resource`). Ocupa aproximadamente lo mismo
+                            que el archivo exportado. No se combina con `workers` ni con
+                            `memory_budget`, que exportan sin cache.
+
+        Raises:
+            ValueError: si `fragment_cache` se combina con `workers` o `memory_budget`.
         """
+        if fragment_cache and (workers or memory_budget is not None):
+            raise ValueError("fragment_cache no se combina con workers ni con memory_budget")
         self.env_name = env_name
-        self._module = CompositeModule(name=env_name)
+        self.deterministic = deterministic
+        self.clock = clock
+        self.workers = workers
+        self.compact = compact
+        self.memory_budget = memory_budget
+        self.shared_triggers = shared_triggers
+        self.fragment_cache = fragment_cache
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self._module = CompositeModule(name=env_name, memory_budget=memory_budget,
+                                       spill_dir=spill_dir)
+
+    def _factory_options(self) -> Dict[str, Any]:
+        """Opciones de reproducibilidad y representación que se pasan a la fábrica en cada step."""
+        return {"deterministic": self.deterministic, "clock": self.clock, "compact": self.compact}
 
     #  Métodos de construcción (steps) 
 
-    def build_null_fleet(self, count: int = 5) -> "InfrastructureBuilder":
+    def build_null_fleet(self, count: int = 5, delta: bool = False,
+                         virtual: bool = False) -> "InfrastructureBuilder":
         """
         Construye una flota de `null_resource` clonados a partir de un prototipo base.
         Cada recurso tiene un trigger que lo identifica por índice, y un nombre válido.
+
+        Args:
+            count: número de recursos de la flota.
+            delta: si es True, cada clon guarda solo su nombre y trigger de índice sobre
+                   el prototipo compartido (`DeltaResource`) y se materializa al exportar.
+            virtual: si es True, agrega una única `VirtualFleet` que guarda la plantilla
+                     y los índices como columnas; los recursos se construyen al exportar.
         """
+        with self.instrumentation.step("builder.build_null_fleet", resources=count,
+                                       delta=delta, virtual=virtual):
+            return self._build_null_fleet(count, delta, virtual)
+
+    def _build_null_fleet(self, count: int, delta: bool, virtual: bool) -> "InfrastructureBuilder":
+        if virtual:
+            template = NullResourceFactory.create("placeholder", **self._factory_options())
+            self._module.add(VirtualFleet(template, count, columns={"index": range(count)}))
+            return self
+
         # Se crea un prototipo reutilizable a partir de un recurso null de fábrica
         base_proto = ResourcePrototype(
-            NullResourceFactory.create("placeholder")
+            NullResourceFactory.create("placeholder", **self._factory_options())
         )
 
+        if self.workers and not delta:
+            # Modo paralelo: tramos de índices que los workers clonan al exportar
+            template = base_proto.data
+            chunk = max(1, -(-count // (self.workers * 4)))
+            for start in range(0, count, chunk):
+                stop = min(start + chunk, count)
+                self._module.add(PendingModule(fleet_chunk_recipe, (template, start, stop), stop - start))
+            return self
+
         for i in range(count):
-            def mutator(d: Dict[str, Any], idx=i) -> None:
-                """
-                Función mutadora: modifica el nombre del recurso clonado
-                e inserta un trigger identificador con el índice correspondiente.
-                """
-                res_block = d["resource"][0]["null_resource"][0]
-                # Nombre original del recurso (por defecto "placeholder")
-                original_name = next(iter(res_block.keys()))
-                # Nuevo nombre válido: empieza con letra y contiene índice
-                new_name = f"{original_name}_{idx}"
-                # Renombramos la clave en el dict
-                res_block[new_name] = res_block.pop(original_name)
-                # Añadimos el trigger de índice
-                res_block[new_name][0]["triggers"]["index"] = idx
-
-            # Clonamos el prototipo y aplicamos la mutación
-            clone = base_proto.clone(mutator).data
+            # Mutador: renombra el clon a "placeholder_<i>" y agrega el trigger de índice
+            mutator = partial(index_resource, idx=i)
+
+            if delta:
+                # Clon delta: solo se guardan las rutas modificadas por el mutador
+                clone = base_proto.clone(mutator, delta=True).resource
+            else:
+                # Clonamos el prototipo (copia especializada para JSON) y aplicamos la mutación
+                clone = base_proto.clone(mutator, copier=json_clone).data
             # Agregamos el recurso clonado al módulo compuesto
             self._module.add(clone)
 
@@ -65,7 +151,8 @@ class InfrastructureBuilder:
         Returns:
             self: permite encadenar llamadas.
         """
-        self._module.add(NullResourceFactory.create(name, triggers))
+        with self.instrumentation.step("builder.add_custom_resource", resources=1, resource=name):
+            self._module.add(NullResourceFactory.create(name, triggers, **self._factory_options()))
         return self
 
     def build_group(self, group_name: str, resource_names: list, tags: Dict[str, Any] = None) -> "InfrastructureBuilder":
@@ -87,42 +174,195 @@ class InfrastructureBuilder:
         Ejemplo:
             builder.build_group("web_tier", ["web1", "web2"], {"tier": "frontend", "env": "prod"})
         """
+        with self.instrumentation.step("builder.build_group", resources=len(resource_names),
+                                       group=group_name):
+            return self._build_group(group_name, resource_names, tags)
+
+    def _build_group(self, group_name: str, resource_names: list,
+                     tags: Optional[Dict[str, Any]]) -> "InfrastructureBuilder":
         tags = tags or {}
 
         # Crear submódulo para el grupo
         group_module = CompositeModule(name=group_name)
 
-        # Agregar recursos al grupo con tags comunes
-        for resource_name in resource_names:
-            # Crear triggers que incluyen los tags del grupo
-            triggers = {"group": group_name}
-            triggers.update(tags)
+        # Triggers comunes del grupo (los tags pueden sobrescribir "group")
+        triggers = {"group": group_name}
+        triggers.update(tags)
 
-            # Crear recurso y agregarlo al submódulo
-            resource = NullResourceFactory.create(resource_name, triggers)
-            group_module.add(resource)
+        if self.workers:
+            # Modo paralelo: timestamp y semilla de UUIDs fijos ahora, construcción al exportar
+            timestamp = _resolve_clock(self.deterministic, self.clock)().isoformat()
+            seed = None if self.deterministic else os.urandom(16)
+            recipe_args = (list(resource_names), triggers, timestamp, self.deterministic, seed,
+                           self.compact, self.shared_triggers)
+            group_module.add(PendingModule(build_group_recipe, recipe_args, len(resource_names)))
+            self._module.add_submodule(group_module)
+            return self
+
+        # Crear los recursos en lote (un timestamp y un buffer de UUIDs por grupo)
+        hooks = self.instrumentation
+        with hooks.step("factory.create_many", resources=len(resource_names)):
+            resources = NullResourceFactory.create_many(resource_names, triggers,
+                                                        shared=self.shared_triggers,
+                                                        **self._factory_options())
+        with hooks.step("composite.add", resources=len(resources), module=group_name):
+            for resource in resources:
+                group_module.add(resource)
+        del resources
 
         # Agregar el submódulo al módulo principal
         self._module.add_submodule(group_module)
 
         return self
 
+    def mutate_resource(self, resource_type: str, name: str, mutator) -> "InfrastructureBuilder":
+        """
+        Modifica un recurso ya construido (por ejemplo con los mutadores de
+        `iac_patterns.mutators`), invalidando solo su fragmento y las caches de los
+        módulos que lo contienen.
+
+        Args:
+            resource_type: tipo del recurso (por ejemplo "null_resource").
+            name: nombre del recurso.
+            mutator: función que recibe el recurso y lo modifica en el acto.
+
+        Returns:
+            self: permite encadenar llamadas.
+        """
+        with self.instrumentation.step("builder.mutate_resource", resources=1,
+                                       resource=f"{resource_type}.{name}"):
+            self._module.mutate(resource_type, name, mutator)
+        return self
+
     #  Método final (exportación) 
 
-    def export(self, path: str) -> None:
+    def export(self, path: str, stream: bool = False,
+               catalog: Union["ResourceCatalog", str, None] = None,
+               build_id: Optional[str] = None, merged: bool = False) -> None:
         """
         Exporta el módulo compuesto a un archivo JSON compatible con Terraform.
 
         Args:
             path: ruta de destino del archivo `.tf.json`.
-        """
-        data = self._module.export()
+            stream: si es True, escribe cada bloque de recurso directamente al archivo
+                    mientras recorre el árbol, sin construir el documento completo en
+                    memoria. La salida es idéntica byte a byte al modo por defecto.
+                    En modo paralelo (`workers`) o con `memory_budget` la escritura
+                    siempre es en streaming; con `fragment_cache`, a partir de los
+                    fragmentos codificados en cache.
+            catalog: `ResourceCatalog` (o ruta de su base SQLite) donde registrar
+                     además cada recurso exportado, con su ruta de módulo y triggers.
+            build_id: identificador del build en el catálogo (por defecto, el entorno
+                      más la fecha UTC).
+            merged: si es True, escribe el formato compacto de `dump_merged`: un bloque
+                    por tipo de recurso y sin indentación. Es equivalente para Terraform
+                    pero no idéntico byte a byte; se escribe siempre en streaming y tiene
+                    prioridad sobre los modos del builder (`workers`, `memory_budget`,
+                    `fragment_cache`).
 
+        Raises:
+            ValueError: si se piden `stream` y `merged` a la vez (`stream` promete la
+                        salida del modo por defecto, que `merged` no produce).
+        """
+        if stream and merged:
+            raise ValueError("stream y merged son formatos de salida distintos; elegir uno")
         # Asegura que el directorio destino exista
         os.makedirs(os.path.dirname(path), exist_ok=True)
 
-        # Escribe el archivo con indentación legible
-        with open(path, "w") as f:
-            json.dump(data, f, indent=4)
+        hooks = self.instrumentation
+        if merged:
+            mode = "merged"
+        elif self.workers:
+            mode = "parallel"
+        elif self.memory_budget is not None:
+            mode = "stream"
+        elif self.fragment_cache:
+            mode = "fragments"
+        elif stream:
+            mode = "stream"
+        else:
+            mode = "json"
+        with hooks.step("builder.export", resources=self._module.count_resources(),
+                        path=path, mode=mode):
+            if mode == "merged":
+                with open(path, "w") as f:
+                    dump_merged(self._module.iter_blocks(), f)
+            elif mode == "parallel":
+                with open(path, "w") as f:
+                    write_parallel(self._module, f, self.workers)
+            elif mode == "stream":
+                with open(path, "w") as f:
+                    dump_blocks(self._module.iter_blocks(), f)
+            elif mode == "fragments":
+                with open(path, "w") as f:
+                    write_encoded(self._module.iter_encoded(), f)
+            else:
+                data = self._module.export()
+
+                # Escribe el archivo con indentación legible
+                with hooks.step("json.dump", resources=len(data["resource"])):
+                    with open(path, "w") as f:
+                        json.dump(data, f, indent=4)
 
         print(f"[Builder] Terraform JSON escrito en: {path}")
+        if catalog is not None:
+            self._load_catalog(catalog, build_id)
+
+    def _load_catalog(self, catalog: Union["ResourceCatalog", str], build_id: Optional[str]) -> None:
+        """Registra el módulo construido en el catálogo SQLite."""
+        # Import diferido: sqlite3 solo se carga cuando se usa el catálogo
+        from .catalog import ResourceCatalog
+
+        owned = isinstance(catalog, str)
+        if owned:
+            catalog = ResourceCatalog(catalog)
+        try:
+            with self.instrumentation.step("builder.catalog",
+                                           resources=self._module.count_resources()):
+                build_id = catalog.load(self._module, build_id=build_id, env=self.env_name)
+        finally:
+            if owned:
+                catalog.close()
+        print(f"[Builder] Build {build_id} registrado en el catálogo")
+
+    def export_shards(self, directory: str) -> Dict[str, Any]:
+        """
+        Exporta un archivo `.tf.json` por submódulo (por ejemplo uno por grupo) más un
+        shard raíz, reescribiendo solo los shards cuyo contenido cambió.
+
+        Args:
+            directory: directorio destino de los shards y de su manifiesto.
+
+        Returns:
+            Reporte con los archivos "written", "unchanged" y "removed".
+        """
+        with self.instrumentation.step("builder.export_shards",
+                                       resources=self._module.count_resources(),
+                                       directory=directory):
+            report = write_shards(self._module, directory)
+        print(f"[Builder] Shards en {directory}: {len(report['written'])} escritos, "
+              f"{len(report['unchanged'])} sin cambios, {len(report['removed'])} eliminados")
+        return report
+
+    def manifest(self) -> Dict[str, Any]:
+        """
+        Hashes Merkle del módulo construido, serializables a JSON para compararlos con
+        un build posterior mediante `diff`.
+        """
+        return build_manifest(self._module)
+
+    def diff(self, previous: Any) -> Dict[str, Any]:
+        """
+        Recursos agregados, eliminados y modificados respecto de un build anterior.
+
+        Args:
+            previous: otro InfrastructureBuilder, un CompositeModule o un manifiesto
+                      guardado con `manifest()`.
+
+        Returns:
+            Diccionario con las listas "added", "removed" y "changed" de tuplas
+            ``(ruta_de_modulo, "tipo.nombre")``.
+        """
+        if isinstance(previous, InfrastructureBuilder):
+            previous = previous._module
+        return diff_trees(previous, self._module)
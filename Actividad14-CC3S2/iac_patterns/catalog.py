@@ -0,0 +1,310 @@
+"""Catálogo SQLite de los recursos generados
+
+Guarda cada recurso exportado (build, ruta de módulo, tipo, nombre y triggers
+aplanados) en una base SQLite indexada, para responder preguntas entre builds sin volver
+a parsear los `.tf.json`:
+
+    >>> catalog = ResourceCatalog("build/catalog.db")
+    >>> catalog.load(builder._module, build_id="prod-2024-06-01", env="prod")
+    >>> catalog.builds_containing("null_resource", "web_1")
+    ['prod-2024-06-01']
+    >>> catalog.count_by_module()
+    {'prod-2024-06-01': {'prod': 15, 'prod/web': 2}}
+
+La carga inserta por lotes (`executemany`), con una transacción por lote.
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .composite import CompositeModule
+
+DEFAULT_BATCH_SIZE = 20_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    build_id TEXT NOT NULL UNIQUE,
+    env TEXT,
+    created_at REAL NOT NULL,
+    resources INTEGER
+);
+CREATE TABLE IF NOT EXISTS resources (
+    id INTEGER PRIMARY KEY,
+    build INTEGER NOT NULL REFERENCES builds(id),
+    module TEXT NOT NULL,
+    type TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS triggers (
+    resource INTEGER NOT NULL REFERENCES resources(id),
+    key TEXT NOT NULL,
+    value,
+    PRIMARY KEY (resource, key)
+) WITHOUT ROWID;
+"""
+
+# Índices secundarios: en una carga grande se eliminan y se reconstruyen al final,
+# porque ordenar una vez es mucho más rápido que mantenerlos fila a fila
+_INDEXES = {
+    "resources_by_build_module": "resources (build, module)",
+    "resources_by_address": "resources (type, name)",
+    "triggers_by_value": "triggers (key, value)",
+}
+
+# La reconstrucción recorre todo el catálogo, así que solo conviene si la carga aporta al
+# menos esta fracción de las filas existentes; si no, los índices se mantienen al insertar
+_REINDEX_FRACTION = 0.25
+
+# Tipos que se guardan tal cual en SQLite; el resto se guarda como texto
+_SCALARS = (str, int, float, type(None))
+
+
+def _flatten(value: Any, prefix: str, rows: List[Tuple[str, Any]]) -> None:
+    """Aplana triggers anidados a claves con puntos (``{"a": {"b": 1}}`` -> ``a.b``)."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(item, f"{prefix}.{key}", rows)
+    elif isinstance(value, (list, tuple)):
+        for position, item in enumerate(value):
+            _flatten(item, f"{prefix}.{position}", rows)
+    else:
+        rows.append((prefix, value if isinstance(value, _SCALARS) else str(value)))
+
+
+def _default_build_id(env: Optional[str]) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    return f"{env}-{stamp}" if env else stamp
+
+
+class ResourceCatalog:
+    """
+    Catálogo de recursos de varios builds sobre una base SQLite.
+
+    Un `build_id` identifica cada carga; volver a cargar el mismo `build_id` reemplaza
+    su contenido. `env` agrupa builds del mismo entorno.
+    """
+
+    def __init__(self, path: str = ":memory:", batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        """
+        Args:
+            path: Archivo de la base (se crea si no existe) o ":memory:".
+            batch_size: Recursos insertados por transacción durante la carga.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA foreign_keys = OFF")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA cache_size = -65536")  # 64 MiB de páginas en caché
+        self._conn.executescript(_SCHEMA)
+        self._create_indexes()
+
+    def _create_indexes(self) -> None:
+        with self._conn:
+            for name, columns in _INDEXES.items():
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
+
+    def _drop_indexes(self) -> None:
+        with self._conn:
+            for name in _INDEXES:
+                self._conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ResourceCatalog":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    #  Carga
+
+    def load(self, module: CompositeModule, build_id: Optional[str] = None,
+             env: Optional[str] = None) -> str:
+        """
+        Carga todos los recursos de un módulo compuesto con su ruta de módulo.
+
+        Args:
+            module: Módulo raíz del build.
+            build_id: Identificador del build; por defecto, `env` más la fecha UTC.
+            env: Entorno del build; por defecto, el nombre del módulo raíz.
+
+        Returns:
+            El `build_id` cargado.
+        """
+        env = module.name if env is None else env
+        return self._load(module.iter_resources(), build_id or _default_build_id(env), env)
+
+    def load_blocks(self, blocks: Iterable[Dict[str, Any]], build_id: str,
+                    env: Optional[str] = None, module_path: str = "") -> str:
+        """
+        Carga bloques de recursos sueltos (por ejemplo la lista "resource" de un
+        documento ya decodificado), todos bajo la misma ruta de módulo.
+        """
+        return self._load(((module_path, block) for block in blocks), build_id, env)
+
+    def _load(self, pairs: Iterable[Tuple[Any, Dict[str, Any]]], build_id: str,
+              env: Optional[str]) -> str:
+        conn = self._conn
+        with conn:
+            self._delete(build_id)
+            build = conn.execute(
+                "INSERT INTO builds (build_id, env, created_at) VALUES (?, ?, ?)",
+                (build_id, env, time.time())).lastrowid
+            next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM resources").fetchone()[0]
+            existing = conn.execute("SELECT COALESCE(SUM(resources), 0) FROM builds").fetchone()[0]
+        # Los índices se eliminan recién cuando la carga resulta grande frente al catálogo
+        reindex_at = existing * _REINDEX_FRACTION
+        dropped = False
+
+        resources: List[Tuple[int, int, str, str, str]] = []
+        triggers: List[Tuple[int, str, Any]] = []
+        total = 0
+        # Las rutas son objetos compartidos por todos los recursos de un módulo
+        last_path, module_name = None, ""
+        try:
+            for path, block in pairs:
+                if path is not last_path:
+                    last_path, module_name = path, str(path)
+                for resource_type, named_list in block.items():
+                    for named in named_list:
+                        for name, configs in named.items():
+                            config = configs[0] if isinstance(configs, list) else configs
+                            resources.append((next_id, build, module_name, resource_type, name))
+                            for key, value in (config.get("triggers") or {}).items():
+                                if isinstance(value, _SCALARS):
+                                    triggers.append((next_id, key, value))
+                                else:
+                                    flat: List[Tuple[str, Any]] = []
+                                    _flatten(value, key, flat)
+                                    triggers.extend((next_id, k, v) for k, v in flat)
+                            next_id += 1
+                if len(resources) >= self.batch_size:
+                    if not dropped and total + len(resources) >= reindex_at:
+                        self._drop_indexes()
+                        dropped = True
+                    total += self._flush(resources, triggers)
+            total += self._flush(resources, triggers)
+        except BaseException:
+            # Un build a medio cargar no debe aparecer en las consultas
+            self._create_indexes()
+            with conn:
+                self._delete(build_id)
+            raise
+        if dropped:
+            self._create_indexes()
+        with conn:
+            conn.execute("UPDATE builds SET resources = ? WHERE id = ?", (total, build))
+        return build_id
+
+    def _flush(self, resources: List[Tuple], triggers: List[Tuple]) -> int:
+        """Inserta un lote en una transacción y vacía los buffers."""
+        count = len(resources)
+        if count:
+            with self._conn:
+                self._conn.executemany("INSERT INTO resources VALUES (?, ?, ?, ?, ?)", resources)
+                self._conn.executemany("INSERT INTO triggers VALUES (?, ?, ?)", triggers)
+            resources.clear()
+            triggers.clear()
+        return count
+
+    def _delete(self, build_id: str) -> None:
+        row = self._conn.execute("SELECT id FROM builds WHERE build_id = ?", (build_id,)).fetchone()
+        if row is None:
+            return
+        self._conn.execute("DELETE FROM triggers WHERE resource IN "
+                           "(SELECT id FROM resources WHERE build = ?)", row)
+        self._conn.execute("DELETE FROM resources WHERE build = ?", row)
+        self._conn.execute("DELETE FROM builds WHERE id = ?", row)
+
+    def delete_build(self, build_id: str) -> None:
+        """Elimina un build y todos sus recursos."""
+        with self._conn:
+            self._delete(build_id)
+
+    #  Consultas
+
+    def query(self, sql: str, params: Union[Tuple, Dict[str, Any]] = ()) -> List[Tuple]:
+        """Consulta SQL arbitraria sobre las tablas `builds`, `resources` y `triggers`."""
+        return self._conn.execute(sql, params).fetchall()
+
+    def builds(self, env: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Builds cargados por completo, del más antiguo al más reciente."""
+        sql = ("SELECT build_id, env, created_at, resources FROM builds "
+               "WHERE resources IS NOT NULL")
+        params: Tuple = ()
+        if env is not None:
+            sql += " AND env = ?"
+            params = (env,)
+        return [
+            {"build_id": build_id, "env": build_env, "created_at": created_at, "resources": count}
+            for build_id, build_env, created_at, count in self.query(sql + " ORDER BY id", params)
+        ]
+
+    def builds_containing(self, resource_type: str, name: str) -> List[str]:
+        """Builds que contienen el recurso `resource_type.name`."""
+        rows = self.query(
+            "SELECT DISTINCT b.build_id FROM resources r JOIN builds b ON b.id = r.build "
+            "WHERE r.type = ? AND r.name = ? AND b.resources IS NOT NULL ORDER BY b.id",
+            (resource_type, name))
+        return [build_id for (build_id,) in rows]
+
+    def count_by_module(self, build_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Cantidad de recursos por ruta de módulo (por ejemplo por grupo) en cada build.
+
+        Returns:
+            ``{build_id: {ruta_de_modulo: cantidad}}``.
+        """
+        sql = ("SELECT b.build_id, r.module, COUNT(*) FROM resources r "
+               "JOIN builds b ON b.id = r.build WHERE b.resources IS NOT NULL")
+        params: Tuple = ()
+        if build_id is not None:
+            sql += " AND b.build_id = ?"
+            params = (build_id,)
+        counts: Dict[str, Dict[str, int]] = {}
+        for build, module, count in self.query(sql + " GROUP BY r.build, r.module ORDER BY r.build, r.module",
+                                               params):
+            counts.setdefault(build, {})[module] = count
+        return counts
+
+    def find_by_trigger(self, key: str, value: Any,
+                        build_id: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """
+        Recursos cuyo trigger (aplanado) `key` vale `value`.
+
+        Returns:
+            Tuplas ``(build_id, ruta_de_modulo, "tipo.nombre")``.
+        """
+        sql = ("SELECT b.build_id, r.module, r.type || '.' || r.name FROM triggers t "
+               "JOIN resources r ON r.id = t.resource JOIN builds b ON b.id = r.build "
+               "WHERE t.key = ? AND t.value = ? AND b.resources IS NOT NULL")
+        params: Tuple = (key, value)
+        if build_id is not None:
+            sql += " AND b.build_id = ?"
+            params += (build_id,)
+        return self.query(sql + " ORDER BY r.id", params)
+
+    def resources(self, build_id: str, module: Optional[str] = None) -> Iterator[Tuple[str, str, str]]:
+        """Recursos de un build (opcionalmente de un módulo) como ``(módulo, tipo, nombre)``."""
+        sql = ("SELECT r.module, r.type, r.name FROM resources r JOIN builds b ON b.id = r.build "
+               "WHERE b.build_id = ?")
+        params: Tuple = (build_id,)
+        if module is not None:
+            sql += " AND r.module = ?"
+            params += (module,)
+        return iter(self._conn.execute(sql + " ORDER BY r.id", params))
+
+    def triggers(self, build_id: str, resource_type: str, name: str) -> Dict[str, Any]:
+        """Triggers aplanados de un recurso de un build."""
+        rows = self.query(
+            "SELECT t.key, t.value FROM triggers t JOIN resources r ON r.id = t.resource "
+            "JOIN builds b ON b.id = r.build WHERE b.build_id = ? AND r.type = ? AND r.name = ?",
+            (build_id, resource_type, name))
+        return dict(rows)
@@ -0,0 +1,247 @@
+"""Modelo compacto de recursos
+
+Un recurso Terraform en forma JSON es un anidamiento de dicts y listas de un elemento
+(``{"resource": [{tipo: [{nombre: [config]}]}]}``) que cuesta cientos de bytes de
+contenedores antes de guardar ningún dato. `CompactResource` guarda solo tipo, nombre,
+triggers, provisioners y atributos extra en un objeto con `__slots__`, y construye la
+forma anidada recién al exportar.
+
+En los grupos, `SharedTriggers` evita además un dict de triggers por recurso: los
+valores comunes del grupo viven en un `TriggerLayout` compartido (con claves y valores
+string internados) y cada recurso guarda solo sus valores propios, hasta que se
+modifica y pasa a tener su propio dict (copia en escritura).
+"""
+
+import sys
+from collections.abc import MutableMapping
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+
+def _intern(value: Any) -> Any:
+    """Interna strings para que grupos distintos compartan las mismas claves y valores."""
+    return sys.intern(value) if type(value) is str else value
+
+
+class TriggerLayout:
+    """
+    Disposición de triggers común a un lote de recursos.
+
+    Atributos:
+        template: Triggers en orden de salida; las claves propias guardan un marcador.
+        own_keys: Claves cuyo valor es distinto en cada recurso (por ejemplo "factory_uuid").
+        common: Vista de solo lectura de los valores comunes.
+    """
+
+    __slots__ = ("template", "own_keys", "common", "_positions")
+
+    def __init__(self, triggers: Mapping[str, Any], own_keys: Sequence[str] = ()) -> None:
+        """
+        Args:
+            triggers: Triggers del lote, en el orden en que se exportan.
+            own_keys: Claves de `triggers` cuyo valor aporta cada recurso.
+        """
+        self.template = {_intern(key): _intern(value) for key, value in triggers.items()}
+        self.own_keys = tuple(_intern(key) for key in own_keys)
+        missing = [key for key in self.own_keys if key not in self.template]
+        if missing:
+            raise ValueError(f"claves propias fuera de la disposición: {missing}")
+        self._positions = {key: position for position, key in enumerate(self.own_keys)}
+        self.common = MappingProxyType({key: value for key, value in self.template.items()
+                                        if key not in self._positions})
+
+    def bind(self, values: Tuple[Any, ...] = ()) -> "SharedTriggers":
+        """Triggers de un recurso con los valores propios `values` (en el orden de `own_keys`)."""
+        return SharedTriggers(self, values)
+
+    def __repr__(self) -> str:
+        return f"TriggerLayout(keys={list(self.template)}, own_keys={list(self.own_keys)})"
+
+
+class SharedTriggers(MutableMapping):
+    """
+    Triggers de un recurso que comparten los valores comunes de su `TriggerLayout`.
+
+    Se comporta como un dict (lectura, escritura, igualdad); la primera modificación
+    crea el dict propio del recurso y a partir de ahí el layout ya no se usa.
+    `to_dict()` devuelve un dict nuevo en el mismo orden que tendría sin compartir.
+    """
+
+    __slots__ = ("_layout", "_values", "_own")
+
+    def __init__(self, layout: TriggerLayout, values: Tuple[Any, ...] = ()) -> None:
+        if len(values) != len(layout.own_keys):
+            raise ValueError("se esperaba un valor por cada clave propia del layout")
+        self._layout = layout
+        # Con una sola clave propia (el caso de los grupos) se guarda el valor sin tupla
+        self._values = values[0] if len(values) == 1 else values
+        self._own: Optional[Dict[str, Any]] = None
+
+    def _own_values(self) -> Tuple[Any, ...]:
+        return (self._values,) if len(self._layout.own_keys) == 1 else self._values
+
+    @property
+    def diverged(self) -> bool:
+        """True si el recurso ya tiene su propio dict de triggers."""
+        return self._own is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self._own is not None:
+            return dict(self._own)
+        triggers = self._layout.template.copy()
+        triggers.update(zip(self._layout.own_keys, self._own_values()))
+        return triggers
+
+    def copy(self) -> "SharedTriggers":
+        """Copia independiente que sigue compartiendo el layout."""
+        clone = SharedTriggers.__new__(SharedTriggers)
+        clone._layout, clone._values = self._layout, self._values
+        clone._own = None if self._own is None else _copy_json(self._own)
+        return clone
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "SharedTriggers":
+        return self.copy()
+
+    def _diverge(self) -> Dict[str, Any]:
+        if self._own is None:
+            self._own = self.to_dict()
+            self._values = None
+        return self._own
+
+    def __getitem__(self, key: str) -> Any:
+        if self._own is not None:
+            return self._own[key]
+        position = self._layout._positions.get(key)
+        if position is not None:
+            return self._own_values()[position]
+        return self._layout.common[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._diverge()[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._diverge()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._own if self._own is not None else self._layout.template)
+
+    def __len__(self) -> int:
+        return len(self._own if self._own is not None else self._layout.template)
+
+    def __repr__(self) -> str:
+        return f"SharedTriggers({self.to_dict()})"
+
+
+def _copy_json(value: Any) -> Any:
+    """Copia de dicts/listas JSON (sin importar `prototype`, que depende de este módulo)."""
+    if isinstance(value, SharedTriggers):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return value
+
+
+class CompactResource:
+    """
+    Recurso Terraform compacto. Es una hoja válida del CompositeModule, la aceptan las
+    fábricas (`compact=True`), los mutadores y `ResourcePrototype`.
+
+    El bloque exportado contiene, en este orden, "triggers", los atributos extra y
+    "provisioner".
+
+    Ejemplo:
+        >>> r = CompactResource("null_resource", "app", {"env": "prod"})
+        >>> r.materialize()
+        {'resource': [{'null_resource': [{'app': [{'triggers': {'env': 'prod'}}]}]}]}
+    """
+
+    __slots__ = ("type", "name", "triggers", "provisioners", "attributes")
+
+    def __init__(self, type: str, name: str,
+                 triggers: Optional[Dict[str, Any]] = None,
+                 provisioners: Optional[List[Any]] = None,
+                 attributes: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Args:
+            type: Tipo de recurso (por ejemplo "null_resource").
+            name: Nombre del recurso.
+            triggers: Triggers del recurso (None = sin clave "triggers").
+            provisioners: Valor de la clave "provisioner" (opcional).
+            attributes: Otros atributos de la configuración (opcional).
+        """
+        self.type = type
+        self.name = name
+        self.triggers = triggers
+        self.provisioners = provisioners
+        self.attributes = attributes
+
+    @classmethod
+    def from_resource(cls, resource_dict: Dict[str, Any]) -> "CompactResource":
+        """
+        Convierte un diccionario Terraform JSON con un único recurso.
+
+        Raises:
+            ValueError: si el diccionario no contiene exactamente un recurso.
+        """
+        blocks = resource_dict.get("resource", [])
+        if len(blocks) != 1 or len(blocks[0]) != 1:
+            raise ValueError("el diccionario debe contener exactamente un bloque de recurso")
+        (resource_type, named), = blocks[0].items()
+        if len(named) != 1 or len(named[0]) != 1:
+            raise ValueError("el diccionario debe contener exactamente un recurso")
+        (name, configs), = named[0].items()
+
+        attributes = dict(configs[0]) if configs else {}
+        triggers = attributes.pop("triggers", None)
+        provisioners = attributes.pop("provisioner", None)
+        return cls(resource_type, name, triggers, provisioners, attributes or None)
+
+    def to_block(self) -> Dict[str, Any]:
+        """
+        Bloque ``{tipo: [{nombre: [config]}]}`` de este recurso.
+
+        Comparte los triggers y atributos con el recurso (no los copia), salvo los
+        `SharedTriggers`, que se expanden a un dict nuevo.
+        """
+        config: Dict[str, Any] = {}
+        if isinstance(self.triggers, SharedTriggers):
+            config["triggers"] = self.triggers.to_dict()
+        elif self.triggers is not None:
+            config["triggers"] = self.triggers
+        if self.attributes:
+            config.update(self.attributes)
+        if self.provisioners:
+            config["provisioner"] = self.provisioners
+        return {self.type: [{self.name: [config]}]}
+
+    def materialize(self, copy: bool = True) -> Dict[str, Any]:
+        """
+        Expande el recurso a la forma Terraform JSON ``{"resource": [bloque]}``.
+
+        Args:
+            copy: si es False, el resultado comparte triggers y atributos con el recurso.
+        """
+        block = self.to_block()
+        return {"resource": [_copy_json(block) if copy else block]}
+
+    def iter_blocks(self) -> Iterator[Dict[str, Any]]:
+        """Produce el bloque del recurso (protocolo de hojas del CompositeModule)."""
+        yield self.to_block()
+
+    def count_resources(self) -> int:
+        """Un CompactResource siempre es un recurso."""
+        return 1
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "CompactResource":
+        return CompactResource(self.type, self.name, _copy_json(self.triggers),
+                               _copy_json(self.provisioners), _copy_json(self.attributes))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactResource):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"CompactResource(type='{self.type}', name='{self.name}')"
@@ -2,7 +2,360 @@
 Permite tratar múltiples recursos Terraform como una única unidad lógica o módulo compuesto.
 """
 
-from typing import List, Dict, Any, Union
+import copy
+import hashlib
+from typing import List, Dict, Any, Callable, Union, Iterable, Iterator, Optional, Set, Tuple
+
+from .compact import CompactResource
+from .factory import _gc_paused
+from .instrumentation import _STATE
+from .merkle import block_hash, resource_key, _unique
+from .prototype import json_clone
+from .spill import SpilledKeys, SpilledSegment, SpillStore, _ESTIMATOR
+from .streaming import encode_block
+
+# Marcador de trigger ausente (None es un valor de trigger válido)
+_MISSING = object()
+
+# Clave "tipo.nombre" (como en Terraform); un str no lo sigue el recolector de ciclos,
+# a diferencia de una tupla por recurso
+ResourceKey = str
+
+
+class ModulePath:
+    """
+    Ruta de módulos desde la raíz hasta el módulo que contiene un recurso.
+
+    Se implementa como lista enlazada inmutable: extender la ruta al descender un nivel
+    es O(1) y los niveles comparten prefijo, por lo que recorrer árboles muy profundos
+    no cuesta memoria cuadrática.
+    """
+
+    __slots__ = ("parent", "name", "depth")
+
+    def __init__(self, name: str, parent: Optional["ModulePath"] = None) -> None:
+        self.parent = parent
+        self.name = name
+        self.depth = 1 if parent is None else parent.depth + 1
+
+    def child(self, name: str) -> "ModulePath":
+        """Ruta del submódulo `name` dentro de este módulo."""
+        return ModulePath(name, self)
+
+    def as_tuple(self) -> Tuple[str, ...]:
+        """Nombres de los módulos desde la raíz."""
+        names = []
+        node = self
+        while node is not None:
+            names.append(node.name)
+            node = node.parent
+        return tuple(reversed(names))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.as_tuple())
+
+    def __len__(self) -> int:
+        return self.depth
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ModulePath):
+            other = other.as_tuple()
+        return self.as_tuple() == other
+
+    def __hash__(self) -> int:
+        return hash(self.as_tuple())
+
+    def __str__(self) -> str:
+        return "/".join(self.as_tuple())
+
+    def __repr__(self) -> str:
+        return f"ModulePath('{self}')"
+
+
+class _TreeIndex:
+    """
+    Índice compartido por todos los módulos de un árbol: (tipo, nombre) -> recurso y un
+    índice invertido (clave, valor) de trigger -> recursos.
+
+    Al agregar un submódulo se unen los índices de ambos árboles (el menor se vuelca en
+    el mayor), por lo que cada recurso se re-indexa a lo sumo O(log n) veces. El índice
+    de triggers se construye en la primera consulta y desde entonces se mantiene al día;
+    `drop_owner()` no lo recorre: las entradas que quedan obsoletas se descartan al
+    consultarlo (ver `CompositeModule.find_by_trigger`).
+
+    Las claves de los recursos volcados a disco salen de los diccionarios y pasan a
+    `spilled` (8 bytes por recurso, ver `SpilledKeys`). El índice de triggers, si ya
+    se construyó, conserva sus claves.
+
+    Las hojas perezosas (`indexable = False`) no aportan claves: se guardan en `lazy`
+    y se consultan con `contains()` / `iter_shared()`, que las flotas virtuales y los
+    tramos de flota responden aritméticamente, así que una flota de millones de
+    recursos ocupa lo mismo en el índice que una de diez.
+    """
+
+    __slots__ = ("keys", "owners", "by_owner", "spilled", "lazy", "tags", "members", "roots")
+
+    def __init__(self, module: "CompositeModule") -> None:
+        # Diccionarios paralelos (sin una tupla por recurso): bloque u hoja y módulo dueño
+        self.keys: Dict[ResourceKey, Any] = {}
+        self.owners: Dict[ResourceKey, "CompositeModule"] = {}
+        self.by_owner: Dict["CompositeModule", Set[ResourceKey]] = {}  # Claves de cada módulo
+        self.spilled = SpilledKeys()  # Claves de los recursos volcados a disco
+        self.lazy: Dict["CompositeModule", List[Any]] = {}  # Hojas perezosas de cada módulo
+        self.tags: Optional[Dict[Tuple[str, Any], List[ResourceKey]]] = None  # None = sin construir
+        self.members: List["CompositeModule"] = [module]
+        self.roots = 1  # Módulos sin padre que comparten este índice
+
+    def size(self) -> int:
+        return (len(self.keys) + len(self.spilled) + len(self.members)
+                + sum(map(len, self.lazy.values())))
+
+    def iter_lazy(self) -> Iterator[Tuple[Any, "CompositeModule"]]:
+        """Hojas perezosas del árbol, con su módulo dueño."""
+        for owner, leaves in self.lazy.items():
+            for leaf in leaves:
+                yield leaf, owner
+
+    def locate(self, key: ResourceKey) -> List[Tuple[Any, "CompositeModule"]]:
+        """
+        Entradas (bloque u hoja, módulo dueño) de `key`. Si el recurso se volcó a disco
+        son los segmentos candidatos, a confirmar leyéndolos (ver `SpilledKeys`).
+        """
+        ref = self.keys.get(key)
+        if ref is not None:
+            return [(ref, self.owners[key])]
+        found = [(leaf, owner) for leaf, owner in self.iter_lazy() if leaf.contains(key)]
+        if self.spilled:
+            found.extend(self.spilled.candidates(key))
+        return found
+
+    def first_present(self, keys: Iterable[ResourceKey]) -> Optional[ResourceKey]:
+        """
+        Primera clave de `keys` que ya está en el índice (en memoria, volcada a disco o
+        en una hoja perezosa).
+        """
+        resident = self.keys
+        if not self.spilled and not self.lazy:
+            return next((key for key in keys if key in resident), None)
+        keys = keys if isinstance(keys, (dict, set, frozenset)) else dict.fromkeys(keys)
+        for key in keys:
+            if key in resident or (self.spilled and any(
+                    _segment_holds(segment, key) for segment, _ in self.spilled.candidates(key))):
+                return key
+        for leaf, _ in self.iter_lazy():
+            shared = next(leaf.iter_shared(keys), None)
+            if shared is not None:
+                return shared
+        return None
+
+    def first_in_leaf(self, leaf: Any) -> Optional[ResourceKey]:
+        """Primera clave de la hoja perezosa `leaf` que ya está en el índice."""
+        shared = next(leaf.iter_shared(self.keys), None)
+        if shared is None and self.spilled:
+            shared = next((key for key in leaf.iter_keys()
+                           if any(_segment_holds(segment, key)
+                                  for segment, _ in self.spilled.candidates(key))), None)
+        for other, _ in self.iter_lazy():
+            if shared is not None:
+                break
+            shared = _lazy_overlap(leaf, other)
+        return shared
+
+    def first_shared_with(self, other: "_TreeIndex") -> Optional[ResourceKey]:
+        """Primera clave de `other` (el índice menor) que también está en este."""
+        shared = self.first_present(other.keys)
+        for segment in other.spilled.segments:
+            if shared is not None:
+                break
+            shared = self.first_present(
+                key for block in segment.iter_blocks() for key in _block_keys(block))
+        for leaf, _ in other.iter_lazy():
+            if shared is not None:
+                break
+            shared = self.first_in_leaf(leaf)
+        return shared
+
+    def add_lazy(self, owner: "CompositeModule", leaf: Any) -> None:
+        self.lazy.setdefault(owner, []).append(leaf)
+        if self.tags is not None:
+            self._tag_leaf(leaf)
+
+    def move_to_disk(self, owner: "CompositeModule", keys: List[ResourceKey],
+                     segment: SpilledSegment) -> None:
+        """Pasa las claves de `owner` recién escritas en `segment` al índice compacto."""
+        own = self.by_owner.get(owner, set())
+        moved = [key for key in keys if self.owners.get(key) is owner]
+        for key in moved:
+            del self.keys[key]
+            del self.owners[key]
+            own.discard(key)
+        self.spilled.add(segment, owner, moved)
+
+    def insert_all(self, owner: "CompositeModule", entries: List[Tuple[ResourceKey, Any]]) -> None:
+        own = self.by_owner.setdefault(owner, set())
+        for key, ref in entries:
+            self.keys[key] = ref
+            self.owners[key] = owner
+            own.add(key)
+        if self.tags is not None:
+            self.tag_all(entries)
+
+    def tag_all(self, entries: Iterable[Tuple[ResourceKey, Any]]) -> None:
+        """
+        Agrega `entries` al índice de triggers, recorriendo cada contenedor (segmento en
+        disco u hoja perezosa) una sola vez.
+        """
+        containers: Dict[int, Any] = {}
+        for key, ref in entries:
+            if _is_container(ref):
+                containers[id(ref)] = ref
+            else:
+                self._tag(key, ref)
+        for container in containers.values():
+            for block in container.iter_blocks():
+                for key in _block_keys(block):
+                    if self.keys.get(key) is container:
+                        self._tag(key, block)
+
+    def _tag_leaf(self, leaf: Any) -> None:
+        """Agrega al índice de triggers los recursos de un contenedor (hoja perezosa o segmento)."""
+        for block in leaf.iter_blocks():
+            for key in _block_keys(block):
+                self._tag(key, block)
+
+    def _tag(self, key: ResourceKey, ref: Any) -> None:
+        for pair in _triggers_of(ref, key).items():
+            try:
+                self.tags.setdefault(pair, []).append(key)
+            except TypeError:
+                pass  # Valores no hashables (listas, dicts) no se indexan
+
+    def discard(self, entries: List[Tuple[ResourceKey, Dict[str, Any]]]) -> None:
+        """Quita claves del índice; `entries` trae los triggers con que se etiquetaron."""
+        for key, triggers in entries:
+            del self.keys[key]
+            self.by_owner[self.owners.pop(key)].discard(key)
+            if self.tags is None:
+                continue
+            for pair in triggers.items():
+                try:
+                    bucket = self.tags.get(pair)
+                except TypeError:
+                    continue  # Valor no hashable: nunca se indexó
+                if bucket and key in bucket:
+                    bucket.remove(key)
+                    if not bucket:
+                        del self.tags[pair]
+
+    def ensure_tags(self) -> Dict[Tuple[str, Any], List[ResourceKey]]:
+        if self.tags is None:
+            self.tags = {}
+            with _gc_paused():
+                self.tag_all(self.keys.items())
+                for segment in self.spilled.segments:
+                    self._tag_leaf(segment)
+                for leaf, _ in self.iter_lazy():
+                    self._tag_leaf(leaf)
+        return self.tags
+
+    def absorb(self, other: "_TreeIndex") -> None:
+        """Vuelca `other` (sin claves en común) en este índice."""
+        self.keys.update(other.keys)
+        self.owners.update(other.owners)
+        self.by_owner.update(other.by_owner)
+        self.spilled.absorb(other.spilled)
+        for owner, leaves in other.lazy.items():
+            self.lazy.setdefault(owner, []).extend(leaves)
+        if self.tags is not None:
+            for tag, keys in other.ensure_tags().items():
+                self.tags.setdefault(tag, []).extend(keys)
+        for module in other.members:
+            module._index = self
+        self.members.extend(other.members)
+        self.roots += other.roots
+
+    def drop_owner(self, owner: "CompositeModule") -> None:
+        """
+        Elimina las entradas de los recursos directos de `owner` (y sus hojas
+        perezosas), en O(recursos en memoria de `owner`). El índice de triggers no se
+        toca: sus entradas obsoletas se filtran en la próxima consulta.
+        """
+        for key in self.by_owner.pop(owner, ()):
+            del self.keys[key]
+            del self.owners[key]
+        self.lazy.pop(owner, None)
+
+
+def _lazy_overlap(first: Any, second: Any) -> Optional[ResourceKey]:
+    """
+    Primera clave que producen dos hojas perezosas, sin materializar la mayor: se
+    pregunta con `contains()` aritmético si alguna lo tiene, o se comparan las listas
+    de nombres.
+    """
+    small, large = ((first, second) if first.count_resources() <= second.count_resources()
+                    else (second, first))
+    for probe, scanned in ((large, small), (small, large)):
+        if probe.fast_contains:
+            return next((key for key in scanned.iter_keys() if probe.contains(key)), None)
+    small_names, large_names = small.names(), large.names()
+    if small_names is not None and large_names is not None:
+        if small_names[0] != large_names[0] or set(small_names[1]).isdisjoint(large_names[1]):
+            return None
+    return next(large.iter_shared(dict.fromkeys(small.iter_keys())), None)
+
+
+def _block_keys(block: Dict[str, Any]) -> Iterator[ResourceKey]:
+    """Claves "tipo.nombre" de los recursos de un bloque."""
+    for resource_type, named_list in block.items():
+        for named in named_list:
+            if isinstance(named, dict):
+                for name in named:
+                    yield f"{resource_type}.{name}"
+
+
+def _index_entries(child: Any) -> List[Tuple[ResourceKey, Any]]:
+    """
+    Entradas de índice de una hoja: ("tipo.nombre", bloque u hoja).
+
+    Los recursos de un segmento volcado a disco apuntan al segmento. Las hojas con
+    `indexable = False` no pasan por aquí (ver `_TreeIndex.lazy`).
+    """
+    if isinstance(child, CompactResource):
+        return [(f"{child.type}.{child.name}", child)]
+    if isinstance(child, SpilledSegment):
+        return [(key, child) for block in child.iter_blocks() for key in _block_keys(block)]
+    blocks = child.get("resource", []) if isinstance(child, dict) else child.iter_blocks()
+    return [(key, block) for block in blocks for key in _block_keys(block)]
+
+
+def _segment_holds(segment: SpilledSegment, key: ResourceKey) -> bool:
+    """True si algún bloque del segmento volcado contiene el recurso `key`."""
+    return any(key in _block_keys(block) for block in segment.iter_blocks())
+
+
+def _is_container(ref: Any) -> bool:
+    """True si la entrada del índice apunta a una hoja con varios recursos (segmento o perezosa)."""
+    return not isinstance(ref, (dict, CompactResource))
+
+
+def _is_resident(child: Any) -> bool:
+    """True si la hoja guarda sus recursos en memoria (y por lo tanto puede volcarse a disco)."""
+    return not isinstance(child, SpilledSegment) and getattr(child, "indexable", True)
+
+
+def _triggers_of(ref: Any, key: ResourceKey) -> Dict[str, Any]:
+    """Triggers del recurso `key` dentro de un bloque (o de un CompactResource)."""
+    if isinstance(ref, CompactResource):
+        return ref.triggers or {}
+    resource_type, _, name = key.partition(".")
+    for named in ref.get(resource_type, []):
+        if isinstance(named, dict) and name in named:
+            configs = named[name]
+            config = configs[0] if configs else None
+            triggers = config.get("triggers") if isinstance(config, dict) else None
+            return triggers or {}
+    return {}
+
 
 class CompositeModule:
     """
@@ -10,27 +363,292 @@ class CompositeModule:
     Sigue el patrón Composite, donde se unifican estructuras individuales en una sola jerarquía.
 
     Soporta submódulos anidados, permitiendo construir jerarquías complejas de recursos.
+
+    El conteo de recursos y la salida de `export()` se mantienen de forma incremental:
+    cada `add()` actualiza el contador y marca como sucio el módulo y todos sus padres,
+    por lo que contar o re-exportar un árbol sin cambios cuesta O(1).
+
+    Además se mantiene un índice por (tipo, nombre) y por pares clave/valor de triggers
+    (`find`, `find_by_trigger`), que rechaza nombres duplicados al insertar.
+
+    Con `memory_budget`, cuando los recursos en memoria del subárbol superan el
+    presupuesto se vuelcan a disco (ver `iac_patterns.spill`).
     """
 
-    def __init__(self, name: str = "root") -> None:
+    def __init__(self, name: str = "root", memory_budget: Optional[int] = None,
+                 spill_dir: Optional[str] = None) -> None:
         """
         Inicializa la estructura compuesta como una lista vacía de recursos hijos.
-        Cada hijo puede ser un diccionario de recursos o un CompositeModule anidado.
+        Cada hijo puede ser un diccionario de recursos, un CompositeModule anidado o una
+        hoja perezosa que implemente `iter_blocks()` y `count_resources()` (por ejemplo
+        un `DeltaResource`).
 
         Args:
             name: Nombre del módulo (útil para debugging y organización).
+            memory_budget: Bytes (estimados) de recursos que el subárbol puede mantener
+                           en memoria; al superarlos se ejecuta `spill()`. None = sin límite.
+            spill_dir: Directorio del archivo temporal de segmentos (por defecto el del sistema).
         """
         self.name = name
-        self._children: List[Union[Dict[str, Any], "CompositeModule"]] = []
+        self._children: List[Union[Dict[str, Any], "CompositeModule", Any]] = []
+        self._parents: List["CompositeModule"] = []  # Módulos que contienen a este
+        self._count = 0  # Recursos del subárbol, mantenido incrementalmente
+        self._export_cache: Optional[List[Dict[str, Any]]] = None  # Bloques exportados; None = sucio
+        self._hash_cache: Optional[str] = None  # Hash Merkle del subárbol
+        self._resource_hash_cache: Optional[Dict[str, str]] = None  # Hashes de hojas directas
+        self._index = _TreeIndex(self)  # Compartido con todo el árbol
+        self._resident = 0  # Bytes estimados de los recursos del subárbol en memoria
+        self._memory_budget = memory_budget
+        self._spill_dir = spill_dir
+        self._store: Optional[SpillStore] = None  # Creado en el primer `spill()`
+        self._fragments: Dict[int, str] = {}  # id(bloque o CompactResource) -> JSON codificado
 
     def add(self, child: Union[Dict[str, Any], "CompositeModule"]) -> None:
         """
         Agrega un recurso o submódulo al módulo compuesto.
 
         Args:
-            child: Puede ser un diccionario de recurso o un CompositeModule anidado.
+            child: Puede ser un diccionario de recurso, un CompositeModule anidado o una
+                   hoja con `iter_blocks()` y `count_resources()`.
+
+        Raises:
+            ValueError: si algún recurso del hijo tiene el mismo (tipo, nombre) que otro
+                        recurso del árbol, o si el submódulo ya forma parte del árbol.
         """
+        if isinstance(child, CompositeModule):
+            self._merge_index(child)
+        else:
+            self._index_leaf(child)
+
         self._children.append(child)
+        if isinstance(child, CompositeModule):
+            child._parents.append(self)
+            resident = child._resident
+        else:
+            self._resource_hash_cache = None
+            resident = self._leaf_bytes(child)
+        self._propagate(self._child_count(child), resident)
+
+    def _index_leaf(self, child: Any) -> None:
+        """
+        Indexa los recursos de una hoja, verificando antes que no haya duplicados.
+
+        Las hojas con `indexable = False` (flotas virtuales, recetas pendientes) solo se
+        registran en el índice; deben implementar `iter_keys()`, `contains(key)`,
+        `iter_shared(keys)`, `names()` y el atributo `fast_contains`.
+        """
+        if not getattr(child, "indexable", True):
+            duplicate = self._index.first_in_leaf(child)
+            if duplicate is not None:
+                raise ValueError(f"Recurso duplicado: {duplicate}")
+            self._index.add_lazy(self, child)
+            return
+        entries = _index_entries(child)
+        duplicate = self._index.first_present(key for key, _ in entries)
+        if duplicate is not None:
+            raise ValueError(f"Recurso duplicado: {duplicate}")
+        if len(entries) > 1 and len({key for key, _ in entries}) != len(entries):
+            raise ValueError("Recurso duplicado dentro de la misma hoja")
+        self._index.insert_all(self, entries)
+
+    def _merge_index(self, child: "CompositeModule") -> None:
+        """Une el índice del árbol de `child` con el de este árbol (el menor en el mayor)."""
+        mine, theirs = self._index, child._index
+        if theirs is mine:
+            raise ValueError(f"El submódulo '{child.name}' ya forma parte de este árbol")
+        small, large = (theirs, mine) if theirs.size() <= mine.size() else (mine, theirs)
+        duplicate = large.first_shared_with(small)
+        if duplicate is not None:
+            raise ValueError(f"Recurso duplicado: {duplicate}")
+        large.absorb(small)
+        if not child._parents:
+            large.roots -= 1  # La raíz de `child` deja de serlo
+
+    @staticmethod
+    def _child_count(child: Any) -> int:
+        """Número de recursos que aporta un hijo directo."""
+        if isinstance(child, dict):
+            return len(child.get("resource", []))
+        return child.count_resources()
+
+    @classmethod
+    def _leaf_bytes(cls, child: Any) -> int:
+        """Bytes estimados que una hoja mantiene en memoria (0 si es perezosa o ya está en disco)."""
+        if not _is_resident(child):
+            return 0
+        return _ESTIMATOR.estimate(child, cls._child_count(child))
+
+    def _propagate(self, delta: int, resident: int = 0) -> None:
+        """
+        Suma `delta` al contador de este módulo y de todos sus ancestros (y `resident` a
+        sus bytes en memoria), e invalida sus caches de exportación y de hash. Los
+        módulos que quedan por encima de su presupuesto se vuelcan a disco al final.
+        Iterativo para soportar jerarquías muy profundas.
+        """
+        over_budget = []
+        pending = [self]
+        while pending:
+            module = pending.pop()
+            module._count += delta
+            module._resident += resident
+            module._export_cache = None
+            module._hash_cache = None
+            if module._memory_budget is not None and module._resident > module._memory_budget:
+                over_budget.append(module)
+            pending.extend(module._parents)
+        for module in over_budget:
+            if module._resident > module._memory_budget:
+                module.spill()
+
+    def spill(self) -> int:
+        """
+        Vuelca a disco todos los recursos en memoria del subárbol.
+
+        Cada tramo de hojas consecutivas de un módulo se escribe como un segmento JSONL
+        y se reemplaza por un `SpilledSegment` en la misma posición; los submódulos, el
+        orden de exportación, los contadores y el índice se conservan. Los diccionarios
+        volcados dejan de pertenecer al árbol: modificarlos ya no cambia la salida.
+
+        Returns:
+            Número de recursos volcados.
+        """
+        if self._store is None:
+            self._store = SpillStore(self._spill_dir)
+        spilled = 0
+        released = self._resident
+        pending, seen = [self], set()
+        while pending:
+            module = pending.pop()
+            if id(module) in seen or not module._resident:
+                continue
+            seen.add(id(module))
+            children: List[Any] = []
+            run: List[Any] = []
+            for child in module._children:
+                if not isinstance(child, CompositeModule) and _is_resident(child):
+                    run.append(child)
+                    continue
+                if run:
+                    children.append(module._spill_run(run, self._store))
+                    spilled += children[-1].count
+                    run = []
+                if isinstance(child, CompositeModule):
+                    pending.append(child)
+                children.append(child)
+            if run:
+                children.append(module._spill_run(run, self._store))
+                spilled += children[-1].count
+            module._children = children
+            module._resident = 0
+            module._export_cache = None
+            module._fragments = {}
+
+        # Los ancestros dejan de contar los bytes volcados (y sus exports en cache)
+        pending = list(self._parents)
+        while pending:
+            module = pending.pop()
+            module._resident -= released
+            module._export_cache = None
+            pending.extend(module._parents)
+        return spilled
+
+    def _spill_run(self, run: List[Any], store: SpillStore) -> SpilledSegment:
+        """Escribe un tramo de hojas como segmento y re-apunta sus entradas del índice."""
+        keys = [key for leaf in run for key, _ in _index_entries(leaf)]
+        segment = store.write(
+            block
+            for leaf in run
+            for block in (leaf.get("resource", []) if isinstance(leaf, dict) else leaf.iter_blocks())
+        )
+        self._index.move_to_disk(self, keys, segment)
+        return segment
+
+    def invalidate(self) -> None:
+        """
+        Recalcula el contador de este módulo recorriendo el subárbol con
+        `iter_resources()` y descarta las caches propias y de sus padres.
+
+        Necesario solo si un diccionario de recurso ya agregado se modifica in-place
+        (por ejemplo agregando bloques a su lista "resource" o renombrando un recurso);
+        también re-indexa los recursos directos del módulo (los volcados a disco no
+        pueden cambiar y conservan sus entradas).
+        """
+        self._index.drop_owner(self)
+        for child in self._children:
+            if not isinstance(child, (CompositeModule, SpilledSegment)):
+                self._index_leaf(child)
+
+        recount = sum(1 for _ in self._walk(None))
+        self._resource_hash_cache = None
+        self._fragments = {}
+        self._propagate(recount - self._count)
+
+    def mutate(self, resource_type: str, name: str, mutator: Callable[[Any], Any]) -> None:
+        """
+        Modifica un recurso del subárbol e invalida solo lo que depende de él: su
+        fragmento codificado, sus entradas del índice y las caches de export y hash de
+        su módulo y de los ancestros.
+
+        El mutador recibe, como en `ResourcePrototype.clone`, una copia del recurso en
+        la forma de la fábrica (``{"resource": [bloque]}``) o del `CompactResource`, y la
+        modifica en el acto (sirven los de `iac_patterns.mutators`). Si falla o el
+        resultado choca con otro recurso, el árbol no cambia.
+
+        Raises:
+            KeyError: si el recurso no está en el subárbol.
+            ValueError: si el recurso está en una hoja perezosa o volcada a disco, si el
+                        mutador cambia el número de bloques o si el nuevo nombre ya existe.
+        """
+        key = f"{resource_type}.{name}"
+        index = self._index
+        entries = [(ref, owner) for ref, owner in index.locate(key) if self._in_subtree(owner)]
+        if isinstance(entries[0][0] if entries else None, SpilledSegment):
+            entries = [(ref, owner) for ref, owner in entries if _segment_holds(ref, key)]
+        if not entries:
+            raise KeyError(key)
+        ref, owner = entries[0]
+        if isinstance(ref, CompactResource):
+            old_keys = [key]
+            candidate = copy.deepcopy(ref)
+            mutator(candidate)
+            new_keys = [f"{candidate.type}.{candidate.name}"]
+        elif isinstance(ref, dict) and owner._holds_block(ref):
+            old_keys = list(_block_keys(ref))
+            wrapper = {"resource": [json_clone(ref)]}
+            mutator(wrapper)
+            if len(wrapper["resource"]) != 1:
+                raise ValueError("el mutador debe conservar un único bloque de recurso")
+            candidate = wrapper["resource"][0]
+            new_keys = list(_block_keys(candidate))
+        else:
+            raise ValueError(f"{key} está en una hoja perezosa o volcada a disco")
+        duplicate = index.first_present(new_key for new_key in new_keys if new_key not in old_keys)
+        if duplicate is not None:
+            raise ValueError(f"Recurso duplicado: {duplicate}")
+        if len(set(new_keys)) != len(new_keys):
+            raise ValueError("Recurso duplicado dentro del bloque")
+
+        index.discard([(old_key, _triggers_of(ref, old_key)) for old_key in old_keys])
+        # Se actualiza el mismo objeto: la hoja y el índice siguen apuntando a él
+        if isinstance(ref, CompactResource):
+            for slot in CompactResource.__slots__:
+                setattr(ref, slot, getattr(candidate, slot))
+        else:
+            ref.clear()
+            ref.update(candidate)
+        index.insert_all(owner, [(new_key, ref) for new_key in new_keys])
+
+        owner._fragments.pop(id(ref), None)
+        owner._resource_hash_cache = None
+        owner._propagate(0)
+
+    def _holds_block(self, block: Dict[str, Any]) -> bool:
+        """True si `block` es un bloque de una hoja dict directa de este módulo."""
+        return any(
+            candidate is block
+            for child in self._children if isinstance(child, dict)
+            for candidate in child.get("resource", [])
+        )
 
     def add_submodule(self, submodule: "CompositeModule") -> None:
         """
@@ -43,45 +661,307 @@ class CompositeModule:
         """
         if not isinstance(submodule, CompositeModule):
             raise TypeError("submodule debe ser una instancia de CompositeModule")
-        self._children.append(submodule)
+        self.add(submodule)
 
     def export(self) -> Dict[str, Any]:
         """
         Exporta todos los recursos agregados a un único diccionario.
 
-        Si hay submódulos anidados, exporta recursivamente todos sus recursos.
-        Esta estructura se puede serializar directamente a un archivo Terraform JSON válido.
+        Si hay submódulos anidados, incluye todos sus recursos (recorridos con
+        `iter_resources()`, sin recursión ni copias intermedias por nivel). Esta estructura se puede serializar directamente a un archivo Terraform JSON válido.
+
+        La lista de bloques se guarda en cache hasta que el módulo o algún descendiente
+        cambie, y cada llamada devuelve una copia superficial: agregar o quitar bloques
+        del resultado no afecta a las exportaciones siguientes (los bloques son los del
+        árbol y no deben modificarse in-place).
 
         Returns:
             Un diccionario con todos los recursos combinados bajo la clave "resource".
         """
-        aggregated: Dict[str, Any] = {"resource": []}
+        if _STATE.hooks.enabled:
+            with _STATE.hooks.step("composite.export", module=self.name,
+                                   cached=self._export_cache is not None) as step:
+                exported = self._export()
+                step.resources = len(exported["resource"])
+                return exported
+        return self._export()
 
-        for child in self._children:
-            if isinstance(child, CompositeModule):
-                # Si es un submódulo, exportarlo recursivamente y combinar recursos
-                submodule_export = child.export()
-                aggregated["resource"].extend(submodule_export.get("resource", []))
+    def _export(self) -> Dict[str, Any]:
+        if self._export_cache is not None:
+            return {"resource": list(self._export_cache)}
+
+        blocks = list(self.iter_blocks())
+        if self._memory_budget is None:
+            # Con presupuesto no se guarda: retendría en memoria todo lo volcado a disco
+            self._export_cache = blocks
+            return {"resource": list(blocks)}
+        return {"resource": blocks}
+
+    def iter_encoded(self) -> Iterator[str]:
+        """
+        Recorre el árbol y produce el documento ya codificado, en fragmentos listos para
+        `streaming.write_encoded` (idéntico byte a byte a `json.dump(export(), indent=4)`).
+
+        Cada bloque de un dict o `CompactResource` se codifica una sola vez y el
+        fragmento se guarda en su módulo hasta que el recurso cambie con `mutate()` (o
+        se llame a `invalidate()`): re-exportar un árbol sin cambios es solo concatenar
+        strings. Las hojas perezosas y los segmentos en disco se codifican cada vez.
+        La cache ocupa aproximadamente lo mismo que el texto exportado.
+
+        Yields:
+            Los fragmentos de cada tramo de hojas consecutivas, unidos por ",\\n".
+        """
+        stack = [(self, iter(self._children))]
+        while stack:
+            module, children = stack[-1]
+            cache = module._fragments
+            run: List[str] = []
+            submodule = None
+            for child in children:
+                if isinstance(child, CompositeModule):
+                    submodule = child
+                    break
+                if isinstance(child, dict):
+                    for block in child.get("resource", []):
+                        fragment = cache.get(id(block))
+                        if fragment is None:
+                            fragment = cache[id(block)] = encode_block(block)
+                        run.append(fragment)
+                elif isinstance(child, CompactResource):
+                    fragment = cache.get(id(child))
+                    if fragment is None:
+                        fragment = cache[id(child)] = encode_block(child.to_block())
+                    run.append(fragment)
+                else:
+                    run.extend(map(encode_block, child.iter_blocks()))
+            if run:
+                yield ",\n".join(run)
+            if submodule is None:
+                stack.pop()
+            else:
+                stack.append((submodule, iter(submodule._children)))
+
+    def iter_resources(self) -> Iterator[Tuple[ModulePath, Dict[str, Any]]]:
+        """
+        Recorre el árbol con una pila explícita y produce cada bloque de recurso una sola
+        vez, junto con la ruta del módulo que lo contiene.
+
+        Al no usar recursión, soporta jerarquías más profundas que el límite de recursión
+        de Python.
+
+        Yields:
+            Tuplas ``(ruta, bloque)`` en el mismo orden que `export()`.
+        """
+        return self._walk(ModulePath(self.name))
+
+    def iter_blocks(self) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre el árbol y produce cada bloque de recurso en el mismo orden que `export()`.
+
+        A diferencia de `export()`, no construye listas intermedias: permite serializar
+        módulos muy grandes en streaming.
+
+        Yields:
+            Cada bloque de la lista "resource" (por ejemplo ``{"null_resource": [...]}``).
+        """
+        for _, block in self._walk(None):
+            yield block
+
+    def _walk(self, root_path: Optional[ModulePath]) -> Iterator[Tuple[Optional[ModulePath], Dict[str, Any]]]:
+        """Recorrido iterativo en profundidad; si `root_path` es None no construye rutas."""
+        stack = [(iter(self._children), root_path)]
+        while stack:
+            children, path = stack[-1]
+            for child in children:
+                if isinstance(child, CompositeModule):
+                    child_path = None if path is None else path.child(child.name)
+                    stack.append((iter(child._children), child_path))
+                    break
+                blocks = child.get("resource", []) if isinstance(child, dict) else child.iter_blocks()
+                for block in blocks:
+                    yield path, block
             else:
-                # Si es un diccionario de recurso, agregarlo directamente
-                aggregated["resource"].extend(child.get("resource", []))
+                # Todos los hijos de este nivel fueron recorridos
+                stack.pop()
+
+    def _in_subtree(self, module: "CompositeModule") -> bool:
+        """True si `module` es este módulo o un descendiente suyo."""
+        if module is self or (not self._parents and self._index.roots == 1):
+            # Raíz única del índice: todo módulo indexado es descendiente
+            return True
+        pending, seen = list(module._parents), set()
+        while pending:
+            current = pending.pop()
+            if current is self:
+                return True
+            if id(current) not in seen:
+                seen.add(id(current))
+                pending.extend(current._parents)
+        return False
+
+    def _blocks_for(self, entries: List[Tuple[ResourceKey, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Bloques de las entradas del índice `entries` ("tipo.nombre", bloque u hoja),
+        recorriendo cada contenedor una sola vez (las hojas con `index_of`/`block_at`,
+        como las flotas virtuales, construyen solo los bloques pedidos). Queda None donde
+        el contenedor no tiene el recurso (segmento candidato de un hash compartido).
+        """
+        results: List[Any] = [None] * len(entries)
+        wanted_by_container: Dict[int, Tuple[Any, Dict[ResourceKey, int]]] = {}
+        for position, (key, ref) in enumerate(entries):
+            if isinstance(ref, CompactResource):
+                results[position] = ref.to_block()
+            elif _is_container(ref):
+                wanted_by_container.setdefault(id(ref), (ref, {}))[1][key] = position
+            else:
+                results[position] = ref
+        for container, wanted in wanted_by_container.values():
+            if hasattr(container, "block_at"):
+                for key, position in wanted.items():
+                    index = container.index_of(key)
+                    if index is not None:
+                        results[position] = container.block_at(index)
+                continue
+            for block in container.iter_blocks():
+                for key in _block_keys(block):
+                    position = wanted.pop(key, None)
+                    if position is not None:
+                        results[position] = block
+                if not wanted:
+                    break
+        return results
+
+    def find(self, resource_type: str, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca un recurso del subárbol por tipo y nombre en O(1).
+
+        Args:
+            resource_type: Tipo del recurso (por ejemplo "null_resource").
+            name: Nombre del recurso.
+
+        Returns:
+            El bloque de recurso (``{tipo: [{nombre: [...]}]}``) o None si no existe.
+        """
+        key = f"{resource_type}.{name}"
+        entries = [(key, ref) for ref, owner in self._index.locate(key) if self._in_subtree(owner)]
+        return next((block for block in self._blocks_for(entries) if block is not None), None)
+
+    def find_by_trigger(self, key: str, value: Any) -> List[Dict[str, Any]]:
+        """
+        Recursos del subárbol cuyo trigger `key` vale `value` (por ejemplo los de un
+        grupo de `build_group`: ``find_by_trigger("group", "web_tier")``).
 
-        return aggregated
+        El costo es proporcional al número de resultados, no al tamaño del árbol (la
+        primera consulta construye el índice de triggers del árbol). Las entradas que
+        `invalidate()` dejó obsoletas (recursos eliminados, re-indexados o cuyo trigger
+        cambió in-place) se descartan aquí y se limpian del índice.
+
+        Returns:
+            Bloques de recurso, en orden de indexación.
+        """
+        index = self._index
+        try:
+            tags = index.ensure_tags()
+            bucket = tags.get((key, value))
+        except TypeError:
+            return []  # Valor no hashable: nunca se indexa
+        if not bucket:
+            return []
+        candidates = dict.fromkeys(bucket)
+        # Las claves de hojas perezosas se resuelven en lote, una pasada por hoja
+        lazy_hits: Dict[ResourceKey, List[Tuple[Any, CompositeModule]]] = {}
+        if index.lazy:
+            unresolved = {resource_key: None for resource_key in candidates
+                          if resource_key not in index.keys}
+            for leaf, owner in index.iter_lazy():
+                for resource_key in (leaf.iter_shared(unresolved) if unresolved else ()):
+                    lazy_hits.setdefault(resource_key, []).append((leaf, owner))
+        live, entries = [], []
+        for resource_key in candidates:
+            if resource_key in index.keys:
+                located = [(index.keys[resource_key], index.owners[resource_key])]
+            else:
+                located = lazy_hits.get(resource_key, [])
+                if index.spilled:
+                    located = located + index.spilled.candidates(resource_key)
+            if not located or (
+                    # Segmentos y hojas perezosas no cambian in-place
+                    not _is_container(located[0][0])
+                    and _triggers_of(located[0][0], resource_key).get(key, _MISSING) != value):
+                continue
+            live.append(resource_key)
+            entries.extend((resource_key, ref) for ref, owner in located if self._in_subtree(owner))
+        if len(live) != len(bucket):
+            if live:
+                tags[(key, value)] = live
+            else:
+                del tags[(key, value)]
+        return [block for block in self._blocks_for(entries) if block is not None]
+
+    def submodules(self) -> List["CompositeModule"]:
+        """Submódulos directos, en orden de inserción."""
+        return [child for child in self._children if isinstance(child, CompositeModule)]
+
+    def resource_hashes(self) -> Dict[str, str]:
+        """
+        Hash de contenido de cada recurso que cuelga directamente de este módulo.
+
+        Returns:
+            Diccionario ``"tipo.nombre" -> sha256`` en orden de inserción (las claves
+            repetidas se desambiguan con sufijos "#2", "#3"...). No debe modificarse.
+        """
+        if self._resource_hash_cache is None:
+            hashes: Dict[str, str] = {}
+            for child in self._children:
+                if isinstance(child, CompositeModule):
+                    continue
+                blocks = child.get("resource", []) if isinstance(child, dict) else child.iter_blocks()
+                for block in blocks:
+                    hashes[_unique(resource_key(block), hashes)] = block_hash(block)
+            self._resource_hash_cache = hashes
+        return self._resource_hash_cache
+
+    def subtree_hash(self) -> str:
+        """
+        Hash Merkle del subárbol: combina los hashes de los recursos directos y los
+        hashes (con nombre) de los submódulos.
+
+        Se guarda en cache y se invalida junto con la de `export()`, así que tras un
+        cambio solo se recalculan los módulos en el camino hacia la raíz. Iterativo para
+        soportar jerarquías muy profundas.
+
+        Returns:
+            Digest sha256 en hexadecimal.
+        """
+        stack: List[Tuple["CompositeModule", bool]] = [(self, False)]
+        while stack:
+            module, ready = stack.pop()
+            if module._hash_cache is not None:
+                continue
+            submodules = module.submodules()
+            if not ready:
+                # Primero los submódulos sucios (post-orden)
+                stack.append((module, True))
+                stack.extend((sub, False) for sub in submodules if sub._hash_cache is None)
+                continue
+            digest = hashlib.sha256()
+            for key, resource_hash in module.resource_hashes().items():
+                digest.update(f"R {key} {resource_hash}\n".encode("utf-8"))
+            for submodule in submodules:
+                digest.update(f"M {submodule.name} {submodule._hash_cache}\n".encode("utf-8"))
+            module._hash_cache = digest.hexdigest()
+        return self._hash_cache
 
     def count_resources(self) -> int:
         """
         Cuenta el total de recursos en este módulo y todos sus submódulos.
 
+        El valor se mantiene incrementalmente en cada `add()`, por lo que es O(1).
+
         Returns:
             Número total de recursos.
         """
-        total = 0
-        for child in self._children:
-            if isinstance(child, CompositeModule):
-                total += child.count_resources()
-            else:
-                total += len(child.get("resource", []))
-        return total
+        return self._count
 
     def __repr__(self) -> str:
         """Representación en string del módulo para debugging"""
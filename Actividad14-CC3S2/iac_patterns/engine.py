@@ -0,0 +1,577 @@
+"""Motor local de plan/apply para null_resource y local_file
+
+Calcula y aplica los cambios de una configuración generada sin ejecutar terraform,
+con un archivo de estado propio (JSON):
+
+- `null_resource` se reemplaza cuando cambian sus `triggers` (comparados como
+  strings, igual que el `map(string)` del provider) y ejecuta sus provisioners
+  `local-exec` al crearse (los `when = "destroy"` se guardan en el estado y corren al
+  destruirlo o reemplazarlo, con la configuración con que se creó);
+- `local_file` se reemplaza cuando cambia cualquiera de sus argumentos y se vuelve a
+  crear si el archivo fue borrado o modificado fuera del motor;
+- los recursos que ya no están en la configuración se destruyen.
+
+Los recursos independientes se aplican en paralelo (hasta `parallelism` a la vez); los
+`depends_on` se respetan al crear y se invierten al destruir.
+
+Uso:
+    python3 -m iac_patterns.engine plan terraform/main.tf.json --state iac_state.json
+    python3 -m iac_patterns.engine apply terraform/main.tf.json --parallelism 10
+    python3 -m iac_patterns.engine destroy --state iac_state.json
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import secrets
+import subprocess
+import sys
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from .composite import CompositeModule
+from .sharding import _atomic_write
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+SUPPORTED_TYPES = frozenset({"null_resource", "local_file"})
+STATE_VERSION = 1
+DEFAULT_STATE = "iac_state.json"
+
+# Argumentos que no forman parte de los atributos del recurso
+_META_ARGUMENTS = frozenset({"depends_on", "provisioner", "lifecycle", "connection",
+                             "count", "for_each", "provider"})
+
+# Orden de presentación de las acciones en el plan
+ACTIONS = ("create", "replace", "destroy", "no-op")
+_SYMBOLS = {"create": "+", "replace": "-/+", "destroy": "-", "no-op": " "}
+
+
+class Change:
+    """
+    Cambio planificado para un recurso.
+
+    Atributos:
+        address: Dirección "tipo.nombre".
+        action: "create", "replace", "destroy" o "no-op".
+        reason: Motivo del cambio (vacío para "no-op").
+        config: Configuración deseada (None al destruir).
+        previous: Entrada del estado actual (None al crear).
+    """
+
+    __slots__ = ("address", "action", "reason", "config", "previous")
+
+    def __init__(self, address: str, action: str, reason: str = "",
+                 config: Optional[Dict[str, Any]] = None,
+                 previous: Optional[Dict[str, Any]] = None) -> None:
+        self.address = address
+        self.action = action
+        self.reason = reason
+        self.config = config
+        self.previous = previous
+
+    @property
+    def resource_type(self) -> str:
+        return self.address.partition(".")[0]
+
+    def __repr__(self) -> str:
+        return f"Change('{self.address}', '{self.action}')"
+
+
+class Plan:
+    """Conjunto de cambios calculado por `LocalEngine.plan`, aplicable con `apply`."""
+
+    __slots__ = ("changes", "serial", "working_dir")
+
+    def __init__(self, changes: List[Change], serial: int, working_dir: str) -> None:
+        self.changes = changes
+        self.serial = serial  # Serial del estado sobre el que se calculó
+        self.working_dir = working_dir
+
+    def pending(self) -> List[Change]:
+        """Cambios que `apply` ejecutará (todo salvo "no-op")."""
+        return [change for change in self.changes if change.action != "no-op"]
+
+    @property
+    def has_changes(self) -> bool:
+        return any(change.action != "no-op" for change in self.changes)
+
+    def counts(self) -> Dict[str, int]:
+        """Cantidad de recursos por acción."""
+        counts = dict.fromkeys(ACTIONS, 0)
+        for change in self.changes:
+            counts[change.action] += 1
+        return counts
+
+    def format(self) -> str:
+        """Plan legible: una línea por cambio pendiente y un resumen final."""
+        lines = [
+            f"{_SYMBOLS[change.action]:>3} {change.address} ({change.reason})"
+            for change in self.pending()
+        ]
+        counts = self.counts()
+        lines.append(f"Plan: {counts['create']} a crear, {counts['replace']} a reemplazar, "
+                     f"{counts['destroy']} a destruir, {counts['no-op']} sin cambios.")
+        return "\n".join(lines)
+
+
+class ApplyResult:
+    """
+    Resultado de `LocalEngine.apply`.
+
+    Atributos:
+        applied: Direcciones aplicadas con éxito, en orden de finalización.
+        failed: Direcciones que fallaron -> mensaje de error.
+        skipped: Direcciones no ejecutadas porque falló algo antes.
+        outputs: Salida estándar de los `local-exec` por dirección.
+    """
+
+    __slots__ = ("applied", "failed", "skipped", "outputs")
+
+    def __init__(self) -> None:
+        self.applied: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self.skipped: List[str] = []
+        self.outputs: Dict[str, str] = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def __repr__(self) -> str:
+        return (f"ApplyResult(applied={len(self.applied)}, failed={len(self.failed)}, "
+                f"skipped={len(self.skipped)})")
+
+
+def _tf_string(value: Any) -> Any:
+    """Valor de trigger tal como lo guarda el provider (`map(string)`)."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _normalized_triggers(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: _tf_string(value) for key, value in (config.get("triggers") or {}).items()}
+
+
+def _attributes(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Argumentos del recurso, sin los meta-argumentos."""
+    return {key: value for key, value in config.items() if key not in _META_ARGUMENTS}
+
+
+def _provisioners(config: Dict[str, Any], when: str) -> List[Dict[str, Any]]:
+    """Cuerpos de los `local-exec` que corren al crear (`when="create"`) o al destruir."""
+    provisioners = config.get("provisioner") or []
+    if isinstance(provisioners, dict):
+        provisioners = [provisioners]
+    bodies = []
+    for provisioner in provisioners:
+        for kind, body in provisioner.items():
+            if kind != "local-exec":
+                raise ValueError(f"Provisioner no soportado por el motor local: {kind}")
+            if body.get("when", "create") == when:
+                bodies.append(body)
+    return bodies
+
+
+def _file_content(config: Dict[str, Any], working_dir: str) -> bytes:
+    """Contenido que debe tener un `local_file` según su configuración."""
+    if "content_base64" in config:
+        return base64.b64decode(config["content_base64"])
+    if "source" in config:
+        with open(os.path.join(working_dir, config["source"]), "rb") as f:
+            return f.read()
+    content = config.get("content", config.get("sensitive_content", ""))
+    return content.encode("utf-8")
+
+
+def _entry_path(entry: Dict[str, Any], working_dir: str) -> str:
+    """
+    Ruta absoluta del archivo de un `local_file` del estado, resuelta contra el
+    directorio en que se aplicó (los estados anteriores sin `working_dir` usan el actual).
+    """
+    base = entry.get("working_dir", working_dir)
+    return os.path.normpath(os.path.join(base, entry["attributes"]["filename"]))
+
+
+def _iter_blocks(source: Any) -> Iterable[Dict[str, Any]]:
+    if isinstance(source, CompositeModule):
+        return source.iter_blocks()
+    if isinstance(source, str):
+        with open(source) as f:
+            source = json.load(f)
+    return source.get("resource", [])
+
+
+def desired_resources(source: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Recursos de una configuración: dirección "tipo.nombre" -> configuración.
+
+    Args:
+        source: CompositeModule, documento Terraform JSON ya decodificado o ruta a un
+                archivo `.tf.json`.
+
+    Raises:
+        ValueError: recurso duplicado, tipo no soportado o `depends_on` a un recurso
+                    que no existe.
+    """
+    resources: Dict[str, Dict[str, Any]] = {}
+    for block in _iter_blocks(source):
+        for resource_type, named_list in block.items():
+            if resource_type not in SUPPORTED_TYPES:
+                raise ValueError(f"Tipo no soportado por el motor local: {resource_type}")
+            for named in named_list:
+                for name, configs in named.items():
+                    address = f"{resource_type}.{name}"
+                    if address in resources:
+                        raise ValueError(f"Recurso duplicado: {address}")
+                    resources[address] = configs[0] if isinstance(configs, list) else configs
+    for address, config in resources.items():
+        for target in config.get("depends_on", []):
+            if target not in resources:
+                raise ValueError(f"{address}: depends_on apunta a un recurso inexistente: {target}")
+    return resources
+
+
+class LocalEngine:
+    """
+    Motor de plan/apply hermético sobre un archivo de estado local.
+
+    Ejemplo:
+        >>> engine = LocalEngine("build/iac_state.json", parallelism=8)
+        >>> plan = engine.plan(builder._module)
+        >>> print(plan.format())
+        >>> result = engine.apply(plan)
+    """
+
+    def __init__(self, state_path: str = DEFAULT_STATE, parallelism: int = 10,
+                 working_dir: Optional[str] = None) -> None:
+        """
+        Args:
+            state_path: Archivo de estado (se crea en el primer apply).
+            parallelism: Máximo de recursos aplicados a la vez.
+            working_dir: Directorio base de las rutas relativas de `local_file` y de
+                         los `local-exec`. Por defecto, el del archivo de configuración
+                         (si se planifica desde una ruta) o el directorio actual.
+        """
+        if parallelism < 1:
+            raise ValueError("parallelism debe ser al menos 1")
+        self.state_path = state_path
+        self.parallelism = parallelism
+        self.working_dir = working_dir
+
+    #  Estado
+
+    def load_state(self) -> Dict[str, Any]:
+        """Estado actual (vacío si el archivo no existe)."""
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {"version": STATE_VERSION, "serial": 0, "resources": {}}
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(f"Versión de estado no soportada: {state.get('version')}")
+        return state
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state["serial"] += 1
+        _atomic_write(self.state_path, json.dumps(state, indent=2, sort_keys=True))
+
+    #  Plan
+
+    def plan(self, source: Any) -> Plan:
+        """
+        Compara la configuración con el estado y devuelve los cambios necesarios.
+
+        Args:
+            source: CompositeModule, documento decodificado o ruta a un `.tf.json`.
+        """
+        working_dir = self.working_dir
+        if working_dir is None:
+            working_dir = os.path.dirname(os.path.abspath(source)) if isinstance(source, str) else os.getcwd()
+        desired = desired_resources(source)
+        state = self.load_state()
+        current = state["resources"]
+
+        changes = []
+        for address, config in desired.items():
+            _provisioners(config, "create")  # Rechaza provisioners no soportados al planificar
+            previous = current.get(address)
+            action, reason = self._compare(address, config, previous, working_dir)
+            changes.append(Change(address, action, reason, config, previous))
+        for address, previous in current.items():
+            if address not in desired:
+                changes.append(Change(address, "destroy", "ya no está en la configuración",
+                                      None, previous))
+        return Plan(changes, state["serial"], working_dir)
+
+    @staticmethod
+    def _compare(address: str, config: Dict[str, Any], previous: Optional[Dict[str, Any]],
+                 working_dir: str) -> Tuple[str, str]:
+        if previous is None:
+            return "create", "nuevo recurso"
+        if address.startswith("null_resource."):
+            if _normalized_triggers(config) != previous.get("triggers", {}):
+                return "replace", "cambiaron los triggers"
+            return "no-op", ""
+
+        attributes = _attributes(config)
+        changed = sorted(key for key in set(attributes) | set(previous.get("attributes", {}))
+                         if attributes.get(key) != previous["attributes"].get(key))
+        if changed:
+            return "replace", f"cambió {', '.join(changed)}"
+        path = os.path.normpath(os.path.join(working_dir, attributes["filename"]))
+        if path != _entry_path(previous, working_dir):
+            return "replace", "cambió el directorio de trabajo"
+        try:
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+        except FileNotFoundError:
+            return "create", "el archivo ya no existe"
+        if digest != previous.get("id"):
+            return "create", "el archivo se modificó fuera del motor"
+        return "no-op", ""
+
+    #  Apply
+
+    def apply(self, source: Any) -> ApplyResult:
+        """
+        Aplica un plan (o planifica y aplica una configuración) y guarda el estado.
+
+        Si un recurso falla, los que dependen de él (y los aún no iniciados) se omiten;
+        el estado conserva todo lo aplicado con éxito.
+
+        Raises:
+            ValueError: el plan se calculó sobre otro estado, o hay un ciclo de dependencias.
+        """
+        plan = source if isinstance(source, Plan) else self.plan(source)
+        state = self.load_state()
+        if state["serial"] != plan.serial:
+            raise ValueError("El estado cambió desde que se calculó el plan; planificar de nuevo")
+
+        pending = {change.address: change for change in plan.pending()}
+        waits_for = self._dependencies(pending, plan.working_dir)
+        result = ApplyResult()
+        if not pending:
+            return result
+
+        dependents: Dict[str, List[str]] = {address: [] for address in pending}
+        remaining = {address: len(deps) for address, deps in waits_for.items()}
+        for address, deps in waits_for.items():
+            for dependency in deps:
+                dependents[dependency].append(address)
+        ready = [address for address, count in remaining.items() if count == 0]
+
+        # Import diferido: `plan` (el uso más frecuente en CI) no necesita el pool
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        resources = state["resources"]
+        with ThreadPoolExecutor(max_workers=self.parallelism) as executor:
+            running: Dict["Future", str] = {}
+            while ready or running:
+                while ready and not result.failed:
+                    address = ready.pop()
+                    running[executor.submit(self._execute, pending[address], plan.working_dir)] = address
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    address = running.pop(future)
+                    try:
+                        entry, output = future.result()
+                    except Exception as exc:  # El estado registra lo aplicado hasta aquí
+                        result.failed[address] = str(exc)
+                        if pending[address].action == "replace":
+                            resources.pop(address, None)  # El recurso anterior ya se destruyó
+                        continue
+                    if entry is None:
+                        resources.pop(address, None)
+                    else:
+                        resources[address] = entry
+                    if output:
+                        result.outputs[address] = output
+                    result.applied.append(address)
+                    for dependent in dependents[address]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            ready.append(dependent)
+
+        finished = set(result.applied) | set(result.failed)
+        result.skipped = [address for address in pending if address not in finished]
+        self._save_state(state)
+        return result
+
+    def destroy(self) -> ApplyResult:
+        """Destruye todos los recursos del estado."""
+        return self.apply({"resource": []})
+
+    def _dependencies(self, pending: Dict[str, Change], working_dir: str) -> Dict[str, set]:
+        """
+        Cambios que deben terminar antes de cada cambio pendiente.
+
+        Se crea después de las dependencias (`depends_on`) que también cambian; se
+        destruye después de los recursos que dependían del destruido; un `local_file`
+        nuevo espera a la destrucción de otro que usaba el mismo archivo.
+        """
+        waits_for: Dict[str, set] = {address: set() for address in pending}
+        released_files = {}
+        for address, change in pending.items():
+            if change.action == "destroy":
+                for dependency in change.previous.get("dependencies", []):
+                    if pending.get(dependency) is not None and pending[dependency].action == "destroy":
+                        waits_for[dependency].add(address)
+                if change.previous.get("attributes", {}).get("filename") is not None:
+                    released_files[_entry_path(change.previous, working_dir)] = address
+        for address, change in pending.items():
+            if change.action == "destroy":
+                continue
+            for dependency in change.config.get("depends_on", []):
+                if dependency in pending:
+                    waits_for[address].add(dependency)
+            if change.resource_type == "local_file":
+                path = os.path.normpath(os.path.join(working_dir, change.config["filename"]))
+                if path in released_files:
+                    waits_for[address].add(released_files[path])
+
+        # Detección de ciclos (Kahn) antes de ejecutar nada
+        remaining = {address: len(deps) for address, deps in waits_for.items()}
+        dependents: Dict[str, List[str]] = {address: [] for address in pending}
+        for address, deps in waits_for.items():
+            for dependency in deps:
+                dependents[dependency].append(address)
+        queue = [address for address, count in remaining.items() if count == 0]
+        visited = 0
+        while queue:
+            address = queue.pop()
+            visited += 1
+            for dependent in dependents[address]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    queue.append(dependent)
+        if visited != len(pending):
+            cycle = sorted(address for address, count in remaining.items() if count)
+            raise ValueError(f"Ciclo de dependencias entre: {', '.join(cycle)}")
+        return waits_for
+
+    def _execute(self, change: Change, working_dir: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Ejecuta un cambio (en un hilo del pool).
+
+        Returns:
+            Nueva entrada de estado (None si el recurso se destruyó) y la salida de
+            sus `local-exec`.
+        """
+        output = []
+        if change.action in ("replace", "destroy"):
+            previous = change.previous
+            # Los `local-exec` de destrucción son los de la configuración con que se creó el
+            # recurso (los estados anteriores que no los guardan usan la actual)
+            if "destroy_provisioners" in previous:
+                bodies = previous["destroy_provisioners"]
+            else:
+                bodies = _provisioners(change.config, "destroy") if change.config is not None else []
+            for body in bodies:
+                output.append(self._local_exec(body, previous.get("working_dir", working_dir)))
+            self._destroy(previous, working_dir)
+            if change.action == "destroy":
+                return None, "".join(output)
+
+        config = change.config
+        resource_type, _, name = change.address.partition(".")
+        entry: Dict[str, Any] = {
+            "type": resource_type,
+            "name": name,
+            "dependencies": sorted(config.get("depends_on", [])),
+            "working_dir": os.path.abspath(working_dir),  # Base de sus rutas al destruirlo
+            "destroy_provisioners": _provisioners(config, "destroy"),
+        }
+        if resource_type == "null_resource":
+            entry["id"] = str(secrets.randbits(63))
+            entry["triggers"] = _normalized_triggers(config)
+        else:
+            entry["attributes"] = _attributes(config)
+            entry["id"] = self._write_file(config, working_dir)
+
+        for body in _provisioners(config, "create"):
+            output.append(self._local_exec(body, working_dir))
+        return entry, "".join(output)
+
+    @staticmethod
+    def _destroy(previous: Dict[str, Any], working_dir: str) -> None:
+        if previous["type"] == "local_file" and previous.get("attributes", {}).get("filename") is not None:
+            path = _entry_path(previous, working_dir)
+            if os.path.exists(path):
+                os.unlink(path)
+
+    @staticmethod
+    def _write_file(config: Dict[str, Any], working_dir: str) -> str:
+        """Escribe un `local_file` y devuelve su id (sha1 del contenido, como el provider)."""
+        path = os.path.join(working_dir, config["filename"])
+        content = _file_content(config, working_dir)
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, mode=int(config.get("directory_permission", "0777"), 8), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        os.chmod(path, int(config.get("file_permission", "0777"), 8))
+        return hashlib.sha1(content).hexdigest()
+
+    @staticmethod
+    def _local_exec(body: Dict[str, Any], working_dir: str) -> str:
+        """Ejecuta un `local-exec` y devuelve su salida estándar."""
+        command = body["command"]
+        interpreter = body.get("interpreter")
+        env = dict(os.environ)
+        env.update({key: str(value) for key, value in (body.get("environment") or {}).items()})
+        completed = subprocess.run(
+            [*interpreter, command] if interpreter else command,
+            shell=not interpreter,
+            cwd=os.path.join(working_dir, body.get("working_dir", "")),
+            env=env, capture_output=True, text=True,
+        )
+        if completed.returncode != 0 and body.get("on_failure", "fail") != "continue":
+            detail = completed.stderr.strip() or completed.stdout.strip()
+            raise RuntimeError(f"local-exec terminó con código {completed.returncode}: {detail}")
+        return completed.stdout
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Plan/apply local para null_resource y local_file")
+    parser.add_argument("command", choices=["plan", "apply", "destroy"])
+    parser.add_argument("config", nargs="?", help="archivo .tf.json (no se usa con destroy)")
+    parser.add_argument("--state", default=DEFAULT_STATE)
+    parser.add_argument("--parallelism", type=int, default=10)
+    parser.add_argument("--working-dir", default=None)
+    parser.add_argument("--detailed-exitcode", action="store_true",
+                        help="plan: termina con 2 si hay cambios pendientes")
+    args = parser.parse_args(argv)
+    if args.command != "destroy" and not args.config:
+        parser.error(f"{args.command} requiere el archivo de configuración")
+
+    engine = LocalEngine(args.state, args.parallelism, args.working_dir)
+    source = {"resource": []} if args.command == "destroy" else args.config
+    plan = engine.plan(source)
+    print(plan.format())
+    if args.command == "plan":
+        return 2 if args.detailed_exitcode and plan.has_changes else 0
+
+    result = engine.apply(plan)
+    for address, output in result.outputs.items():
+        for line in output.splitlines():
+            print(f"{address}: {line}")
+    for address, error in result.failed.items():
+        print(f"ERROR {address}: {error}")
+    print(f"Apply: {len(result.applied)} aplicados, {len(result.failed)} fallidos, "
+          f"{len(result.skipped)} omitidos.")
+    return 0 if result.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,233 @@
 Encapsula la lógica de creación de objetos para recursos Terraform del tipo null_resource.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Sequence, Mapping, Union, Iterator, Callable
+from contextlib import contextmanager
+import gc
+import json
+import os
+import random
+import threading
 import uuid
 from datetime import datetime
 
+from .compact import CompactResource, TriggerLayout
+
+# Tablas para fijar los bits de versión (4) y variante (RFC 4122) en UUIDs generados en lote
+_UUID_VERSION_TABLE = bytes((b & 0x0F) | 0x40 for b in range(256))
+_UUID_VARIANT_TABLE = bytes((b & 0x3F) | 0x80 for b in range(256))
+
+BatchTriggers = Union[None, Mapping[str, Any], Sequence[Mapping[str, Any]]]
+Clock = Callable[[], datetime]
+
+# Espacio de nombres para los identificadores deterministas (UUID5)
+_DETERMINISTIC_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "iac_patterns/null_resource")
+
+
+class FixedClock:
+    """
+    Reloj inyectable que siempre devuelve el mismo instante.
+
+    Es una clase (y no una lambda) para poder enviarse a procesos worker.
+    """
+
+    def __init__(self, moment: datetime = datetime(1970, 1, 1)) -> None:
+        self.moment = moment
+
+    def __call__(self) -> datetime:
+        return self.moment
+
+    def __repr__(self) -> str:
+        return f"FixedClock({self.moment.isoformat()})"
+
+
+def deterministic_uuid(name: str, triggers: Optional[Mapping[str, Any]] = None) -> str:
+    """
+    Identificador estable derivado del nombre del recurso y de sus triggers de usuario.
+
+    Dos llamadas con el mismo nombre y triggers (sin importar el orden de las claves)
+    devuelven el mismo UUID5.
+    """
+    payload = json.dumps([name, triggers or {}], sort_keys=True, separators=(",", ":"), default=str)
+    return str(uuid.uuid5(_DETERMINISTIC_NAMESPACE, payload))
+
+
+def _resolve_clock(deterministic: bool, clock: Optional[Clock]) -> Clock:
+    """Reloj a usar: el inyectado, uno fijo en modo determinista o la hora UTC actual."""
+    if clock is not None:
+        return clock
+    return FixedClock() if deterministic else datetime.utcnow
+
+
+def bulk_uuid4(count: int, seed: Optional[bytes] = None) -> List[str]:
+    """
+    Genera `count` UUID4 en formato texto a partir de un único buffer aleatorio.
+
+    Equivale a llamar `str(uuid.uuid4())` `count` veces, pero con una sola llamada a
+    `os.urandom` y sin construir objetos `uuid.UUID`.
+
+    Args:
+        count: Número de UUIDs.
+        seed: Semilla opcional. Con la misma semilla se obtienen los mismos UUIDs, lo que
+              permite reconstruir un lote en otro proceso (ver `iac_patterns.parallel`).
+    """
+    if seed is None:
+        raw = bytearray(os.urandom(16 * count))
+    else:
+        raw = bytearray(random.Random(seed).randbytes(16 * count))
+    raw[6::16] = raw[6::16].translate(_UUID_VERSION_TABLE)
+    raw[8::16] = raw[8::16].translate(_UUID_VARIANT_TABLE)
+    hx = raw.hex()
+    return [
+        f"{hx[i:i + 8]}-{hx[i + 8:i + 12]}-{hx[i + 12:i + 16]}-{hx[i + 16:i + 20]}-{hx[i + 20:i + 32]}"
+        for i in range(0, 32 * count, 32)
+    ]
+
+
+# Lotes en curso con el recolector pausado (de cualquier hilo) y si el primero lo
+# encontró habilitado; protegidos por `_GC_LOCK`
+_GC_LOCK = threading.Lock()
+_gc_pauses = 0
+_gc_resume = False
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """
+    Pausa el recolector cíclico mientras se crea un lote.
+
+    Los recursos son árboles de dicts/listas sin ciclos, pero crear cientos de miles de
+    contenedores dispara recolecciones completas que dominan el tiempo del lote.
+
+    El estado del recolector es global al proceso, así que las pausas se cuentan: el
+    primer lote lo deshabilita y el último en terminar restaura el estado que aquel
+    encontró. Lotes solapados (anidados o en otros hilos) no lo re-habilitan mientras
+    otro sigue en curso, ni lo dejan deshabilitado al terminar.
+    """
+    global _gc_pauses, _gc_resume
+    with _GC_LOCK:
+        if _gc_pauses == 0:
+            _gc_resume = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _GC_LOCK:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_resume:
+                gc.enable()
+
+
+def _null_resource(name: str, triggers: Dict[str, Any]) -> Dict[str, Any]:
+    """Estructura un null_resource como se espera en archivos .tf.json."""
+    return {
+        "resource": [{
+            "null_resource": [{
+                name: [{
+                    "triggers": triggers
+                }]
+            }]
+        }]
+    }
+
+
+def _compact_null_resource(name: str, triggers: Dict[str, Any]) -> CompactResource:
+    """Variante compacta de `_null_resource`."""
+    return CompactResource("null_resource", name, triggers)
+
+
+def _build_many(names: Sequence[str], triggers: BatchTriggers, timestamp: str,
+                deterministic: bool = False, seed: Optional[bytes] = None,
+                compact: bool = False, shared: bool = False) -> List[Any]:
+    """
+    Crea un lote de null_resource con un timestamp común y UUIDs generados en bloque.
+
+    Args:
+        names: Nombres de los recursos.
+        triggers: None, un mapping común a todo el lote o una secuencia de mappings
+                  (uno por nombre). Nunca se modifican.
+        timestamp: Timestamp compartido por el lote.
+        deterministic: si es True, los UUIDs se derivan del nombre y los triggers.
+        seed: Semilla de los UUID4 aleatorios (ver `bulk_uuid4`).
+        compact: si es True, crea `CompactResource` en lugar de diccionarios.
+        shared: si es True y los triggers son comunes, crea `CompactResource` cuyos
+                triggers (`SharedTriggers`) comparten un único `TriggerLayout`.
+    """
+    with _gc_paused():
+        return _build_many_unpaused(list(names), triggers, timestamp, deterministic, seed,
+                                    compact, shared)
+
+
+def _build_many_unpaused(names: List[str], triggers: BatchTriggers, timestamp: str,
+                         deterministic: bool, seed: Optional[bytes] = None,
+                         compact: bool = False, shared: bool = False) -> List[Any]:
+    """Cuerpo de `_build_many` (con el recolector ya pausado)."""
+    make = _compact_null_resource if compact else _null_resource
+    if shared and (triggers is None or isinstance(triggers, Mapping)):
+        return _build_shared(names, triggers, timestamp, deterministic, seed)
+    if triggers is None or isinstance(triggers, Mapping):
+        # Disposición de triggers común: se construye una vez y se copia por recurso
+        user_triggers = dict(triggers or {})
+        layout = dict(user_triggers)
+        needs_uuid = "factory_uuid" not in layout
+        layout.setdefault("factory_uuid", None)
+        layout.setdefault("timestamp", timestamp)
+        if not needs_uuid:
+            return [make(name, layout.copy()) for name in names]
+
+        if deterministic:
+            uuids = [deterministic_uuid(name, user_triggers) for name in names]
+        else:
+            uuids = bulk_uuid4(len(names), seed)
+        resources = []
+        for name, factory_uuid in zip(names, uuids):
+            resource_triggers = layout.copy()
+            resource_triggers["factory_uuid"] = factory_uuid
+            resources.append(make(name, resource_triggers))
+        return resources
+
+    if len(triggers) != len(names):
+        raise ValueError("triggers debe tener un elemento por cada nombre")
+
+    if not deterministic:
+        random_uuids = iter(bulk_uuid4(sum(1 for t in triggers if "factory_uuid" not in t), seed))
+    resources = []
+    for name, own in zip(names, triggers):
+        resource_triggers = dict(own)
+        if "factory_uuid" not in resource_triggers:
+            resource_triggers["factory_uuid"] = (
+                deterministic_uuid(name, own) if deterministic else next(random_uuids)
+            )
+        resource_triggers.setdefault("timestamp", timestamp)
+        resources.append(make(name, resource_triggers))
+    return resources
+
+
+def _build_shared(names: List[str], triggers: Optional[Mapping[str, Any]], timestamp: str,
+                  deterministic: bool, seed: Optional[bytes]) -> List[CompactResource]:
+    """
+    Variante de `_build_many_unpaused` con un `TriggerLayout` para todo el lote: cada
+    recurso guarda solo su `factory_uuid` (o nada, si el UUID viene en los triggers).
+    """
+    user_triggers = dict(triggers or {})
+    layout = dict(user_triggers)
+    needs_uuid = "factory_uuid" not in layout
+    layout.setdefault("factory_uuid", None)
+    layout.setdefault("timestamp", timestamp)
+    if not needs_uuid:
+        trigger_layout = TriggerLayout(layout)
+        return [CompactResource("null_resource", name, trigger_layout.bind()) for name in names]
+
+    trigger_layout = TriggerLayout(layout, ("factory_uuid",))
+    if deterministic:
+        uuids = [deterministic_uuid(name, user_triggers) for name in names]
+    else:
+        uuids = bulk_uuid4(len(names), seed)
+    return [CompactResource("null_resource", name, trigger_layout.bind((factory_uuid,)))
+            for name, factory_uuid in zip(names, uuids)]
+
+
 class NullResourceFactory:
     """
     Fábrica para crear bloques de recursos `null_resource` en formato Terraform JSON.
@@ -13,7 +236,9 @@ class NullResourceFactory:
     """
 
     @staticmethod
-    def create(name: str, triggers: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def create(name: str, triggers: Optional[Dict[str, Any]] = None,
+               deterministic: bool = False, clock: Optional[Clock] = None,
+               compact: bool = False) -> Union[Dict[str, Any], CompactResource]:
         """
         Crea un bloque de recurso Terraform tipo `null_resource` con triggers personalizados.
 
@@ -21,28 +246,63 @@ class NullResourceFactory:
             name: Nombre del recurso dentro del bloque.
             triggers: Diccionario de valores personalizados que activan recreación del recurso.
                       Si no se proporciona, se inicializa con un UUID y un timestamp.
+            deterministic: si es True, `factory_uuid` es un hash estable del nombre y de los
+                           triggers de usuario (en lugar de un UUID aleatorio) y, si no se
+                           inyecta `clock`, el timestamp es fijo.
+            clock: Función que devuelve el instante usado para el timestamp
+                   (por defecto `datetime.utcnow`).
+            compact: si es True, devuelve un `CompactResource` (que se expande a la
+                     misma estructura JSON al exportar).
 
         Returns:
             Diccionario compatible con la estructura JSON de Terraform para null_resource.
         """
         triggers = triggers or {}
 
-        # Agrega un trigger por defecto: UUID aleatorio para asegurar unicidad
-        triggers.setdefault("factory_uuid", str(uuid.uuid4()))
+        # Agrega un trigger por defecto: UUID aleatorio (o estable) para asegurar unicidad
+        if "factory_uuid" not in triggers:
+            triggers["factory_uuid"] = (
+                deterministic_uuid(name, triggers) if deterministic else str(uuid.uuid4())
+            )
 
         # Agrega un trigger con timestamp actual en UTC
-        triggers.setdefault("timestamp", datetime.utcnow().isoformat())
+        triggers.setdefault("timestamp", _resolve_clock(deterministic, clock)().isoformat())
+
+        if compact:
+            return _compact_null_resource(name, triggers)
 
         # Retorna el recurso estructurado como se espera en archivos .tf.json
-        return {
-            "resource": [{
-                "null_resource": [{
-                    name: [{
-                        "triggers": triggers
-                    }]
-                }]
-            }]
-        }
+        return _null_resource(name, triggers)
+
+    @staticmethod
+    def create_many(names: Sequence[str], triggers: BatchTriggers = None,
+                    deterministic: bool = False, clock: Optional[Clock] = None,
+                    compact: bool = False, shared: bool = False) -> List[Any]:
+        """
+        Crea un lote de recursos `null_resource` con el mismo resultado que llamar a
+        `create` por cada nombre, pero con un único timestamp para todo el lote y los
+        UUIDs generados a partir de un solo buffer aleatorio.
+
+        Args:
+            names: Nombres de los recursos.
+            triggers: Triggers comunes a todo el lote (un dict) o una secuencia de dicts,
+                      uno por nombre. A diferencia de `create`, no se modifican.
+            deterministic: UUIDs estables derivados del nombre y los triggers (ver `create`).
+            clock: Función que devuelve el instante usado para el timestamp.
+            compact: si es True, crea `CompactResource` en lugar de diccionarios.
+            shared: si es True (y `triggers` es un único dict), crea `CompactResource`
+                    que comparten los triggers comunes del lote (`SharedTriggers`); cada
+                    recurso tiene su propio dict solo si se modifica.
+
+        Returns:
+            Lista de diccionarios Terraform JSON, en el orden de `names`.
+
+        Ejemplo:
+            >>> NullResourceFactory.create_many(["web1", "web2"], {"tier": "frontend"})
+        """
+        timestamp = _resolve_clock(deterministic, clock)().isoformat()
+        return _build_many(names, triggers, timestamp, deterministic, compact=compact, shared=shared)
+
 
 class TimestampedNullResourceFactory(NullResourceFactory):
     """
@@ -52,7 +312,9 @@ class TimestampedNullResourceFactory(NullResourceFactory):
 
     @staticmethod
     def create(name: str, triggers: Optional[Dict[str, Any]] = None,
-               timestamp_format: str = "%Y-%m-%d %H:%M:%S") -> Dict[str, Any]:
+               timestamp_format: str = "%Y-%m-%d %H:%M:%S",
+               deterministic: bool = False, clock: Optional[Clock] = None,
+               compact: bool = False) -> Union[Dict[str, Any], CompactResource]:
         """
         Crea un recurso null_resource con timestamp en formato personalizado.
 
@@ -60,25 +322,49 @@ class TimestampedNullResourceFactory(NullResourceFactory):
             name: Nombre del recurso.
             triggers: Diccionario de triggers personalizados (opcional).
             timestamp_format: Formato strftime para el timestamp (por defecto: '%Y-%m-%d %H:%M:%S').
+            deterministic: UUID estable derivado del nombre y los triggers (ver la clase base).
+            clock: Función que devuelve el instante usado para el timestamp.
+            compact: si es True, devuelve un `CompactResource`.
 
         Returns:
             Diccionario compatible con Terraform JSON incluyendo timestamp formateado.
         """
         triggers = triggers or {}
 
-        # Agregar UUID único
-        triggers.setdefault("factory_uuid", str(uuid.uuid4()))
+        # Agregar UUID único (o estable en modo determinista)
+        if "factory_uuid" not in triggers:
+            triggers["factory_uuid"] = (
+                deterministic_uuid(name, triggers) if deterministic else str(uuid.uuid4())
+            )
 
         # Agregar timestamp con formato personalizado
-        triggers.setdefault("timestamp", datetime.utcnow().strftime(timestamp_format))
+        triggers.setdefault("timestamp", _resolve_clock(deterministic, clock)().strftime(timestamp_format))
+
+        if compact:
+            return _compact_null_resource(name, triggers)
 
         # Retornar estructura Terraform
-        return {
-            "resource": [{
-                "null_resource": [{
-                    name: [{
-                        "triggers": triggers
-                    }]
-                }]
-            }]
-        }
+        return _null_resource(name, triggers)
+
+    @staticmethod
+    def create_many(names: Sequence[str], triggers: BatchTriggers = None,
+                    timestamp_format: str = "%Y-%m-%d %H:%M:%S",
+                    deterministic: bool = False, clock: Optional[Clock] = None,
+                    compact: bool = False, shared: bool = False) -> List[Any]:
+        """
+        Versión en lote de `create`: el timestamp se formatea una sola vez por lote.
+
+        Args:
+            names: Nombres de los recursos.
+            triggers: Triggers comunes (dict) o uno por nombre (secuencia de dicts).
+            timestamp_format: Formato strftime para el timestamp.
+            deterministic: UUIDs estables derivados del nombre y los triggers.
+            clock: Función que devuelve el instante usado para el timestamp.
+            compact: si es True, crea `CompactResource` en lugar de diccionarios.
+            shared: triggers comunes compartidos entre los recursos (ver la clase base).
+
+        Returns:
+            Lista de diccionarios Terraform JSON, en el orden de `names`.
+        """
+        timestamp = _resolve_clock(deterministic, clock)().strftime(timestamp_format)
+        return _build_many(names, triggers, timestamp, deterministic, compact=compact, shared=shared)
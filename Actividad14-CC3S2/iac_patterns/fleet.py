@@ -0,0 +1,221 @@
+"""Flotas virtuales
+
+Describe una flota de recursos a partir de una plantilla única y de parámetros por
+índice guardados en columnas compactas (rangos, `array.array` o listas). Los bloques
+concretos solo se construyen al recorrer o exportar el CompositeModule que la contiene.
+"""
+
+import re
+import string
+from array import array
+from typing import Any, Collection, Dict, Iterator, Optional, Sequence, Tuple
+
+from .prototype import json_clone
+
+
+def compact_column(values: Sequence[Any]) -> Sequence[Any]:
+    """
+    Devuelve la representación más compacta para una columna de valores.
+
+    Los `range` y `array.array` se conservan; las secuencias de enteros de 64 bits se
+    convierten a `array('q')` (8 bytes por valor); el resto queda como lista.
+    """
+    if isinstance(values, (range, array)):
+        return values
+    values = list(values)
+    if values and all(type(v) is int for v in values):
+        try:
+            return array("q", values)
+        except OverflowError:
+            pass
+    return values
+
+
+def iter_named(resource_type: str, names: Sequence[str], keys: Collection[str]) -> Iterator[str]:
+    """
+    Claves "tipo.nombre" de `keys` (conjunto o diccionario) cuyo nombre está en la lista
+    `names`, recorriendo la colección más chica.
+    """
+    prefix = f"{resource_type}."
+    if len(names) <= len(keys):
+        return (prefix + name for name in names if prefix + name in keys)
+    wanted = {key[len(prefix):] for key in keys if key.startswith(prefix)}
+    if wanted.isdisjoint(names):  # Recorre `names` en C
+        return iter(())
+    return (prefix + name for name in names if name in wanted)
+
+
+# Especificación de formato del índice que se puede despejar del nombre (decimal, con
+# relleno de ceros opcional)
+_DECIMAL_SPEC = re.compile(r"(0\d+)?d?")
+
+
+class VirtualFleet:
+    """
+    Hoja perezosa del CompositeModule que representa `count` recursos clonados de una
+    plantilla, cada uno con su nombre y sus triggers por índice.
+
+    Ejemplo:
+        >>> template = NullResourceFactory.create("web")
+        >>> fleet = VirtualFleet(template, 1_000_000, columns={"index": range(1_000_000)})
+        >>> module.add(fleet)  # count_resources() responde sin materializar nada
+    """
+
+    # El CompositeModule no indexa sus recursos (ni sus claves): los consulta con
+    # `contains()` / `iter_shared()` para no materializar nada
+    indexable = False
+
+    def __init__(self, template: Dict[str, Any], count: int,
+                 names: Optional[Sequence[str]] = None,
+                 name_format: str = "{name}_{index}",
+                 columns: Optional[Dict[str, Sequence[Any]]] = None) -> None:
+        """
+        Args:
+            template: Recurso plantilla con un único bloque y un único nombre, por
+                      ejemplo el resultado de `NullResourceFactory.create` (también se
+                      acepta un `CompactResource`).
+            count: Número de recursos de la flota.
+            names: Nombres explícitos por índice (opcional).
+            name_format: Formato del nombre cuando no se pasan `names`; recibe
+                         `name` (nombre de la plantilla) e `index`.
+            columns: Triggers por índice: clave del trigger -> secuencia de `count` valores.
+        """
+        if not isinstance(template, dict):
+            template = template.materialize(copy=False)
+        blocks = template.get("resource", [])
+        if len(blocks) != 1 or len(blocks[0]) != 1:
+            raise ValueError("la plantilla debe contener exactamente un bloque de recurso")
+        (resource_type, named), = blocks[0].items()
+        if len(named) != 1 or len(named[0]) != 1:
+            raise ValueError("la plantilla debe contener exactamente un recurso")
+        (template_name, configs), = named[0].items()
+
+        columns = {key: compact_column(values) for key, values in (columns or {}).items()}
+        for key, values in columns.items():
+            if len(values) != count:
+                raise ValueError(f"la columna '{key}' tiene {len(values)} valores, se esperaban {count}")
+        if names is not None and len(names) != count:
+            raise ValueError(f"se esperaban {count} nombres, se recibieron {len(names)}")
+
+        self.resource_type = resource_type
+        self.template_name = template_name
+        self.count = count
+        self._config = json_clone(configs[0])
+        self._names = names
+        self._name_format = name_format
+        self._columns = columns
+        self._pattern = None if names is not None else _index_pattern(name_format, template_name)
+        # `contains()` en O(1) si el índice se despeja del nombre
+        self.fast_contains = self._pattern is not None
+
+    def name_at(self, index: int) -> str:
+        """Nombre del recurso en la posición `index`."""
+        if self._names is not None:
+            return self._names[index]
+        return self._name_format.format(name=self.template_name, index=index)
+
+    def index_of(self, key: str) -> Optional[int]:
+        """
+        Posición del recurso con clave "tipo.nombre" `key`, o None si no es de la flota.
+
+        Con el formato de nombre por defecto (o cualquiera con un único `{index}`
+        decimal) el índice se despeja del nombre en O(1); con `names` explícitos se
+        busca en la lista, y con otros formatos se recorre la flota.
+        """
+        type_prefix = f"{self.resource_type}."
+        if not key.startswith(type_prefix):
+            return None
+        name = key[len(type_prefix):]
+        if self._pattern is not None:
+            head, tail = self._pattern
+            digits = name[len(head):len(name) - len(tail)]
+            if not (len(name) > len(head) + len(tail) and name.startswith(head)
+                    and name.endswith(tail) and digits.isascii() and digits.isdigit()):
+                return None
+            index = int(digits)
+            return index if index < self.count and self.name_at(index) == name else None
+        if self._names is not None:
+            try:
+                return self._names.index(name)
+            except ValueError:
+                return None
+        return next((index for index in range(self.count) if self.name_at(index) == name), None)
+
+    def contains(self, key: str) -> bool:
+        """True si la flota tiene un recurso con clave "tipo.nombre" `key`."""
+        return self.index_of(key) is not None
+
+    def iter_shared(self, keys: Collection[str]) -> Iterator[str]:
+        """Claves de `keys` (conjunto o diccionario) que también son de la flota."""
+        if self._pattern is not None and len(keys) <= self.count:
+            return (key for key in keys if self.index_of(key) is not None)
+        if self._names is not None:
+            return iter_named(self.resource_type, self._names, keys)
+        return (key for key in self.iter_keys() if key in keys)
+
+    def names(self) -> Optional[Tuple[str, Sequence[str]]]:
+        """(tipo, nombres) si la flota guarda la lista de nombres; None si los genera."""
+        return None if self._names is None else (self.resource_type, self._names)
+
+    def iter_keys(self) -> Iterator[str]:
+        """Claves "tipo.nombre" de la flota en orden de índice, sin construir bloques."""
+        prefix = f"{self.resource_type}."
+        for index in range(self.count):
+            yield prefix + self.name_at(index)
+
+    def block_at(self, index: int) -> Dict[str, Any]:
+        """
+        Materializa el bloque de recurso en la posición `index`.
+
+        Returns:
+            Bloque independiente con la forma ``{tipo: [{nombre: [config]}]}``.
+        """
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        config = json_clone(self._config)
+        if self._columns:
+            triggers = config.setdefault("triggers", {})
+            for key, values in self._columns.items():
+                triggers[key] = values[index]
+        return {self.resource_type: [{self.name_at(index): [config]}]}
+
+    def iter_blocks(self) -> Iterator[Dict[str, Any]]:
+        """Produce los bloques de la flota en orden de índice."""
+        for index in range(self.count):
+            yield self.block_at(index)
+
+    def count_resources(self) -> int:
+        """Número de recursos de la flota (sin materializar)."""
+        return self.count
+
+    def export(self) -> Dict[str, Any]:
+        """Materializa la flota completa como diccionario Terraform JSON."""
+        return {"resource": list(self.iter_blocks())}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self) -> str:
+        return f"VirtualFleet(type='{self.resource_type}', template='{self.template_name}', count={self.count})"
+
+
+def _index_pattern(name_format: str, template_name: str) -> Optional[Tuple[str, str]]:
+    """
+    Partes fijas del nombre (antes y después del índice) si `name_format` tiene un único
+    `{index}` decimal; None si el índice no se puede despejar del nombre.
+    """
+    parts: Tuple[list, list] = ([], [])
+    side = 0
+    for literal, field, spec, conversion in string.Formatter().parse(name_format):
+        parts[side].append(literal)
+        if field is None:
+            continue
+        if field == "index" and side == 0 and conversion is None and _DECIMAL_SPEC.fullmatch(spec):
+            side = 1
+        elif field == "name" and conversion is None:
+            parts[side].append(format(template_name, spec))
+        else:
+            return None
+    if side == 0:
+        return None
+    return "".join(parts[0]), "".join(parts[1])
@@ -0,0 +1,272 @@
+"""Instrumentación de los pasos de generación
+
+Los pasos del `InfrastructureBuilder` (fábrica, clonado, agregación en el Composite y
+escritura del JSON) emiten eventos estructurados (`StepEvent`) con tiempo de reloj,
+número de recursos y, opcionalmente, la variación de memoria medida con tracemalloc.
+
+Los eventos se entregan a una `Instrumentation` (por ejemplo `SummaryReporter`). Sin
+instrumentación activa, cada punto instrumentado solo comprueba `enabled` en el objeto
+nulo por defecto, por lo que el costo es despreciable.
+
+Ejemplo:
+    >>> reporter = SummaryReporter(trace_memory=True)
+    >>> builder = InfrastructureBuilder("prod", instrumentation=reporter)
+    >>> builder.build_group("web", ["w1", "w2"]).export("terraform/main.tf.json")
+    >>> print(reporter.format_table())
+"""
+
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class StepEvent:
+    """
+    Medición de un paso instrumentado.
+
+    Atributos:
+        name: Nombre del paso (por ejemplo "builder.build_group" o "prototype.clone").
+        seconds: Tiempo de reloj del paso, incluidos sus pasos anidados.
+        resources: Recursos producidos o procesados por el paso.
+        alloc_bytes: Variación neta de memoria según tracemalloc (None si no se mide).
+        parent: Nombre del paso que lo contiene (None en el nivel superior).
+        attrs: Atributos adicionales del paso (nombre del grupo, ruta, modo...).
+    """
+
+    __slots__ = ("name", "seconds", "resources", "alloc_bytes", "parent", "attrs")
+
+    def __init__(self, name: str, seconds: float, resources: int = 0,
+                 alloc_bytes: Optional[int] = None, parent: Optional[str] = None,
+                 attrs: Optional[Dict[str, Any]] = None) -> None:
+        self.name = name
+        self.seconds = seconds
+        self.resources = resources
+        self.alloc_bytes = alloc_bytes
+        self.parent = parent
+        self.attrs = attrs or {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Representación serializable a JSON."""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"StepEvent(name='{self.name}', seconds={self.seconds:.6f}, resources={self.resources})"
+
+
+class _State(threading.local):
+    """
+    Instrumentación activa y pila de pasos abiertos, propias de cada hilo: los pasos de
+    generaciones concurrentes no se mezclan ni se anidan entre sí.
+    """
+
+    # Sin __slots__: los slots serían compartidos por todos los hilos
+    def __init__(self) -> None:
+        self.hooks: "Instrumentation" = NULL_INSTRUMENTATION
+        self.stack: List[str] = []
+
+
+class _Step:
+    """Context manager que mide un paso y entrega su `StepEvent` al salir."""
+
+    __slots__ = ("hooks", "name", "resources", "attrs", "_previous", "_parent",
+                 "_start", "_alloc_start", "_owns_tracing")
+
+    def __init__(self, hooks: "Instrumentation", name: str, resources: int,
+                 attrs: Dict[str, Any]) -> None:
+        self.hooks = hooks
+        self.name = name
+        self.resources = resources  # Puede actualizarse dentro del bloque `with`
+        self.attrs = attrs
+
+    def __enter__(self) -> "_Step":
+        # Los pasos anidados (clone, export del Composite) reportan a la misma instrumentación
+        self._previous = _STATE.hooks
+        _STATE.hooks = self.hooks
+        self._parent = _STATE.stack[-1] if _STATE.stack else None
+        _STATE.stack.append(self.name)
+
+        self._owns_tracing = False
+        self._alloc_start = None
+        if self.hooks.trace_memory:
+            import tracemalloc  # Diferido: solo se carga si se mide memoria
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+            self._alloc_start = tracemalloc.get_traced_memory()[0]
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        seconds = time.perf_counter() - self._start
+        alloc_bytes = None
+        if self._alloc_start is not None:
+            import tracemalloc
+
+            alloc_bytes = tracemalloc.get_traced_memory()[0] - self._alloc_start
+            if self._owns_tracing:
+                tracemalloc.stop()
+        _STATE.stack.pop()
+        _STATE.hooks = self._previous
+
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.hooks.on_event(StepEvent(self.name, seconds, self.resources, alloc_bytes,
+                                      self._parent, self.attrs))
+        return False
+
+
+class _NullStep:
+    """Paso sin medición: lo devuelve la instrumentación desactivada."""
+
+    resources = 0
+
+    def __enter__(self) -> "_NullStep":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_STEP = _NullStep()
+
+
+class Instrumentation:
+    """
+    Interfaz de instrumentación: recibe un `StepEvent` por cada paso medido.
+
+    Las subclases implementan `on_event`. Con `trace_memory = True` cada evento incluye
+    la variación neta de memoria de su paso (tracemalloc se activa solo mientras dura
+    el paso más externo, si no estaba activo).
+    """
+
+    enabled = True
+    trace_memory = False
+
+    def on_event(self, event: StepEvent) -> None:
+        """Recibe la medición de un paso terminado."""
+        raise NotImplementedError
+
+    def step(self, name: str, resources: int = 0, **attrs: Any) -> Any:
+        """
+        Context manager que mide el bloque como el paso `name`.
+
+        Ejemplo:
+            >>> with hooks.step("builder.build_group", group="web") as step:
+            ...     step.resources = len(names)
+        """
+        if not self.enabled:
+            return _NULL_STEP
+        return _Step(self, name, resources, attrs)
+
+
+class _NullInstrumentation(Instrumentation):
+    """Instrumentación desactivada (por defecto): no mide ni registra nada."""
+
+    enabled = False
+
+    def on_event(self, event: StepEvent) -> None:
+        pass
+
+    def __repr__(self) -> str:
+        return "NULL_INSTRUMENTATION"
+
+
+NULL_INSTRUMENTATION = _NullInstrumentation()
+_STATE = _State()
+
+
+def active_instrumentation() -> Instrumentation:
+    """Instrumentación que reciben los pasos anidados (clone, export del Composite) del hilo actual."""
+    return _STATE.hooks
+
+
+class SummaryReporter(Instrumentation):
+    """
+    Agrega los eventos por nombre de paso y los resume como tabla o JSON.
+
+    Solo guarda totales por paso, así que puede quedar activo durante millones de
+    clones; con `keep_events=True` conserva además cada `StepEvent`.
+    """
+
+    def __init__(self, trace_memory: bool = False, keep_events: bool = False) -> None:
+        """
+        Args:
+            trace_memory: Medir la variación de memoria de cada paso con tracemalloc
+                          (más lento; solo para diagnóstico).
+            keep_events: Guardar la lista completa de eventos en `events`.
+        """
+        self.trace_memory = trace_memory
+        self.keep_events = keep_events
+        self.events: List[StepEvent] = []
+        self._totals: Dict[str, Dict[str, Any]] = {}
+
+    def on_event(self, event: StepEvent) -> None:
+        totals = self._totals.get(event.name)
+        if totals is None:
+            totals = self._totals[event.name] = {
+                "step": event.name, "parent": event.parent, "calls": 0,
+                "seconds": 0.0, "resources": 0, "alloc_bytes": None,
+            }
+        totals["calls"] += 1
+        totals["seconds"] += event.seconds
+        totals["resources"] += event.resources
+        if event.alloc_bytes is not None:
+            totals["alloc_bytes"] = (totals["alloc_bytes"] or 0) + event.alloc_bytes
+        if self.keep_events:
+            self.events.append(event)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Totales por paso, en el orden en que cada paso terminó por primera vez.
+
+        Returns:
+            Filas con "step", "parent", "calls", "seconds", "resources" y "alloc_bytes".
+        """
+        return [dict(totals) for totals in self._totals.values()]
+
+    def _tree_rows(self) -> List[Tuple[Dict[str, Any], int]]:
+        """Filas del resumen con su profundidad, cada paso seguido de sus pasos anidados."""
+        rows = self.summary()
+        children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        for row in rows:
+            parent = row["parent"] if row["parent"] in self._totals else None
+            children.setdefault(parent, []).append(row)
+        ordered, seen = [], set()
+        stack = [(row, 0) for row in reversed(children.get(None, []))]
+        while stack:
+            row, depth = stack.pop()
+            if row["step"] in seen:
+                continue
+            seen.add(row["step"])
+            ordered.append((row, depth))
+            stack.extend((child, depth + 1) for child in reversed(children.get(row["step"], [])))
+        return ordered
+
+    def format_table(self) -> str:
+        """Resumen como tabla de texto (los pasos anidados quedan indentados bajo su padre)."""
+        lines = [f"{'paso':<34}{'llamadas':>10}{'tiempo (s)':>12}{'recursos':>10}{'memoria (MB)':>14}"]
+        for row, depth in self._tree_rows():
+            label = "  " * depth + row["step"]
+            memory = "-" if row["alloc_bytes"] is None else f"{row['alloc_bytes'] / 1e6:.2f}"
+            lines.append(f"{label:<34}{row['calls']:>10}{row['seconds']:>12.4f}"
+                         f"{row['resources']:>10}{memory:>14}")
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        """Resumen (y eventos, si se guardan) como documento JSON."""
+        document: Dict[str, Any] = {"steps": self.summary()}
+        if self.keep_events:
+            document["events"] = [event.as_dict() for event in self.events]
+        return json.dumps(document, indent=2, default=str)
+
+    def write_json(self, path: str) -> None:
+        """Escribe `to_json()` en `path`."""
+        with open(path, "w") as f:
+            f.write(self.to_json())
+
+    def reset(self) -> None:
+        """Descarta los totales y eventos acumulados."""
+        self.events.clear()
+        self._totals.clear()
@@ -0,0 +1,172 @@
+"""Hashes Merkle y detección de cambios entre builds
+
+Cada recurso tiene un hash de contenido estable y cada CompositeModule un hash de
+subárbol que combina los hashes de sus recursos directos y de sus submódulos. Para
+comparar dos builds (módulos vivos o manifiestos exportados) solo se desciende por los
+subárboles cuyo hash difiere, así que el costo es proporcional al tamaño del cambio.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+Manifest = Dict[str, Any]
+
+
+def _json_default(value: Any) -> Any:
+    """Serializa mappings que no son dict (por ejemplo vistas de triggers compartidos)."""
+    if hasattr(value, "keys"):
+        return dict(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def block_hash(block: Dict[str, Any]) -> str:
+    """Hash estable (independiente del orden de claves) de un bloque de recurso."""
+    canonical = json.dumps(block, sort_keys=True, separators=(",", ":"), default=_json_default)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def resource_key(block: Dict[str, Any]) -> str:
+    """
+    Identificador "tipo.nombre" de un bloque ``{tipo: [{nombre: [...]}]}``.
+
+    Si el bloque no tiene esa forma se usa su hash como identificador.
+    """
+    for resource_type, entries in block.items():
+        if entries and isinstance(entries, list) and isinstance(entries[0], dict):
+            for name in entries[0]:
+                return f"{resource_type}.{name}"
+    return f"?.{block_hash(block)[:16]}"
+
+
+def _unique(key: str, seen: Dict[str, Any]) -> str:
+    """Desambigua claves repetidas dentro de un mismo nivel ("clave#2", "clave#3"...)."""
+    if key not in seen:
+        return key
+    suffix = 2
+    while f"{key}#{suffix}" in seen:
+        suffix += 1
+    return f"{key}#{suffix}"
+
+
+class _ModuleNode:
+    """Adaptador de un CompositeModule para el algoritmo de diff."""
+
+    def __init__(self, module: Any) -> None:
+        self.module = module
+        self.name = module.name
+
+    @property
+    def hash(self) -> str:
+        return self.module.subtree_hash()
+
+    def resources(self) -> Dict[str, str]:
+        return self.module.resource_hashes()
+
+    def submodules(self) -> Dict[str, "_ModuleNode"]:
+        nodes: Dict[str, _ModuleNode] = {}
+        for child in self.module.submodules():
+            nodes[_unique(child.name, nodes)] = _ModuleNode(child)
+        return nodes
+
+
+class _ManifestNode:
+    """Adaptador de un manifiesto exportado (dict) para el algoritmo de diff."""
+
+    def __init__(self, manifest: Manifest) -> None:
+        self.manifest = manifest
+        self.name = manifest["name"]
+        self.hash = manifest["hash"]
+
+    def resources(self) -> Dict[str, str]:
+        return self.manifest.get("resources", {})
+
+    def submodules(self) -> Dict[str, "_ManifestNode"]:
+        nodes: Dict[str, _ManifestNode] = {}
+        for child in self.manifest.get("modules", []):
+            nodes[_unique(child["name"], nodes)] = _ManifestNode(child)
+        return nodes
+
+
+def _node(tree: Any) -> Union[_ModuleNode, _ManifestNode]:
+    if isinstance(tree, dict):
+        return _ManifestNode(tree)
+    return _ModuleNode(tree)
+
+
+def build_manifest(module: Any) -> Manifest:
+    """
+    Exporta los hashes del árbol como un dict serializable a JSON.
+
+    Returns:
+        ``{"name", "hash", "resources": {clave: hash}, "modules": [manifiestos hijos]}``.
+    """
+    root: Manifest = {}
+    stack: List[Tuple[Any, Manifest]] = [(module, root)]
+    while stack:
+        current, manifest = stack.pop()
+        manifest["name"] = current.name
+        manifest["hash"] = current.subtree_hash()
+        manifest["resources"] = dict(current.resource_hashes())
+        manifest["modules"] = []
+        for child in current.submodules():
+            child_manifest: Manifest = {}
+            manifest["modules"].append(child_manifest)
+            stack.append((child, child_manifest))
+    return root
+
+
+def _all_resources(node: Any, path: str) -> Iterator[Tuple[str, str]]:
+    """Todas las claves de recursos de un subárbol, con su ruta de módulo."""
+    stack = [(node, path)]
+    while stack:
+        current, current_path = stack.pop()
+        for key in current.resources():
+            yield current_path, key
+        for name, child in current.submodules().items():
+            stack.append((child, f"{current_path}/{name}"))
+
+
+def diff_trees(old: Any, new: Any) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Compara dos builds y devuelve los recursos agregados, eliminados y modificados.
+
+    Cada entrada es ``(ruta_de_modulo, "tipo.nombre")``. Los submódulos se emparejan por
+    nombre y solo se recorren los subárboles cuyo hash difiere.
+
+    Args:
+        old: CompositeModule o manifiesto (`build_manifest`) del build anterior.
+        new: CompositeModule o manifiesto del build nuevo.
+    """
+    result: Dict[str, List[Tuple[str, str]]] = {"added": [], "removed": [], "changed": []}
+    new_node = _node(new)
+    stack = [(_node(old), new_node, new_node.name)]
+    while stack:
+        before, after, path = stack.pop()
+        if before.hash == after.hash:
+            continue
+
+        old_resources, new_resources = before.resources(), after.resources()
+        for key, digest in old_resources.items():
+            if key not in new_resources:
+                result["removed"].append((path, key))
+            elif new_resources[key] != digest:
+                result["changed"].append((path, key))
+        for key in new_resources:
+            if key not in old_resources:
+                result["added"].append((path, key))
+
+        old_modules, new_modules = before.submodules(), after.submodules()
+        for name, child in old_modules.items():
+            child_path = f"{path}/{name}"
+            if name in new_modules:
+                stack.append((child, new_modules[name], child_path))
+            else:
+                result["removed"].extend(_all_resources(child, child_path))
+        for name, child in new_modules.items():
+            if name not in old_modules:
+                result["added"].extend(_all_resources(child, f"{path}/{name}"))
+
+    for entries in result.values():
+        entries.sort()
+    return result
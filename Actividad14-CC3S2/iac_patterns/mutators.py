@@ -1,10 +1,14 @@
 """Funciones mutadoras para el patrón Prototype
 
 Este módulo contiene funciones reutilizables que modifican recursos Terraform clonados.
-Las funciones mutadoras operan in-place sobre el diccionario que reciben.
+Las funciones mutadoras operan in-place sobre el diccionario que reciben (o sobre el
+`CompactResource`, que aceptan igual que un diccionario).
 """
 
-from typing import Dict, Any
+from functools import partial
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple, Union
+
+from .compact import CompactResource
 
 def convert_null_to_local_file(resource_dict: Dict[str, Any],
                                 filename: str = "output.txt",
@@ -28,6 +32,19 @@ def convert_null_to_local_file(resource_dict: Dict[str, Any],
         >>> clone = proto.clone(lambda d: convert_null_to_local_file(d, "app.txt", "Hello"))
         >>> # El clone ahora contiene local_file en lugar de null_resource
     """
+    if isinstance(resource_dict, CompactResource):
+        if resource_dict.type == "null_resource":
+            resource_dict.type = "local_file"
+            resource_dict.name = f"{resource_dict.name}_file"
+            resource_dict.triggers = None
+            resource_dict.provisioners = None
+            resource_dict.attributes = {
+                "filename": filename,
+                "content": content,
+                "file_permission": "0644"
+            }
+        return
+
     if "resource" not in resource_dict:
         raise ValueError("resource_dict debe contener clave 'resource'")
 
@@ -74,6 +91,11 @@ def rename_resource(resource_dict: Dict[str, Any],
     Ejemplo:
         >>> clone = proto.clone(lambda d: rename_resource(d, "app", "web_server"))
     """
+    if isinstance(resource_dict, CompactResource):
+        if resource_dict.name == old_name:
+            resource_dict.name = new_name
+        return
+
     if "resource" not in resource_dict:
         return
 
@@ -100,6 +122,11 @@ def add_trigger(resource_dict: Dict[str, Any],
     Ejemplo:
         >>> clone = proto.clone(lambda d: add_trigger(d, "region", "us-east-1"))
     """
+    if isinstance(resource_dict, CompactResource):
+        if resource_dict.type == "null_resource" and resource_dict.triggers is not None:
+            resource_dict.triggers[trigger_key] = trigger_value
+        return
+
     if "resource" not in resource_dict:
         return
 
@@ -110,3 +137,207 @@ def add_trigger(resource_dict: Dict[str, Any],
                 if config_list and "triggers" in config_list[0]:
                     config_list[0]["triggers"][trigger_key] = trigger_value
                     break
+
+def index_resource(resource_dict: Dict[str, Any], idx: int) -> None:
+    """
+    Numera un null_resource clonado: agrega el índice a su nombre y como trigger.
+
+    Es la mutación que aplica `InfrastructureBuilder.build_null_fleet` a cada clon. Al
+    ser una función de módulo, `functools.partial(index_resource, idx=i)` se puede
+    enviar a procesos worker.
+
+    Args:
+        resource_dict: Diccionario del recurso (debe contener null_resource).
+        idx: Índice del clon dentro de la flota.
+
+    Ejemplo:
+        >>> clone = proto.clone(lambda d: index_resource(d, 3))  # "app" -> "app_3"
+    """
+    if isinstance(resource_dict, CompactResource):
+        resource_dict.name = f"{resource_dict.name}_{idx}"
+        resource_dict.triggers["index"] = idx
+        return
+
+    res_block = resource_dict["resource"][0]["null_resource"][0]
+    # Nombre original del recurso (por defecto "placeholder")
+    original_name = next(iter(res_block.keys()))
+    # Nuevo nombre válido: empieza con letra y contiene índice
+    new_name = f"{original_name}_{idx}"
+    # Renombramos la clave en el dict
+    res_block[new_name] = res_block.pop(original_name)
+    # Añadimos el trigger de índice
+    res_block[new_name][0]["triggers"]["index"] = idx
+
+
+#  Pipeline de mutadores fusionados
+
+class _Target:
+    """Ubicación del único recurso de un clon: bloque, tipo, entradas, nombre y config."""
+
+    __slots__ = ("block", "type", "entries", "name", "config")
+
+
+def _locate(resource_dict: Any) -> Optional[_Target]:
+    """
+    Ubica el recurso de un diccionario con la forma de la fábrica (un bloque, un tipo y
+    un nombre). Devuelve None para cualquier otra forma, sin modificar nada.
+    """
+    try:
+        resources = resource_dict["resource"]
+        if len(resources) != 1:
+            return None
+        block = resources[0]
+        if len(block) != 1:
+            return None
+        (resource_type, named), = block.items()
+        entries = named[0]
+        if len(entries) != 1:
+            return None
+        (name, configs), = entries.items()
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+        return None
+    target = _Target()
+    target.block, target.type, target.entries, target.name = block, resource_type, entries, name
+    target.config = configs[0] if configs else None
+    return target
+
+
+def _fused_convert(target: _Target, filename: str = "output.txt",
+                   content: str = "Generated by IaC") -> None:
+    if target.type != "null_resource":
+        return
+    new_name = f"{target.name}_file"
+    config = {"filename": filename, "content": content, "file_permission": "0644"}
+    entries = {new_name: [config]}
+    del target.block["null_resource"]
+    target.block["local_file"] = [entries]
+    target.type, target.entries, target.name, target.config = "local_file", entries, new_name, config
+
+
+def _fused_rename(target: _Target, old_name: str, new_name: str) -> None:
+    if target.name == old_name:
+        target.entries[new_name] = target.entries.pop(old_name)
+        target.name = new_name
+
+
+def _fused_add_triggers(target: _Target, triggers: Dict[str, Any]) -> None:
+    """Uno o varios `add_trigger` consecutivos fusionados en un único `update`."""
+    if target.type == "null_resource" and target.config is not None and "triggers" in target.config:
+        target.config["triggers"].update(triggers)
+
+
+def _fused_index(target: _Target, idx: int) -> None:
+    if target.type != "null_resource":
+        raise KeyError("null_resource")
+    new_name = f"{target.name}_{idx}"
+    target.entries[new_name] = target.entries.pop(target.name)
+    target.name = new_name
+    target.config["triggers"]["index"] = idx
+
+
+# Mutadores con versión fusionada: función -> paso sobre el recurso ya ubicado
+_FUSED: Dict[Callable[..., None], Callable[..., None]] = {
+    convert_null_to_local_file: _fused_convert,
+    rename_resource: _fused_rename,
+    add_trigger: _fused_add_triggers,  # Recibe {clave: valor}; ver MutatorPipeline
+    index_resource: _fused_index,
+}
+
+Step = Union[Callable[..., None], Tuple[Any, ...]]
+
+
+def _bind(func: Callable[..., None], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Argumentos de un paso como tupla posicional completa (sin el recurso)."""
+    import inspect  # Diferido: solo lo necesitan los pipelines
+
+    bound = inspect.signature(func).bind(None, *args, **kwargs)
+    bound.apply_defaults()
+    return bound.args[1:]
+
+
+class MutatorPipeline:
+    """
+    Compone varios mutadores en una única transformación.
+
+    Si todos los pasos son mutadores de este módulo y el clon tiene la forma de la
+    fábrica (un bloque con un recurso), el recurso se ubica una sola vez y cada paso
+    edita esa ubicación directamente; en cualquier otro caso los mutadores se aplican uno
+    tras otro. El resultado es siempre el mismo que aplicarlos en secuencia.
+
+    Ejemplo:
+        >>> pipeline = MutatorPipeline(
+        ...     (rename_resource, "app", "web"),
+        ...     (add_trigger, "region", "us-east-1"),
+        ...     partial(index_resource, idx=3),
+        ... )
+        >>> clone = proto.clone(pipeline)
+        >>> pipeline.apply_many(clones)
+    """
+
+    def __init__(self, *steps: Step) -> None:
+        """
+        Args:
+            steps: Cada paso es una tupla ``(mutador, *args)``, un `functools.partial` o
+                   cualquier función que reciba el diccionario del recurso.
+        """
+        self.steps: List[Tuple[Callable[..., None], Tuple[Any, ...], Dict[str, Any]]] = []
+        for step in steps:
+            if isinstance(step, tuple):
+                func, args, kwargs = step[0], tuple(step[1:]), {}
+            elif isinstance(step, partial):
+                func, args, kwargs = step.func, step.args, dict(step.keywords)
+            else:
+                func, args, kwargs = step, (), {}
+            self.steps.append((func, args, kwargs))
+        # Los argumentos de los pasos fusionados se resuelven una vez (incluidos los
+        # valores por defecto) para llamarlos solo con argumentos posicionales
+        self._fused: Optional[List[Tuple[Callable[..., None], Tuple[Any, ...]]]] = []
+        for func, args, kwargs in self.steps:
+            if func not in _FUSED:
+                self._fused = None  # Algún paso no tiene versión fusionada
+                break
+            args = _bind(func, args, kwargs)
+            if func is add_trigger and self._fused and self._fused[-1][0] is _fused_add_triggers:
+                # add_trigger consecutivos: se acumulan en el mismo update
+                self._fused[-1][1][0][args[0]] = args[1]
+            elif func is add_trigger:
+                self._fused.append((_fused_add_triggers, ({args[0]: args[1]},)))
+            else:
+                self._fused.append((_FUSED[func], args))
+
+    def apply_sequential(self, resource_dict: Any) -> None:
+        """Aplica los mutadores uno tras otro (camino de referencia)."""
+        for func, args, kwargs in self.steps:
+            func(resource_dict, *args, **kwargs)
+
+    def __call__(self, resource_dict: Any) -> None:
+        """Aplica la transformación in-place; se puede usar como mutador de `clone()`."""
+        target = None
+        if self._fused is not None and not isinstance(resource_dict, CompactResource):
+            target = _locate(resource_dict)
+        if target is None:
+            self.apply_sequential(resource_dict)
+            return
+        for fused, args in self._fused:
+            fused(target, *args)
+
+    def apply_many(self, resources: Iterable[Any]) -> List[Any]:
+        """
+        Aplica la transformación a un lote de clones.
+
+        Returns:
+            Los mismos clones (modificados in-place), en una lista (la misma si
+            `resources` ya era una lista).
+        """
+        if not isinstance(resources, list):
+            resources = list(resources)
+        for resource_dict in resources:
+            self(resource_dict)
+        return resources
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __repr__(self) -> str:
+        names = ", ".join(getattr(func, "__name__", repr(func)) for func, _, _ in self.steps)
+        return f"MutatorPipeline({names}, fused={self._fused is not None})"
@@ -0,0 +1,286 @@
+"""Clones delta (copy-on-write) para el patrón Prototype
+
+Un `DeltaResource` guarda únicamente las rutas que el mutador modificó, sobre el
+diccionario del prototipo compartido y de solo lectura. El recurso completo se
+reconstruye (materializa) al leerlo o exportarlo.
+"""
+
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator
+
+from .prototype import json_clone
+
+
+class _CowDict(MutableMapping):
+    """
+    Vista copy-on-write de un dict base.
+
+    Las lecturas de dicts/listas anidadas devuelven vistas hijas; las escrituras se
+    guardan en capas locales sin tocar el dict base.
+    """
+
+    __slots__ = ("_base", "_changed", "_removed", "_added")
+
+    def __init__(self, base: Dict[str, Any]) -> None:
+        self._base = base
+        self._changed = None   # claves del base con valor reemplazado o vista hija
+        self._removed = None   # claves del base eliminadas
+        self._added = None     # claves nuevas, en orden de inserción
+
+    def _lookup(self, key: Any) -> Any:
+        """Valor actual de `key` sin crear vistas hijas (lanza KeyError si no existe)."""
+        if self._added is not None and key in self._added:
+            return self._added[key]
+        if self._removed is not None and key in self._removed:
+            raise KeyError(key)
+        if self._changed is not None and key in self._changed:
+            return self._changed[key]
+        return self._base[key]
+
+    def __getitem__(self, key: Any) -> Any:
+        if self._added is not None and key in self._added:
+            return self._added[key]
+        if self._removed is not None and key in self._removed:
+            raise KeyError(key)
+        if self._changed is not None and key in self._changed:
+            return self._changed[key]
+
+        value = self._base[key]
+        if type(value) is dict:
+            view = _CowDict(value)
+        elif type(value) is list:
+            view = _cow_list(value)
+        else:
+            return value
+        # La vista se registra para que las escrituras posteriores queden en el delta
+        if self._changed is None:
+            self._changed = {}
+        self._changed[key] = view
+        return view
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        if self._added is not None and key in self._added:
+            self._added[key] = value
+        elif key in self._base and (self._removed is None or key not in self._removed):
+            if self._changed is None:
+                self._changed = {}
+            self._changed[key] = value
+        else:
+            # Clave nueva (o eliminada y vuelta a agregar): va al final, como en un dict
+            if self._added is None:
+                self._added = {}
+            self._added[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        if self._added is not None and key in self._added:
+            del self._added[key]
+        elif key in self._base and (self._removed is None or key not in self._removed):
+            if self._removed is None:
+                self._removed = set()
+            self._removed.add(key)
+            if self._changed is not None:
+                self._changed.pop(key, None)
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[Any]:
+        removed = self._removed or ()
+        for key in self._base:
+            if key not in removed:
+                yield key
+        if self._added is not None:
+            yield from list(self._added)
+
+    def __len__(self) -> int:
+        return (len(self._base) - len(self._removed or ())
+                + len(self._added or ()))
+
+    def __contains__(self, key: Any) -> bool:
+        try:
+            self._lookup(key)
+        except KeyError:
+            return False
+        return True
+
+    def _compact(self) -> bool:
+        """
+        Descarta las vistas hijas que no fueron modificadas.
+
+        Returns:
+            True si esta vista difiere de su dict base.
+        """
+        modified = bool(self._removed) or bool(self._added)
+        if self._changed:
+            for key, value in list(self._changed.items()):
+                if _same_as_base(value, self._base[key]):
+                    del self._changed[key]
+                else:
+                    modified = True
+        if self._added:
+            for key, value in self._added.items():
+                self._added[key] = _strip(value)
+        self._changed = self._changed or None
+        self._removed = self._removed or None
+        self._added = self._added or None
+        return modified
+
+
+def _cow_list(base: list) -> list:
+    """Copia superficial de una lista envolviendo sus dicts/listas en vistas copy-on-write."""
+    return [
+        _CowDict(item) if type(item) is dict else _cow_list(item) if type(item) is list else item
+        for item in base
+    ]
+
+
+def _same_as_base(value: Any, base: Any) -> bool:
+    """Compacta `value` y devuelve True si es equivalente a `base` sin modificaciones."""
+    if value is base:
+        return True
+    if type(value) is _CowDict:
+        return value._base is base and not value._compact()
+    if type(value) is list and type(base) is list and len(value) == len(base):
+        same = [_same_as_base(item, original) for item, original in zip(value, base)]
+        if all(same):
+            return True
+        # Elementos sin cambios: se comparte directamente el original
+        for i, unchanged in enumerate(same):
+            if unchanged:
+                value[i] = base[i]
+    return False
+
+
+def _strip(value: Any) -> Any:
+    """Reemplaza vistas sin modificaciones por su dict base (en valores nuevos)."""
+    if type(value) is _CowDict:
+        return value if value._compact() else value._base
+    if type(value) is list:
+        return [_strip(item) for item in value]
+    return value
+
+
+class _FrozenList(tuple):
+    """Lista del delta congelada (se distingue de las tuplas propias del usuario)."""
+
+    __slots__ = ()
+
+
+class _FrozenView:
+    """
+    Forma compacta e inmutable de un `_CowDict` ya compactado.
+
+    Las capas locales se guardan como tuplas planas ``(k1, v1, k2, v2, ...)``, mucho
+    más pequeñas que un dict para los pocos cambios que hace un mutador típico.
+    """
+
+    __slots__ = ("_base", "_changed", "_removed", "_added")
+
+    def __init__(self, view: _CowDict) -> None:
+        self._base = view._base
+        self._changed = _flatten(view._changed)
+        self._removed = tuple(view._removed) if view._removed else None
+        self._added = _flatten(view._added)
+
+    def _lookup(self, key: Any) -> Any:
+        """Valor actual de `key` (lanza KeyError si no existe)."""
+        if self._added is not None:
+            for i in range(0, len(self._added), 2):
+                if self._added[i] == key:
+                    return self._added[i + 1]
+        if self._removed is not None and key in self._removed:
+            raise KeyError(key)
+        if self._changed is not None:
+            for i in range(0, len(self._changed), 2):
+                if self._changed[i] == key:
+                    return self._changed[i + 1]
+        return self._base[key]
+
+    def __iter__(self) -> Iterator[Any]:
+        removed = self._removed or ()
+        for key in self._base:
+            if key not in removed:
+                yield key
+        if self._added is not None:
+            yield from self._added[::2]
+
+
+def _flatten(layer: Any) -> Any:
+    """Convierte una capa dict en tupla plana congelando sus valores."""
+    if not layer:
+        return None
+    flat = []
+    for key, value in layer.items():
+        flat.append(key)
+        flat.append(_freeze(value))
+    return tuple(flat)
+
+
+def _freeze(value: Any) -> Any:
+    """Congela recursivamente las vistas y listas del delta."""
+    t = type(value)
+    if t is _CowDict:
+        return _FrozenView(value)
+    if t is list:
+        return _FrozenList(_freeze(item) for item in value)
+    return value
+
+
+def _resolve(value: Any, copy: bool) -> Any:
+    """Reconstruye la estructura JSON combinando el delta y los datos base."""
+    t = type(value)
+    if t is _FrozenView:
+        return {key: _resolve(value._lookup(key), copy) for key in value}
+    if t is _FrozenList or t is list:
+        return [_resolve(item, copy) for item in value]
+    if t is dict and copy:
+        return json_clone(value)
+    return value
+
+
+class DeltaResource:
+    """
+    Clon que almacena solo las diferencias respecto al recurso del prototipo.
+
+    El recurso base se trata como de solo lectura: no debe modificarse mientras
+    existan clones delta que lo referencian.
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self, base: Dict[str, Any],
+                 mutator: Callable[[MutableMapping], Any] = lambda d: d) -> None:
+        """
+        Aplica `mutator` sobre una vista copy-on-write de `base` y conserva el delta.
+
+        Args:
+            base: Diccionario del prototipo (compartido, solo lectura).
+            mutator: Función que recibe la vista y la modifica en el acto.
+        """
+        root = _CowDict(base)
+        mutator(root)
+        root._compact()
+        self._root = _FrozenView(root)
+
+    def materialize(self, copy: bool = True) -> Dict[str, Any]:
+        """
+        Reconstruye el recurso completo.
+
+        Args:
+            copy: si es True el resultado es independiente del prototipo; si es False
+                  comparte los subárboles no modificados (útil solo para serializar).
+
+        Returns:
+            Diccionario del recurso con las modificaciones aplicadas.
+        """
+        return _resolve(self._root, copy)
+
+    def iter_blocks(self) -> Iterator[Dict[str, Any]]:
+        """Produce los bloques de la lista "resource" para el CompositeModule."""
+        yield from self.materialize(copy=False).get("resource", [])
+
+    def count_resources(self) -> int:
+        """Número de bloques de recurso del clon."""
+        try:
+            return len(self._root._lookup("resource"))
+        except KeyError:
+            return 0
@@ -0,0 +1,251 @@
+"""Construcción y codificación en paralelo
+
+Los grupos y flotas de un `InfrastructureBuilder` con `workers` se registran como
+`PendingModule`: una receta picklable (función de módulo + argumentos) en lugar de los
+recursos ya construidos. Al exportar, cada receta se construye y se codifica a JSON en
+un proceso worker, y el proceso principal concatena los fragmentos ya codificados en
+el orden del árbol, por lo que la salida no depende del número de workers.
+
+Las recetas son funciones puras de sus argumentos (el timestamp y la semilla de los
+UUIDs se fijan al registrarlas), así que construir una receta en cualquier proceso, o
+varias veces, produce siempre los mismos bytes.
+"""
+
+import os
+from collections import deque
+from functools import partial
+from typing import (TYPE_CHECKING, Any, Callable, Collection, Deque, Dict, Iterator, List, Optional,
+                    Sequence, Tuple)
+
+from .compact import CompactResource
+from .composite import CompositeModule
+from .fleet import iter_named
+from .factory import _build_many
+from .mutators import index_resource
+from .prototype import ResourcePrototype, json_clone
+from .streaming import encode_block, write_encoded
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+
+def build_group_recipe(names: Sequence[str], triggers: Dict[str, Any], timestamp: str,
+                       deterministic: bool, seed: Optional[bytes], compact: bool = False,
+                       shared: bool = False) -> List[Any]:
+    """
+    Receta de `build_group`: el lote de `create_many` con timestamp y semilla fijos, en
+    el modelo de recursos del builder (`compact`, `shared_triggers`).
+    """
+    return _build_many(names, triggers, timestamp, deterministic, seed, compact, shared)
+
+
+def fleet_chunk_recipe(template: Any, start: int, stop: int) -> List[Any]:
+    """Receta de un tramo de `build_null_fleet`: clones de `template` con índices [start, stop)."""
+    prototype = ResourcePrototype(template)
+    return [
+        prototype.clone(partial(index_resource, idx=idx), copier=json_clone).data
+        for idx in range(start, stop)
+    ]
+
+
+def _group_keys(names: Sequence[str], *_: Any) -> Iterator[str]:
+    return (f"null_resource.{name}" for name in names)
+
+
+def _template_name(template: Any) -> str:
+    if isinstance(template, CompactResource):
+        return template.name
+    return next(iter(template["resource"][0]["null_resource"][0]))
+
+
+def _fleet_chunk_keys(template: Any, start: int, stop: int) -> Iterator[str]:
+    # `index_resource` agrega "_<índice>" al nombre del null_resource de la plantilla
+    name = _template_name(template)
+    return (f"null_resource.{name}_{idx}" for idx in range(start, stop))
+
+
+def _fleet_chunk_contains(key: str, template: Any, start: int, stop: int) -> bool:
+    prefix = f"null_resource.{_template_name(template)}_"
+    digits = key[len(prefix):]
+    return (key.startswith(prefix) and digits.isascii() and digits.isdigit()
+            and str(int(digits)) == digits and start <= int(digits) < stop)
+
+
+# Receta -> función que calcula las claves "tipo.nombre" de sus recursos a partir de los
+# mismos argumentos, sin construirlos
+_RECIPE_KEYS: Dict[Callable[..., Any], Callable[..., Iterator[str]]] = {
+    build_group_recipe: _group_keys,
+    fleet_chunk_recipe: _fleet_chunk_keys,
+}
+
+# Receta -> función que responde en O(1) si la receta produce una clave (clave, *args)
+_RECIPE_CONTAINS: Dict[Callable[..., Any], Callable[..., bool]] = {
+    fleet_chunk_recipe: _fleet_chunk_contains,
+}
+
+# Recetas cuyos nombres (de null_resource) son la lista de su primer argumento
+_NAMED_RECIPES = frozenset({build_group_recipe})
+
+
+class PendingModule:
+    """
+    Hoja perezosa del CompositeModule con los recursos de una receta aún sin construir.
+
+    `count_resources()` se conoce sin construir nada; `iter_blocks()` construye la receta
+    en el proceso actual (por ejemplo para `export()` o `iter_resources()`), y `encode()`
+    la construye y codifica, que es lo que ejecutan los workers.
+    """
+
+    # El CompositeModule no indexa sus recursos (ni sus claves): los consulta con
+    # `contains()` / `iter_shared()` para no construir la receta
+    indexable = False
+
+    def __init__(self, recipe: Callable[..., List[Dict[str, Any]]], args: Tuple[Any, ...],
+                 count: int) -> None:
+        """
+        Args:
+            recipe: Función de módulo (picklable) que devuelve diccionarios de recurso
+                    o `CompactResource`.
+            args: Argumentos posicionales de la receta.
+            count: Número de recursos que produce la receta.
+        """
+        self.recipe = recipe
+        self.args = args
+        self.count = count
+        # `contains()` en O(1) (tramos de flota: el índice se despeja del nombre)
+        self.fast_contains = recipe in _RECIPE_CONTAINS
+
+    def build(self) -> List[Any]:
+        """Ejecuta la receta y devuelve sus recursos (diccionarios o `CompactResource`)."""
+        return self.recipe(*self.args)
+
+    def iter_keys(self) -> Iterator[str]:
+        """
+        Claves "tipo.nombre" de los recursos de la receta. Para las recetas del Builder se
+        calculan desde los argumentos; cualquier otra receta se construye para leerlas.
+        """
+        keys = _RECIPE_KEYS.get(self.recipe)
+        if keys is not None:
+            return keys(*self.args)
+        return (f"{resource_type}.{name}"
+                for block in self.iter_blocks()
+                for resource_type, named_list in block.items()
+                for named in named_list
+                for name in named)
+
+    def contains(self, key: str) -> bool:
+        """
+        True si la receta produce el recurso "tipo.nombre" `key`: en O(1) para los
+        tramos de flota, buscando en la lista de nombres para los grupos y construyendo
+        la receta para cualquier otra.
+        """
+        contains = _RECIPE_CONTAINS.get(self.recipe)
+        if contains is not None:
+            return contains(key, *self.args)
+        if self.recipe in _NAMED_RECIPES:
+            return key.startswith("null_resource.") and key[len("null_resource."):] in self.args[0]
+        return any(own == key for own in self.iter_keys())
+
+    def iter_shared(self, keys: Collection[str]) -> Iterator[str]:
+        """Claves de `keys` (conjunto o diccionario) que también produce la receta."""
+        if self.recipe in _NAMED_RECIPES:
+            return iter_named("null_resource", self.args[0], keys)
+        if self.fast_contains and len(keys) <= self.count:
+            return (key for key in keys if self.contains(key))
+        return (key for key in self.iter_keys() if key in keys)
+
+    def names(self) -> Optional[Tuple[str, Sequence[str]]]:
+        """(tipo, nombres) si la receta recibe la lista de nombres; None si los genera."""
+        return ("null_resource", self.args[0]) if self.recipe in _NAMED_RECIPES else None
+
+    def iter_blocks(self) -> Iterator[Dict[str, Any]]:
+        """Construye la receta y produce sus bloques de recurso en orden."""
+        for resource in self.build():
+            if isinstance(resource, dict):
+                yield from resource.get("resource", [])
+            else:
+                yield from resource.iter_blocks()
+
+    def count_resources(self) -> int:
+        """Número de recursos de la receta (sin construirla)."""
+        return self.count
+
+    def encode(self) -> str:
+        """Construye la receta y la codifica como fragmento para `write_encoded`."""
+        return ",\n".join(encode_block(block) for block in self.iter_blocks())
+
+    def __repr__(self) -> str:
+        return f"PendingModule(recipe={self.recipe.__name__}, count={self.count})"
+
+
+def _encode_pending(pending: PendingModule) -> str:
+    """Punto de entrada de los workers."""
+    return pending.encode()
+
+
+def _iter_leaves(module: CompositeModule) -> Iterator[Any]:
+    """Hojas del árbol (todo lo que no es CompositeModule) en el orden de `export()`."""
+    stack = [iter(module._children)]
+    while stack:
+        for child in stack[-1]:
+            if isinstance(child, CompositeModule):
+                stack.append(iter(child._children))
+                break
+            yield child
+        else:
+            stack.pop()
+
+
+def iter_fragments(module: CompositeModule, executor: "Executor",
+                   window: int) -> Iterator[str]:
+    """
+    Fragmentos codificados del módulo en orden, delegando los `PendingModule` al executor.
+
+    A lo sumo `window` recetas están en vuelo a la vez, para que los fragmentos
+    terminados no se acumulen en memoria más rápido de lo que se escriben. El resto de
+    hojas se codifica en el proceso principal mientras los workers trabajan.
+    """
+    leaves = list(_iter_leaves(module))
+    pending_indexes = iter([i for i, leaf in enumerate(leaves) if isinstance(leaf, PendingModule)])
+    in_flight: Deque[Tuple[int, Future]] = deque()
+
+    def submit_next() -> None:
+        index = next(pending_indexes, None)
+        if index is not None:
+            in_flight.append((index, executor.submit(_encode_pending, leaves[index])))
+
+    for _ in range(max(1, window)):
+        submit_next()
+
+    for index, leaf in enumerate(leaves):
+        if isinstance(leaf, PendingModule):
+            # Las recetas se envían en orden, así que la más antigua en vuelo es esta
+            _, future = in_flight.popleft()
+            fragment = future.result()
+            submit_next()
+            if fragment:
+                yield fragment
+            continue
+        blocks = leaf.get("resource", []) if isinstance(leaf, dict) else leaf.iter_blocks()
+        for block in blocks:
+            yield encode_block(block)
+
+
+def write_parallel(module: CompositeModule, fp: Any, workers: Optional[int] = None) -> None:
+    """
+    Escribe el documento Terraform JSON de `module` construyendo y codificando sus
+    `PendingModule` en un pool de procesos.
+
+    La salida es idéntica byte a byte a `json.dump(module.export(), fp, indent=4)`.
+
+    Args:
+        module: Módulo raíz a exportar.
+        fp: Archivo de texto abierto en modo escritura.
+        workers: Número de procesos (por defecto `os.cpu_count()`).
+    """
+    workers = workers or os.cpu_count() or 1
+    # Import diferido: multiprocessing solo se carga al exportar en modo paralelo
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        write_encoded(iter_fragments(module, executor, window=2 * workers), fp)
@@ -3,7 +3,43 @@ Permite clonar objetos Terraform y modificarlos de forma controlada, sin alterar
 """
 
 import copy
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
+
+from .compact import CompactResource
+from .instrumentation import _STATE
+
+# Tipos escalares de JSON: inmutables, se comparten sin copiar
+_JSON_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+
+def json_clone(obj: Any, fallback: Optional[Callable[[Any], Any]] = copy.deepcopy) -> Any:
+    """
+    Copia profunda especializada para datos con forma JSON (dict, list y escalares).
+
+    Evita la contabilidad del memo y el despacho genérico por tipo de `copy.deepcopy`:
+    solo recorre dicts y listas, y comparte los escalares (son inmutables).
+
+    Args:
+        obj: Estructura a copiar.
+        fallback: Función usada para cualquier otro tipo (por defecto `copy.deepcopy`).
+                  Si es None, los tipos no JSON provocan TypeError.
+
+    Returns:
+        Copia independiente de `obj`.
+    """
+    cls = type(obj)
+    if cls is dict:
+        return {
+            k: v if type(v) in _JSON_SCALARS else json_clone(v, fallback)
+            for k, v in obj.items()
+        }
+    if cls is list:
+        return [v if type(v) in _JSON_SCALARS else json_clone(v, fallback) for v in obj]
+    if cls in _JSON_SCALARS:
+        return obj
+    if fallback is None:
+        raise TypeError(f"Tipo no compatible con JSON: {cls.__name__}")
+    return fallback(obj)
 
 class ResourcePrototype:
     """
@@ -20,18 +56,38 @@ class ResourcePrototype:
         """
         self._resource_dict = resource_dict
 
-    def clone(self, mutator=lambda d: d) -> "ResourcePrototype":
+    def clone(self, mutator=lambda d: d,
+              copier: Callable[[Any], Any] = copy.deepcopy,
+              delta: bool = False) -> "ResourcePrototype":
         """
         Clona el recurso original aplicando una mutación opcional.
 
         Args:
             mutator: Función opcional que recibe el clon y puede modificarlo en el acto.
+            copier: Función de copia profunda. Usar `json_clone` cuando el recurso solo
+                    contiene dicts, listas y escalares JSON (mucho más rápido).
+            delta: si es True, el clon guarda solo las rutas modificadas por el mutador
+                   sobre el recurso de este prototipo (`DeltaResource`), que pasa a
+                   considerarse de solo lectura. `data` lo materializa al leerlo.
+                   Los `CompactResource` ya son pequeños y se clonan siempre completos.
 
         Returns:
             Nuevo objeto `ResourcePrototype` que contiene el recurso clonado y modificado.
         """
+        if _STATE.hooks.enabled:
+            with _STATE.hooks.step("prototype.clone", resources=1):
+                return self._clone(mutator, copier, delta)
+        return self._clone(mutator, copier, delta)
+
+    def _clone(self, mutator: Callable[[Any], Any], copier: Callable[[Any], Any],
+               delta: bool) -> "ResourcePrototype":
+        if delta and not isinstance(self._resource_dict, CompactResource):
+            # Import diferido: overlay depende de json_clone definido en este módulo
+            from .overlay import DeltaResource
+            return ResourcePrototype(DeltaResource(self.data, mutator))
+
         # Copia profunda para evitar mutaciones al recurso original
-        new_dict = copy.deepcopy(self._resource_dict)
+        new_dict = copier(self._resource_dict)
 
         # Aplica la función mutadora para modificar el clon si se desea
         mutator(new_dict)
@@ -45,6 +101,21 @@ class ResourcePrototype:
         Acceso de solo lectura al recurso almacenado.
 
         Returns:
-            Diccionario del recurso actual (clonado o original).
+            Diccionario del recurso actual (clonado o original), o el
+            `CompactResource` si el prototipo guarda uno.
+        """
+        if not isinstance(self._resource_dict, (dict, CompactResource)):
+            # Clon delta: se materializa una sola vez en un dict independiente
+            self._resource_dict = self._resource_dict.materialize()
+        return self._resource_dict
+
+    @property
+    def resource(self) -> Any:
+        """
+        Recurso almacenado tal cual, sin materializar.
+
+        Returns:
+            El diccionario del recurso o, para clones delta, el `DeltaResource`
+            (que puede agregarse directamente a un CompositeModule).
         """
         return self._resource_dict
@@ -0,0 +1,160 @@
+"""Exportación fragmentada (sharded) e incremental
+
+Escribe un archivo `.tf.json` por submódulo directo del módulo raíz (por ejemplo uno
+por grupo de `build_group`) más un shard raíz con los recursos sueltos. Terraform carga
+todos los `*.tf.json` de un directorio, por lo que el conjunto equivale al archivo
+monolítico.
+
+Junto a los shards se guarda un manifiesto con el hash de contenido de cada uno y el
+hash Merkle de los recursos de los que sale (`CompositeModule.subtree_hash`, en cache
+por submódulo): los shards cuyo origen no cambió ni siquiera se codifican, y de los
+demás solo se reescriben los que cambiaron, siempre de forma atómica (archivo temporal
++ `os.replace`).
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from .composite import CompositeModule
+from .streaming import dump_blocks
+
+MANIFEST_NAME = ".shards.json"
+ROOT_SHARD = "main.tf.json"
+
+
+def _shard_filename(name: str, used: set) -> str:
+    """Nombre de archivo seguro y único para el shard de un submódulo."""
+    base = re.sub(r"[^A-Za-z0-9_-]", "_", name) or "module"
+    candidate = f"{base}.tf.json"
+    suffix = 2
+    while candidate in used:
+        candidate = f"{base}_{suffix}.tf.json"
+        suffix += 1
+    used.add(candidate)
+    return candidate
+
+
+def iter_shards(module: CompositeModule) -> List[Tuple[str, Iterable[Dict[str, Any]]]]:
+    """
+    Reparte el módulo en shards: (nombre de archivo, bloques de recurso).
+
+    El shard raíz contiene los recursos que cuelgan directamente del módulo; cada
+    submódulo directo (con todo su subárbol) forma su propio shard.
+    """
+    return [(filename, blocks()) for filename, _, blocks in _shard_sources(module)]
+
+
+def _shard_sources(module: CompositeModule) -> List[Tuple[str, Callable[[], str],
+                                                          Callable[[], Iterable[Dict[str, Any]]]]]:
+    """
+    Shards del módulo como (nombre de archivo, hash de origen, bloques), con el hash y
+    los bloques diferidos para no recorrer los shards que no hace falta escribir.
+    """
+    used = {ROOT_SHARD, MANIFEST_NAME}
+    root_children = []
+    shards = []
+    for child in module._children:
+        if isinstance(child, CompositeModule):
+            shards.append((_shard_filename(child.name, used), child.subtree_hash, child.iter_blocks))
+        else:
+            root_children.append(child)
+
+    def root_hash() -> str:
+        digest = hashlib.sha256()
+        for key, resource_hash in module.resource_hashes().items():
+            digest.update(f"R {key} {resource_hash}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def root_blocks() -> Iterable[Dict[str, Any]]:
+        for child in root_children:
+            if isinstance(child, dict):
+                yield from child.get("resource", [])
+            else:
+                yield from child.iter_blocks()
+
+    return [(ROOT_SHARD, root_hash, root_blocks)] + shards
+
+
+def _atomic_write(path: str, content: str) -> None:
+    """Escribe `content` en `path` sin dejar nunca un archivo a medio escribir."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _load_manifest(directory: str) -> Dict[str, Dict[str, str]]:
+    path = os.path.join(directory, MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"shards": {}, "sources": {}}
+    return {"shards": manifest.get("shards", {}), "sources": manifest.get("sources", {})}
+
+
+def write_shards(module: CompositeModule, directory: str) -> Dict[str, List[str]]:
+    """
+    Exporta `module` en shards dentro de `directory`, reescribiendo solo los que cambiaron.
+
+    Los shards vacíos no se escriben, y los que ya no existen en el módulo se eliminan.
+
+    Args:
+        module: Módulo raíz a exportar.
+        directory: Directorio destino (se crea si no existe).
+
+    Returns:
+        Diccionario con las listas de archivos "written", "unchanged" y "removed".
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = _load_manifest(directory)
+    previous, previous_sources = manifest["shards"], manifest["sources"]
+    current: Dict[str, str] = {}
+    sources: Dict[str, str] = {}
+    report: Dict[str, List[str]] = {"written": [], "unchanged": [], "removed": []}
+
+    for filename, source_hash, blocks in _shard_sources(module):
+        source = source_hash()
+        path = os.path.join(directory, filename)
+        if (filename in previous and previous_sources.get(filename) == source
+                and os.path.exists(path)):
+            # Mismo origen que el shard escrito: no hace falta codificarlo
+            current[filename], sources[filename] = previous[filename], source
+            report["unchanged"].append(filename)
+            continue
+
+        buffer = io.StringIO()
+        dump_blocks(blocks(), buffer)
+        content = buffer.getvalue()
+        if content == '{\n    "resource": []\n}':
+            continue
+
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        current[filename], sources[filename] = digest, source
+        if previous.get(filename) == digest and os.path.exists(path):
+            report["unchanged"].append(filename)
+        else:
+            _atomic_write(path, content)
+            report["written"].append(filename)
+
+    for filename in previous:
+        if filename not in current:
+            path = os.path.join(directory, filename)
+            if os.path.exists(path):
+                os.unlink(path)
+            report["removed"].append(filename)
+
+    _atomic_write(os.path.join(directory, MANIFEST_NAME),
+                  json.dumps({"shards": current, "sources": sources}, indent=2, sort_keys=True))
+    return report
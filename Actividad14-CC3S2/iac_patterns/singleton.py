@@ -2,10 +2,17 @@
 
 Asegura que una clase tenga una única instancia global, compartida en todo el sistema.
 Esta implementación es segura para entornos con múltiples hilos (thread-safe).
+
+Las lecturas no toman locks: `ConfigSingleton()` devuelve la instancia existente sin
+pasar por el lock de creación, y la configuración se publica como un snapshot inmutable
+y versionado (`SettingsSnapshot`) que cada escritura reemplaza con una única asignación
+(copia en escritura). Un lector que conserva un snapshot ve siempre un estado
+consistente, aunque otros hilos sigan escribiendo.
 """
 
 import threading
-from typing import Any, Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple
 from datetime import datetime, timezone
 
 class SingletonMeta(type):
@@ -21,13 +28,36 @@ class SingletonMeta(type):
     def __call__(cls, *args, **kwargs):
         """
         Controla la creación de instancias: solo permite una única instancia por clase.
-        Si ya existe, devuelve la existente. Si no, la crea protegida por un lock.
+        Si ya existe, la devuelve sin tomar el lock (camino rápido). Si no, la crea
+        protegida por el lock, comprobando de nuevo por si otro hilo la creó antes
+        (double-checked locking).
         """
+        instance = cls._instances.get(cls)
+        if instance is not None:
+            return instance
         with cls._lock:
             if cls not in cls._instances:
                 cls._instances[cls] = super().__call__(*args, **kwargs)
         return cls._instances[cls]
 
+
+class SettingsSnapshot(NamedTuple):
+    """
+    Vista inmutable de la configuración en un momento dado.
+
+    Atributos:
+        version: Se incrementa en cada escritura (0 para la configuración inicial).
+        settings: Mapeo de solo lectura con las claves y valores de esa versión. Los
+                  valores no se copian: un valor mutable (una lista) sigue siendo mutable.
+    """
+
+    version: int
+    settings: Mapping[str, Any]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Valor de `key` en este snapshot o `default` si no existe."""
+        return self.settings.get(key, default)
+
 class ConfigSingleton(metaclass=SingletonMeta):
     """
     Clase Singleton que actúa como contenedor de configuración global.
@@ -43,7 +73,31 @@ class ConfigSingleton(metaclass=SingletonMeta):
         """
         self.env_name = env_name
         self.created_at = datetime.now(tz=timezone.utc).isoformat()  # Fecha de creación
-        self.settings: Dict[str, Any] = {}  # Diccionario para guardar claves y valores
+        self._write_lock = threading.Lock()  # Serializa solo a los escritores
+        self._snapshot = SettingsSnapshot(0, MappingProxyType({}))
+
+    @property
+    def settings(self) -> Mapping[str, Any]:
+        """Vista de solo lectura de la configuración actual (la del último snapshot)."""
+        return self._snapshot.settings
+
+    @property
+    def version(self) -> int:
+        """Versión de la configuración actual."""
+        return self._snapshot.version
+
+    def snapshot(self) -> SettingsSnapshot:
+        """
+        Devuelve la configuración actual como snapshot inmutable, sin tomar locks.
+
+        Para varias lecturas que deben ser coherentes entre sí, conviene obtener un
+        snapshot una vez y leer de él en lugar de llamar a `get()` repetidamente.
+        """
+        return self._snapshot
+
+    def _publish(self, settings: Dict[str, Any]) -> None:
+        """Publica `settings` como nueva versión (se llama con `_write_lock` tomado)."""
+        self._snapshot = SettingsSnapshot(self._snapshot.version + 1, MappingProxyType(settings))
 
     def set(self, key: str, value: Any) -> None:
         """
@@ -52,7 +106,21 @@ class ConfigSingleton(metaclass=SingletonMeta):
             key: clave de configuración.
             value: valor asociado.
         """
-        self.settings[key] = value
+        with self._write_lock:
+            settings = dict(self._snapshot.settings)
+            settings[key] = value
+            self._publish(settings)
+
+    def update(self, values: Mapping[str, Any]) -> None:
+        """
+        Establece varios valores en una sola escritura (una copia y una versión).
+        Args:
+            values: claves y valores a establecer.
+        """
+        with self._write_lock:
+            settings = dict(self._snapshot.settings)
+            settings.update(values)
+            self._publish(settings)
 
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -64,11 +132,14 @@ class ConfigSingleton(metaclass=SingletonMeta):
         Returns:
             Valor asociado o valor por defecto.
         """
-        return self.settings.get(key, default)
+        return self._snapshot.settings.get(key, default)
 
     def reset(self) -> None:
         """
         Limpia el diccionario de settings pero mantiene created_at intacto.
         Útil para resetear configuración sin perder la referencia temporal de creación.
+        La versión sigue creciendo, de modo que un snapshot anterior nunca se confunde
+        con uno posterior al reset.
         """
-        self.settings.clear()
+        with self._write_lock:
+            self._publish({})
@@ -0,0 +1,255 @@
+"""Volcado a disco (spill) de subárboles bajo un presupuesto de memoria
+
+Un `CompositeModule` con `memory_budget` estima los bytes que ocupan sus recursos en
+memoria y, cuando el estimado supera el presupuesto, escribe los recursos residentes
+de su subárbol en segmentos JSONL de un archivo temporal (`SpillStore`) y los
+reemplaza por handles livianos (`SpilledSegment`). Los submódulos se conservan, así
+que el orden de exportación, las rutas de módulo y los hashes Merkle no cambian.
+
+Al exportar en streaming, cada segmento se vuelve a leer línea a línea en su lugar del
+árbol, por lo que el pico de memoria queda acotado por el presupuesto y no por el
+tamaño del documento.
+"""
+
+import heapq
+import json
+import os
+import sys
+import tempfile
+import weakref
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .compact import CompactResource, SharedTriggers
+
+# Se mide el tamaño real de una de cada `_SAMPLE_EVERY` hojas; el resto usa el promedio
+_SAMPLE_EVERY = 64
+
+# Cada clave volcada ocupa un entero de 64 bits: 40 bits de hash y 23 de número de segmento
+_HASH_BITS = 40
+_SLOT_BITS = 23
+_HASH_MASK = (1 << _HASH_BITS) - 1
+_SLOT_MASK = (1 << _SLOT_BITS) - 1
+
+
+def deep_sizeof(obj: Any) -> int:
+    """
+    Bytes que ocupa `obj` junto con los contenedores y valores que referencia.
+
+    Recorre diccionarios, listas, tuplas y `CompactResource` con una pila explícita;
+    los objetos compartidos se cuentan una sola vez. De los `SharedTriggers` solo se
+    cuentan los valores propios: el layout lo comparte todo el grupo.
+    """
+    seen = set()
+    total = 0
+    pending = [obj]
+    while pending:
+        current = pending.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            pending.extend(current.keys())
+            pending.extend(current.values())
+        elif isinstance(current, (list, tuple)):
+            pending.extend(current)
+        elif isinstance(current, CompactResource):
+            pending.extend(getattr(current, slot) for slot in CompactResource.__slots__)
+        elif isinstance(current, SharedTriggers):
+            pending.append(current._values)
+            pending.append(current._own)
+    return total
+
+
+class SizeEstimator:
+    """
+    Estimación barata de la memoria de las hojas de un CompositeModule.
+
+    Mide con `deep_sizeof` la primera hoja de cada tipo y luego una de cada
+    `_SAMPLE_EVERY`; las demás se estiman con el promedio de bytes por recurso de las
+    muestras de su tipo.
+    """
+
+    def __init__(self) -> None:
+        self._stats: Dict[type, list] = {}  # tipo -> [bytes medidos, recursos medidos, hojas vistas]
+
+    def estimate(self, leaf: Any, resources: int) -> int:
+        """Bytes estimados de `leaf`, que aporta `resources` recursos."""
+        if resources <= 0:
+            return 0
+        stats = self._stats.setdefault(type(leaf), [0, 0, 0])
+        stats[2] += 1
+        if stats[1] and stats[2] % _SAMPLE_EVERY:
+            return stats[0] * resources // stats[1]
+        size = deep_sizeof(leaf)
+        stats[0] += size
+        stats[1] += resources
+        return size
+
+
+# Estimador compartido: las muestras de un árbol sirven para los demás
+_ESTIMATOR = SizeEstimator()
+
+
+class SpillStore:
+    """
+    Archivo temporal de solo-agregado donde se escriben los segmentos de un árbol.
+
+    Cada segmento es un rango de bytes con un bloque de recurso JSON por línea. El
+    archivo se elimina cuando el store (y todos sus segmentos) dejan de usarse, o al
+    terminar el intérprete.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        """
+        Args:
+            directory: Directorio del archivo temporal (por defecto el del sistema).
+        """
+        fd, self.path = tempfile.mkstemp(prefix="iac_spill_", suffix=".jsonl", dir=directory)
+        self._file = os.fdopen(fd, "wb")
+        self._finalizer = weakref.finalize(self, _close_and_remove, self._file, self.path)
+
+    def write(self, blocks: Iterable[Dict[str, Any]]) -> "SpilledSegment":
+        """
+        Agrega un segmento con `blocks` al final del archivo.
+
+        Returns:
+            Handle del segmento escrito.
+        """
+        offset = self._file.tell()
+        count = 0
+        for block in blocks:
+            self._file.write(json.dumps(block, separators=(",", ":")).encode("utf-8"))
+            self._file.write(b"\n")
+            count += 1
+        self._file.flush()
+        return SpilledSegment(self, offset, self._file.tell() - offset, count)
+
+    @property
+    def size(self) -> int:
+        """Bytes escritos hasta ahora."""
+        return self._file.tell()
+
+    def close(self) -> None:
+        """Cierra y elimina el archivo (los segmentos dejan de poder leerse)."""
+        self._finalizer()
+
+
+def _close_and_remove(fp: Any, path: str) -> None:
+    fp.close()
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class SpilledSegment:
+    """
+    Hoja del CompositeModule que reemplaza a recursos volcados a disco.
+
+    Solo guarda la posición del segmento dentro del `SpillStore`; `iter_blocks()`
+    vuelve a leer y decodificar los bloques en orden, uno a la vez.
+    """
+
+    __slots__ = ("store", "offset", "length", "count", "__weakref__")
+
+    def __init__(self, store: SpillStore, offset: int, length: int, count: int) -> None:
+        self.store = store
+        self.offset = offset
+        self.length = length
+        self.count = count
+
+    def iter_blocks(self) -> Iterator[Dict[str, Any]]:
+        """Lee los bloques del segmento desde disco, en el orden en que se escribieron."""
+        remaining = self.length
+        with open(self.store.path, "rb") as f:
+            f.seek(self.offset)
+            while remaining > 0:
+                line = f.readline(remaining)
+                if not line:
+                    raise EOFError(f"Segmento truncado en {self.store.path}")
+                remaining -= len(line)
+                yield json.loads(line)
+
+    def count_resources(self) -> int:
+        """Número de bloques del segmento (sin leerlo)."""
+        return self.count
+
+    def __repr__(self) -> str:
+        return f"SpilledSegment(offset={self.offset}, bytes={self.length}, count={self.count})"
+
+
+class SpilledKeys:
+    """
+    Índice compacto de las claves "tipo.nombre" de los recursos volcados a disco.
+
+    En lugar de una entrada de diccionario por recurso (la clave como string más dos
+    referencias, unos 200 bytes), cada clave se guarda como un entero de 8 bytes con 40
+    bits de su hash y el número de su segmento, en arrays ordenados que se consultan
+    por búsqueda binaria. Las claves no se guardan, así que dos claves pueden compartir
+    hash: `candidates()` devuelve los segmentos posibles y quien consulta confirma
+    leyendo el segmento.
+
+    Los arrays se unen como en un árbol LSM (cada uno al menos del doble que el
+    siguiente), por lo que agregar cuesta O(log n) amortizado por clave y consultar
+    O(log² n).
+    """
+
+    __slots__ = ("segments", "owners", "_runs", "_size")
+
+    def __init__(self) -> None:
+        self.segments: List[SpilledSegment] = []
+        self.owners: List[Any] = []  # Módulo dueño de cada segmento
+        self._runs: List[array] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, segment: SpilledSegment, owner: Any, keys: Iterable[str]) -> None:
+        """Registra las claves de `segment`, que pertenece al módulo `owner`."""
+        slot = len(self.segments)
+        if slot > _SLOT_MASK:
+            raise OverflowError("Demasiados segmentos volcados en un mismo árbol")
+        self.segments.append(segment)
+        self.owners.append(owner)
+        self._push([(hash(key) & _HASH_MASK) << _SLOT_BITS | slot for key in keys])
+
+    def absorb(self, other: "SpilledKeys") -> None:
+        """Agrega las claves de `other`, renumerando sus segmentos a continuación de los propios."""
+        offset = len(self.segments)
+        if offset + len(other.segments) > _SLOT_MASK + 1:
+            raise OverflowError("Demasiados segmentos volcados en un mismo árbol")
+        self.segments.extend(other.segments)
+        self.owners.extend(other.owners)
+        self._push([value + offset for run in other._runs for value in run])
+
+    def _push(self, values: List[int]) -> None:
+        if not values:
+            return
+        values.sort()
+        runs = self._runs
+        runs.append(array("q", values))
+        self._size += len(values)
+        while len(runs) > 1 and len(runs[-2]) <= 2 * len(runs[-1]):
+            newer, older = runs.pop(), runs.pop()
+            runs.append(array("q", heapq.merge(older, newer)))
+
+    def candidates(self, key: str) -> List[Tuple[SpilledSegment, Any]]:
+        """Pares (segmento, módulo dueño) que pueden contener `key`, sin leer el disco."""
+        low = (hash(key) & _HASH_MASK) << _SLOT_BITS
+        high = low | _SLOT_MASK
+        found = []
+        for run in self._runs:
+            position = bisect_left(run, low)
+            while position < len(run) and run[position] <= high:
+                slot = run[position] & _SLOT_MASK
+                found.append((self.segments[slot], self.owners[slot]))
+                position += 1
+        return found
+
+    def nbytes(self) -> int:
+        """Bytes de los arrays de claves (sin las listas de segmentos)."""
+        return sum(run.itemsize * len(run) for run in self._runs)
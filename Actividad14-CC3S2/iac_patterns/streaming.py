@@ -0,0 +1,139 @@
+"""Escritura en streaming de documentos Terraform JSON
+
+Serializa los bloques de recursos directamente al archivo a medida que se recorre
+el árbol Composite, sin materializar el diccionario completo ``{"resource": [...]}``.
+La salida es idéntica byte a byte a ``json.dump(data, f, indent=4)``.
+
+`dump_merged` escribe en cambio el formato compacto: un solo bloque por tipo de
+recurso, sin indentación ni espacios entre separadores.
+"""
+
+import json
+import shutil
+import tempfile
+from typing import Any, Dict, Iterable, List, Set, TextIO, Tuple
+
+# Indentación de cada elemento dentro de la lista "resource" (nivel 2 con indent=4)
+_ITEM_INDENT = " " * 8
+
+# Codificador reutilizado por `dump_merged` (json.dumps crea uno nuevo en cada llamada
+# cuando recibe `separators`)
+_encode_compact = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def encode_block(block: Dict[str, Any]) -> str:
+    """
+    Codifica un bloque de recurso tal como aparecería dentro de la lista "resource".
+
+    json no emite saltos de línea dentro de strings (los escapa), por lo que basta con
+    re-indentar cada línea del bloque codificado de forma aislada.
+
+    Args:
+        block: Bloque de recurso, por ejemplo ``{"null_resource": [...]}``.
+
+    Returns:
+        Fragmento de texto listo para concatenarse en el documento.
+    """
+    encoded = json.dumps(block, indent=4)
+    return _ITEM_INDENT + encoded.replace("\n", "\n" + _ITEM_INDENT)
+
+
+def write_encoded(fragments: Iterable[str], fp: TextIO) -> None:
+    """
+    Escribe un documento ``{"resource": [...]}`` a partir de fragmentos ya codificados.
+
+    Args:
+        fragments: Fragmentos generados con `encode_block` (o varios unidos por ",\\n").
+        fp: Archivo de texto abierto en modo escritura.
+    """
+    first = True
+    for fragment in fragments:
+        if first:
+            fp.write('{\n    "resource": [\n')
+            first = False
+        else:
+            fp.write(",\n")
+        fp.write(fragment)
+
+    if first:
+        # Lista vacía: json.dump la escribe en una sola línea
+        fp.write('{\n    "resource": []\n}')
+    else:
+        fp.write("\n    ]\n}")
+
+
+def dump_blocks(blocks: Iterable[Dict[str, Any]], fp: TextIO) -> None:
+    """
+    Escribe los bloques de recursos en `fp` uno a uno, con memoria constante.
+
+    Args:
+        blocks: Iterable de bloques de recurso (puede ser un generador).
+        fp: Archivo de texto abierto en modo escritura.
+    """
+    write_encoded(map(encode_block, blocks), fp)
+
+
+def dump_merged(blocks: Iterable[Dict[str, Any]], fp: TextIO) -> None:
+    """
+    Escribe los bloques agrupando todos los recursos de un mismo tipo en un único
+    bloque y con separadores compactos:
+
+        {"resource":[{"null_resource":[{"a":[{...}],"b":[{...}]}]},{"local_file":[...]}]}
+
+    El documento es equivalente al de `dump_blocks` (mismos recursos y configuraciones;
+    los tipos aparecen en el orden en que se vieron por primera vez). Un nombre
+    repetido dentro de un tipo se rechaza: en un único objeto JSON sería una clave
+    duplicada, que `json.load` descarta sin avisar.
+
+    Los recursos del primer tipo se escriben directamente en `fp`; los de los demás
+    tipos se acumulan en archivos temporales y se copian al final, de modo que la
+    memoria queda acotada por el bloque más grande y los nombres ya escritos.
+
+    Args:
+        blocks: Iterable de bloques de recurso (puede ser un generador).
+        fp: Archivo de texto abierto en modo escritura.
+
+    Raises:
+        ValueError: si dos recursos del mismo tipo tienen el mismo nombre (lo escrito
+                    hasta ese punto queda incompleto).
+    """
+    writers: Dict[str, Any] = {}  # Tipo -> `write` de su destino
+    names: Dict[str, Set[str]] = {}  # Tipo -> nombres ya escritos
+    spools: List[Tuple[str, Any]] = []  # Tipos posteriores al primero y su archivo temporal
+    encode = _encode_compact
+    try:
+        for block in blocks:
+            for resource_type, named_list in block.items():
+                write = writers.get(resource_type)
+                if write is None:
+                    if writers:
+                        spool = tempfile.TemporaryFile("w+", encoding="utf-8")
+                        spools.append((resource_type, spool))
+                        write = spool.write
+                    else:
+                        fp.write('{"resource":[{' + encode(resource_type) + ":[{")
+                        write = fp.write
+                    writers[resource_type] = write
+                    names[resource_type] = set()
+                written = names[resource_type]
+                for named in named_list:
+                    for name, configs in named.items():
+                        if name in written:
+                            raise ValueError(f"Recurso duplicado: {resource_type}.{name}")
+                        if written:
+                            write(",")
+                        written.add(name)
+                        write(encode(name) + ":" + encode(configs))
+        if not writers:
+            fp.write('{"resource":[]}')
+            return
+        fp.write("}]}")
+        for resource_type, spool in spools:
+            fp.write(",{" + encode(resource_type) + ":[{")
+            spool.seek(0)
+            shutil.copyfileobj(spool, fp)
+            fp.write("}]}")
+        fp.write("]}")
+    finally:
+        for _, spool in spools:
+            spool.close()
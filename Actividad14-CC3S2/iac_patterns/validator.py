@@ -0,0 +1,402 @@
+"""Validador de Terraform JSON en proceso
+
+Comprueba, sin ejecutar `terraform`, las reglas estructurales de las que dependen los
+generadores de iac_patterns:
+
+- secciones de primer nivel conocidas y la lista "resource" de bloques
+  ``{tipo: [{nombre: [config]}]}`` que producen las fábricas y los adapters;
+- tipos y nombres de recurso válidos y pares (tipo, nombre) únicos;
+- triggers como mapa de valores escalares y provisioners con forma válida;
+- `filename` obligatorio en `local_file`;
+- destinos de `depends_on` que existen en el documento.
+
+Los archivos se leen en streaming: el primer nivel del documento se recorre a mano y
+cada bloque de recurso se decodifica por separado con `json.JSONDecoder.raw_decode`,
+por lo que un documento de 1M de recursos se valida en una sola pasada sin cargarlo
+completo. Varios archivos pueden validarse en un pool de procesos.
+
+Uso:
+    python3 -m iac_patterns.validator terraform/main.tf.json [otros.tf.json ...] [--workers N]
+"""
+
+import argparse
+import json
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence, TextIO
+
+# Secciones de primer nivel admitidas en Terraform JSON
+TOP_LEVEL_KEYS = frozenset({
+    "resource", "data", "variable", "output", "locals", "module", "provider",
+    "terraform", "moved", "import", "check", "removed",
+})
+PROVISIONERS = frozenset({"local-exec", "remote-exec", "file"})
+
+_RESOURCE_TYPE = re.compile(r"[A-Za-z][A-Za-z0-9_]*\Z")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_-]*\Z")
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+_DECODER = json.JSONDecoder()
+_CHUNK_SIZE = 1 << 20
+
+
+class ValidationReport:
+    """
+    Resultado de validar un documento.
+
+    Atributos:
+        path: Archivo validado (None para documentos en memoria).
+        resources: Recursos revisados.
+        errors: Mensajes de error, con la posición del bloque en la lista "resource".
+        truncated: True si se alcanzó `max_errors` y la validación se detuvo.
+    """
+
+    __slots__ = ("path", "resources", "errors", "truncated")
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.resources = 0
+        self.errors: List[str] = []
+        self.truncated = False
+
+    @property
+    def ok(self) -> bool:
+        """True si el documento no tiene errores."""
+        return not self.errors
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Representación serializable a JSON."""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"ValidationReport(path={self.path!r}, resources={self.resources}, errors={len(self.errors)})"
+
+
+class _TooManyErrors(Exception):
+    """Se alcanzó `max_errors`: se detiene la validación."""
+
+
+class _Checker:
+    """Reglas por bloque; las referencias de `depends_on` se resuelven en `finish()`."""
+
+    def __init__(self, report: ValidationReport, max_errors: int) -> None:
+        self.report = report
+        self.max_errors = max_errors
+        self.keys = set()       # "tipo.nombre" de los recursos vistos
+        self.data_keys = set()  # "data.tipo.nombre" de los data sources
+        self.references: List[tuple] = []  # (ubicación, destino) aún no vistos
+
+    def error(self, where: str, message: str) -> None:
+        self.report.errors.append(f"{where}: {message}")
+        if len(self.report.errors) >= self.max_errors:
+            self.report.truncated = True
+            raise _TooManyErrors()
+
+    def check_block(self, index: int, block: Any) -> None:
+        where = f"resource[{index}]"
+        if not isinstance(block, dict) or not block:
+            self.error(where, "el bloque debe ser un objeto {tipo: [{nombre: [config]}]}")
+            return
+        for resource_type, named_list in block.items():
+            if not _RESOURCE_TYPE.match(resource_type):
+                self.error(where, f"tipo de recurso inválido: {resource_type!r}")
+            if not isinstance(named_list, list) or not named_list:
+                self.error(where, f"'{resource_type}' debe ser una lista no vacía de {{nombre: [config]}}")
+                continue
+            for named in named_list:
+                if not isinstance(named, dict) or not named:
+                    self.error(where, f"'{resource_type}' contiene un elemento que no es {{nombre: [config]}}")
+                    continue
+                for name, configs in named.items():
+                    self._check_resource(where, resource_type, name, configs)
+
+    def _check_resource(self, where: str, resource_type: str, name: str, configs: Any) -> None:
+        key = f"{resource_type}.{name}"
+        where = f"{where} {key}"
+        self.report.resources += 1
+        if not _IDENTIFIER.match(name):
+            self.error(where, "nombre de recurso inválido")
+        if key in self.keys:
+            self.error(where, "recurso duplicado")
+        self.keys.add(key)
+
+        config = configs
+        if isinstance(configs, list):
+            if len(configs) != 1 or not isinstance(configs[0], dict):
+                self.error(where, "se espera una lista con un único objeto de configuración")
+                return
+            config = configs[0]
+        elif not isinstance(configs, dict):
+            self.error(where, "la configuración debe ser un objeto")
+            return
+
+        triggers = config.get("triggers")
+        if triggers is not None:
+            if not isinstance(triggers, dict):
+                self.error(where, "'triggers' debe ser un objeto")
+            else:
+                for trigger, value in triggers.items():
+                    if type(value) not in _SCALAR_TYPES:
+                        self.error(where, f"el trigger '{trigger}' debe ser un valor escalar")
+
+        if "provisioner" in config:
+            self._check_provisioners(where, config["provisioner"])
+        if "depends_on" in config:
+            self._check_depends_on(where, config["depends_on"])
+        if resource_type == "local_file" and not isinstance(config.get("filename"), str):
+            self.error(where, "local_file requiere 'filename' (string)")
+
+    def _check_provisioners(self, where: str, provisioners: Any) -> None:
+        if isinstance(provisioners, dict):
+            provisioners = [provisioners]
+        if not isinstance(provisioners, list):
+            self.error(where, "'provisioner' debe ser una lista de objetos")
+            return
+        for provisioner in provisioners:
+            if not isinstance(provisioner, dict) or len(provisioner) != 1:
+                self.error(where, "cada provisioner debe ser un objeto {tipo: {...}}")
+                continue
+            (kind, body), = provisioner.items()
+            if kind not in PROVISIONERS:
+                self.error(where, f"provisioner desconocido: {kind!r}")
+            elif not isinstance(body, dict):
+                self.error(where, f"el provisioner '{kind}' debe ser un objeto")
+            elif kind == "local-exec" and not isinstance(body.get("command"), str):
+                self.error(where, "local-exec requiere 'command' (string)")
+
+    def _check_depends_on(self, where: str, targets: Any) -> None:
+        if not isinstance(targets, list):
+            self.error(where, "'depends_on' debe ser una lista")
+            return
+        for target in targets:
+            if not isinstance(target, str):
+                self.error(where, f"destino de depends_on inválido: {target!r}")
+                continue
+            parts = target.split(".")
+            if parts[0] == "module" and len(parts) >= 2:
+                continue  # Los módulos externos no forman parte del documento
+            if (parts[0] == "data" and len(parts) == 3) or (parts[0] != "data" and len(parts) == 2):
+                if target not in self.keys:
+                    self.references.append((where, target))
+            else:
+                self.error(where, f"destino de depends_on inválido: {target!r}")
+
+    def check_section(self, key: str, value: Any) -> None:
+        if key not in TOP_LEVEL_KEYS:
+            self.error("documento", f"sección de primer nivel desconocida: {key!r}")
+        elif key == "resource":
+            self.error("documento", "'resource' debe ser una lista de bloques")
+        elif key == "data":
+            blocks = value if isinstance(value, list) else [value]
+            for block in blocks:
+                for data_type, named_list in (block.items() if isinstance(block, dict) else ()):
+                    for named in (named_list if isinstance(named_list, list) else [named_list]):
+                        if isinstance(named, dict):
+                            self.data_keys.update(f"data.{data_type}.{name}" for name in named)
+
+    def finish(self) -> None:
+        for where, target in self.references:
+            if target not in self.keys and target not in self.data_keys:
+                self.error(where, f"depends_on apunta a un recurso inexistente: {target}")
+
+
+class _SyntaxError(Exception):
+    """JSON mal formado o con una estructura de primer nivel inesperada."""
+
+
+class _StreamReader:
+    """Lectura incremental del documento: un buffer de texto que se rellena por bloques."""
+
+    def __init__(self, fp: TextIO) -> None:
+        self.fp = fp
+        self.buffer = ""
+        self.pos = 0
+        self.consumed = 0  # Caracteres descartados antes del buffer (para los mensajes)
+        self.eof = False
+
+    def _fill(self) -> bool:
+        chunk = self.fp.read(_CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos:
+            self.consumed += self.pos
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        self.buffer += chunk
+        return True
+
+    def peek(self) -> str:
+        """Siguiente carácter significativo ("" al final del archivo)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise _SyntaxError(f"se esperaba {char!r} y se encontró {found or 'fin de archivo'!r} "
+                               f"(carácter {self.consumed + self.pos})")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decodifica el siguiente valor JSON, leyendo más datos si quedó cortado."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as exc:
+                if self._fill():
+                    continue
+                raise _SyntaxError(f"{exc.msg} (carácter {self.consumed + exc.pos})") from None
+            if end == len(self.buffer) and self._fill():
+                continue  # Un número podría continuar en el siguiente bloque leído
+            self.pos = end
+            return value
+
+
+def _check_stream(reader: _StreamReader, checker: _Checker) -> None:
+    """Recorre el primer nivel del documento y valida cada bloque de "resource"."""
+    reader.expect("{")
+    index = 0
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise _SyntaxError("las claves del documento deben ser strings")
+            reader.expect(":")
+            if key == "resource" and reader.peek() == "[":
+                reader.pos += 1
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    while True:
+                        checker.check_block(index, reader.value())
+                        index += 1
+                        if reader.peek() != ",":
+                            reader.expect("]")
+                            break
+                        reader.pos += 1
+            else:
+                checker.check_section(key, reader.value())
+            if reader.peek() != ",":
+                reader.expect("}")
+                break
+            reader.pos += 1
+    if reader.peek():
+        raise _SyntaxError("datos adicionales después del documento")
+    checker.finish()
+
+
+def validate_blocks(blocks: Iterable[Dict[str, Any]], max_errors: int = 100) -> ValidationReport:
+    """
+    Valida bloques de recurso ya en memoria (por ejemplo `module.iter_blocks()`).
+
+    Args:
+        blocks: Bloques de la lista "resource".
+        max_errors: Cantidad de errores tras la cual se detiene la validación.
+    """
+    return validate_document({"resource": blocks}, max_errors)
+
+
+def validate_document(document: Any, max_errors: int = 100) -> ValidationReport:
+    """
+    Valida un documento Terraform JSON ya decodificado (por ejemplo `module.export()`).
+
+    La lista "resource" puede ser cualquier iterable de bloques (incluso un generador).
+    """
+    report = ValidationReport()
+    if not isinstance(document, dict):
+        report.errors.append("documento: debe ser un objeto JSON")
+        return report
+    checker = _Checker(report, max_errors)
+    try:
+        for key, value in document.items():
+            if key == "resource" and not isinstance(value, (dict, str)):
+                for index, block in enumerate(value):
+                    checker.check_block(index, block)
+            else:
+                checker.check_section(key, value)
+        checker.finish()
+    except _TooManyErrors:
+        pass
+    return report
+
+
+def validate_stream(fp: TextIO, max_errors: int = 100, path: Optional[str] = None) -> ValidationReport:
+    """
+    Valida un documento leyéndolo en streaming desde un archivo de texto abierto.
+
+    Args:
+        fp: Archivo de texto abierto en modo lectura.
+        max_errors: Cantidad de errores tras la cual se detiene la validación.
+        path: Ruta a informar en el reporte.
+    """
+    report = ValidationReport(path)
+    try:
+        _check_stream(_StreamReader(fp), _Checker(report, max_errors))
+    except _TooManyErrors:
+        pass
+    except _SyntaxError as exc:
+        report.errors.append(f"sintaxis: {exc}")
+    return report
+
+
+def validate_file(path: str, max_errors: int = 100) -> ValidationReport:
+    """Valida el archivo `path` en streaming (memoria acotada por el bloque más grande)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return validate_stream(f, max_errors, path)
+    except (OSError, UnicodeDecodeError) as exc:
+        report = ValidationReport(path)
+        report.errors.append(f"lectura: {exc}")
+        return report
+
+
+def validate_files(paths: Sequence[str], workers: Optional[int] = None,
+                   max_errors: int = 100) -> List[ValidationReport]:
+    """
+    Valida varios archivos, cada uno como documento independiente.
+
+    Args:
+        paths: Archivos a validar.
+        workers: Procesos del pool (por defecto `os.cpu_count()`); con 1, o con un solo
+                 archivo, se valida en el proceso actual.
+        max_errors: Errores máximos por archivo.
+
+    Returns:
+        Un reporte por archivo, en el mismo orden que `paths`.
+    """
+    if workers == 1 or len(paths) <= 1:
+        return [validate_file(path, max_errors) for path in paths]
+    from concurrent.futures import ProcessPoolExecutor  # Diferido: solo con varios archivos
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(validate_file, paths, [max_errors] * len(paths)))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Valida archivos Terraform JSON sin terraform")
+    parser.add_argument("paths", nargs="+", help="archivos .tf.json")
+    parser.add_argument("--workers", type=int, default=None, help="procesos del pool")
+    parser.add_argument("--max-errors", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for report in validate_files(args.paths, args.workers, args.max_errors):
+        if report.ok:
+            print(f"OK    {report.path} ({report.resources} recursos)")
+            continue
+        failed += 1
+        print(f"ERROR {report.path} ({len(report.errors)} errores"
+              f"{', detenido' if report.truncated else ''})")
+        for error in report.errors:
+            print(f"      {error}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,40 +3,30 @@ set -euo pipefail
 
 ROOT_DIR="$(pwd)"
 TF_DIR="$ROOT_DIR/terraform"
+OUT_DIR="$(mktemp -d)"
+trap 'rm -rf "$OUT_DIR"' EXIT
 
-# 0. Inicializa Terraform (una sola vez)
-echo "Inicializando Terraform"
-cd "$TF_DIR"
-terraform init -input=false -backend=false
-cd "$ROOT_DIR"
+# El JSON de cada patrón se valida en proceso (iac_patterns.validator), todos en una
+# sola llamada; terraform solo se ejecuta una vez, sobre la salida del Builder, y
+# únicamente si está instalado (se puede omitir con SKIP_TERRAFORM=1).
 
-# Función para probar un patrón dado
-# $1 = nombre del patrón (Factory, Prototype, Composite, Builder)
-# $2 = comando Python que imprime el JSON a main.tf.json
-function probar_patron() {
+# Función para generar el JSON de un patrón dado
+# $1 = nombre del patrón (Factory, Prototype, Composite)
+# $2 = comando Python que imprime el JSON
+function generar_patron() {
   local nombre=$1
   local python_cmd=$2
-  echo "=== Probando patrón: $nombre ==="
-  # Genera el JSON
-  python - <<EOF > "$TF_DIR/main.tf.json"
+  echo "=== Generando patrón: $nombre ==="
+  python - <<EOF > "$OUT_DIR/${nombre,,}.tf.json"
 $python_cmd
 EOF
-  # Aplica Terraform
-  cd "$TF_DIR"
-  terraform validate
-  terraform plan -out="../${nombre,,}.plan"
-  terraform apply -auto-approve "../${nombre,,}.plan"
-  terraform destroy -auto-approve
-  # Limpieza
-  rm "../${nombre,,}.plan" main.tf.json
-  cd "$ROOT_DIR"
 }
 
 # 1. Factory
-probar_patron "Factory" "import json; from iac_patterns.factory import NullResourceFactory; print(json.dumps(NullResourceFactory.create('factory_bash'), indent=2))"
+generar_patron "Factory" "import json; from iac_patterns.factory import NullResourceFactory; print(json.dumps(NullResourceFactory.create('factory_bash'), indent=2))"
 
 # 2. Prototype
-probar_patron "Prototype" "\
+generar_patron "Prototype" "\
 import json;\
 from iac_patterns.prototype import ResourcePrototype;\
 from iac_patterns.factory import NullResourceFactory;\
@@ -45,7 +35,7 @@ clonado = proto.clone(lambda d: d['resource'][0]['null_resource'][0]['proto_bash
 print(json.dumps(clonado.data, indent=2))"
 
 # 3. Composite
-probar_patron "Composite" "\
+generar_patron "Composite" "\
 import json;\
 from iac_patterns.composite import CompositeModule;\
 from iac_patterns.factory import NullResourceFactory;\
@@ -56,17 +46,28 @@ comp.add(ResourcePrototype(NullResourceFactory.create('comp_proto')).data);\
 print(json.dumps(comp.export(), indent=2))"
 
 # 4. Builder
-echo "Probando el patrón: Builder"
+echo "=== Generando patrón: Builder ==="
 python generate_infra.py
-mv "$TF_DIR/main.tf.json" "$TF_DIR/builder.tf.json"
-mv "$TF_DIR/builder.tf.json" "$TF_DIR/main.tf.json"
-cd "$TF_DIR"
-terraform validate
-terraform plan -out="../builder.plan"
-terraform apply -auto-approve "../builder.plan"
-terraform destroy -auto-approve
-rm "../builder.plan" main.tf.json
-cd "$ROOT_DIR"
+cp "$TF_DIR/main.tf.json" "$OUT_DIR/builder.tf.json"
+
+# Validación estructural de todos los patrones, en paralelo y sin terraform
+echo "=== Validando JSON generado ==="
+python -m iac_patterns.validator "$OUT_DIR"/*.tf.json
+
+# Ciclo completo con terraform solo para la salida del Builder
+if [[ "${SKIP_TERRAFORM:-0}" != "1" ]] && command -v terraform >/dev/null 2>&1; then
+  echo "=== Terraform: Builder ==="
+  cd "$TF_DIR"
+  terraform init -input=false -backend=false
+  terraform validate
+  terraform plan -out="../builder.plan"
+  terraform apply -auto-approve "../builder.plan"
+  terraform destroy -auto-approve
+  rm "../builder.plan" main.tf.json
+  cd "$ROOT_DIR"
+else
+  echo "terraform no disponible u omitido: solo validación en proceso"
+fi
 
 # 5. Singleton (solo Python)
 echo "Probando el patrón: Singleton"
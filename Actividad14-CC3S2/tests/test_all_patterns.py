@@ -3,17 +3,26 @@ Suite completa de tests con pytest para todos los patrones de diseño.
 """
 
 import pytest
+import io
 import tempfile
 import os
 import json
+import threading
 from datetime import datetime
+from functools import partial
 
-from iac_patterns.singleton import ConfigSingleton
-from iac_patterns.factory import NullResourceFactory, TimestampedNullResourceFactory
-from iac_patterns.prototype import ResourcePrototype
+from iac_patterns.singleton import ConfigSingleton, SingletonMeta
+from iac_patterns.factory import NullResourceFactory, TimestampedNullResourceFactory, FixedClock
+from iac_patterns.prototype import ResourcePrototype, json_clone
 from iac_patterns.composite import CompositeModule
+from iac_patterns.streaming import dump_merged, write_encoded
 from iac_patterns.builder import InfrastructureBuilder
+from iac_patterns.engine import desired_resources
+from iac_patterns.validator import validate_file
+from iac_patterns.fleet import VirtualFleet
+from iac_patterns.compact import CompactResource
 from iac_patterns.mutators import convert_null_to_local_file, rename_resource, add_trigger
+from iac_patterns.mutators import index_resource, MutatorPipeline
 from iac_patterns.adapter import AnsibleToTerraformAdapter, CloudFormationToTerraformAdapter
 
 
@@ -56,6 +65,59 @@ class TestSingleton:
         singleton_instance.set(key, value)
         assert singleton_instance.get(key) == value
 
+    def test_singleton_fast_path_skips_lock(self, singleton_instance):
+        """Verifica que obtener la instancia existente no espera al lock de creación"""
+        result = []
+        with SingletonMeta._lock:
+            reader = threading.Thread(target=lambda: result.append(ConfigSingleton()))
+            reader.start()
+            reader.join(timeout=2)
+        assert result == [singleton_instance]
+
+    def test_singleton_snapshots_are_immutable_and_versioned(self, singleton_instance):
+        """Verifica que cada escritura publica una versión nueva sin tocar las anteriores"""
+        before = singleton_instance.snapshot()
+        singleton_instance.set("region", "local")
+        singleton_instance.update({"port": 8080, "debug": True})
+        after = singleton_instance.snapshot()
+
+        assert after.version == before.version + 2 == singleton_instance.version
+        assert "region" not in before.settings and after.get("port") == 8080
+        with pytest.raises(TypeError):
+            after.settings["port"] = 1
+        with pytest.raises(TypeError):
+            singleton_instance.settings["port"] = 1
+        singleton_instance.reset()
+        assert singleton_instance.version == after.version + 1 and after.get("debug") is True
+
+    def test_singleton_concurrent_readers_see_consistent_snapshots(self, singleton_instance):
+        """Verifica que los lectores recorren snapshots coherentes mientras otro hilo escribe"""
+        errors = []
+
+        def writer():
+            for i in range(2000):
+                singleton_instance.update({"a": i, "b": i})
+
+        def reader():
+            try:
+                last = -1
+                for _ in range(2000):
+                    snapshot = ConfigSingleton().snapshot()
+                    assert snapshot.version >= last
+                    assert snapshot.get("a") == snapshot.get("b")
+                    assert len(list(snapshot.settings.items())) in (0, 2)
+                    last = snapshot.version
+            except AssertionError as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert singleton_instance.get("a") == 1999
+
 
 # ==================== FACTORY TESTS ====================
 
@@ -115,6 +177,83 @@ class TestFactory:
 
         assert len(triggers["timestamp"]) == expected_length
 
+    def test_factory_create_many_matches_create(self, sample_triggers):
+        """Verifica que create_many produce la misma estructura que create"""
+        import uuid
+        batch = NullResourceFactory.create_many(["a", "b", "c"], sample_triggers)
+        single = NullResourceFactory.create("a", dict(sample_triggers))
+
+        triggers = [r["resource"][0]["null_resource"][0][n][0]["triggers"]
+                    for r, n in zip(batch, "abc")]
+        assert list(triggers[0]) == list(single["resource"][0]["null_resource"][0]["a"][0]["triggers"])
+        assert len({t["factory_uuid"] for t in triggers}) == 3
+        assert all(uuid.UUID(t["factory_uuid"]).version == 4 for t in triggers)
+        assert len({t["timestamp"] for t in triggers}) == 1
+        assert "factory_uuid" not in sample_triggers, "create_many no debe modificar los triggers"
+
+    def test_factory_deterministic_ids(self):
+        """Verifica identificadores estables y reloj inyectable en modo determinista"""
+        clock = FixedClock(datetime(2024, 1, 2, 3, 4, 5))
+        a = NullResourceFactory.create("app", {"x": 1, "y": 2}, deterministic=True, clock=clock)
+        b = NullResourceFactory.create("app", {"y": 2, "x": 1}, deterministic=True, clock=clock)
+        c = NullResourceFactory.create("app", {"x": 9, "y": 2}, deterministic=True, clock=clock)
+        batch = NullResourceFactory.create_many(["app"], {"x": 1, "y": 2}, deterministic=True, clock=clock)
+
+        def triggers(resource):
+            return resource["resource"][0]["null_resource"][0]["app"][0]["triggers"]
+
+        assert triggers(a)["factory_uuid"] == triggers(b)["factory_uuid"] == triggers(batch[0])["factory_uuid"]
+        assert triggers(a)["factory_uuid"] != triggers(c)["factory_uuid"]
+        assert triggers(a)["timestamp"] == "2024-01-02T03:04:05"
+
+        stamped = TimestampedNullResourceFactory.create("app", deterministic=True)
+        assert triggers(stamped)["timestamp"] == "1970-01-01 00:00:00"
+
+    def test_factory_create_many_per_resource_triggers(self):
+        """Verifica triggers por recurso y validación de longitud"""
+        batch = TimestampedNullResourceFactory.create_many(
+            ["x", "y"], [{"i": 0}, {"i": 1, "factory_uuid": "fijo"}], timestamp_format="%Y"
+        )
+        t0 = batch[0]["resource"][0]["null_resource"][0]["x"][0]["triggers"]
+        t1 = batch[1]["resource"][0]["null_resource"][0]["y"][0]["triggers"]
+
+        assert (t0["i"], t1["i"], t1["factory_uuid"]) == (0, 1, "fijo")
+        assert len(t0["timestamp"]) == 4
+
+        with pytest.raises(ValueError):
+            NullResourceFactory.create_many(["x", "y"], [{}])
+
+    def test_factory_gc_pause_overlapping_batches(self):
+        """Verifica que un lote que termina no re-habilita el GC mientras otro sigue en curso"""
+        import gc
+        from iac_patterns.factory import _gc_paused
+        started, release, states = threading.Event(), threading.Event(), []
+
+        def other_batch():
+            with _gc_paused():
+                started.set()
+                release.wait(timeout=5)
+                states.append(gc.isenabled())
+
+        assert gc.isenabled()
+        thread = threading.Thread(target=other_batch)
+        with _gc_paused():
+            thread.start()
+            started.wait(timeout=5)
+        states.append(gc.isenabled())  # El otro lote sigue en curso
+        release.set()
+        thread.join()
+        assert states == [False, False] and gc.isenabled()
+
+        gc.disable()
+        try:
+            with _gc_paused():
+                with _gc_paused():
+                    pass
+            assert not gc.isenabled(), "Un GC deshabilitado por el llamador debe seguir así"
+        finally:
+            gc.enable()
+
 
 # ==================== PROTOTYPE TESTS ====================
 
@@ -164,6 +303,97 @@ class TestPrototype:
         assert "local_file" in clone.data["resource"][0]
         assert "null_resource" not in clone.data["resource"][0]
 
+    def test_json_clone_independent_copy(self, base_resource):
+        """Verifica que json_clone produce una copia profunda equivalente"""
+        clone = json_clone(base_resource)
+
+        assert clone == base_resource
+        triggers = clone["resource"][0]["null_resource"][0]["test_resource"][0]["triggers"]
+        triggers["extra"] = 1
+        assert "extra" not in base_resource["resource"][0]["null_resource"][0]["test_resource"][0]["triggers"]
+
+    def test_json_clone_fallback(self):
+        """Verifica el fallback para tipos no JSON y el modo estricto"""
+        data = {"items": [{"pair": (1, [2])}]}
+        clone = json_clone(data)
+        assert clone == data
+        assert clone["items"][0]["pair"][1] is not data["items"][0]["pair"][1]
+
+        with pytest.raises(TypeError):
+            json_clone(data, fallback=None)
+
+    @pytest.mark.parametrize("mutator", [
+        lambda d: add_trigger(d, "region", "us-east-1"),
+        lambda d: rename_resource(d, "test_resource", "renamed"),
+        lambda d: convert_null_to_local_file(d, "out.txt", "hola"),
+        lambda d: d["resource"].append({"local_file": [{"extra": [{"content": "x"}]}]}),
+    ])
+    def test_prototype_delta_clone_matches_full_clone(self, base_resource, mutator):
+        """Verifica que el clon delta equivale al clon completo y no altera el original"""
+        proto = ResourcePrototype(base_resource)
+        original = json_clone(base_resource)
+
+        full = proto.clone(mutator)
+        delta = proto.clone(mutator, delta=True)
+
+        assert json.dumps(delta.data) == json.dumps(full.data)
+        assert base_resource == original
+
+    def test_prototype_delta_clone_data_independent(self, prototype_instance):
+        """Verifica que data de un clon delta es un dict estable e independiente"""
+        clone = prototype_instance.clone(lambda d: add_trigger(d, "k", "v"), delta=True)
+
+        data = clone.data
+        assert clone.data is data
+        data["resource"][0]["null_resource"][0]["test_resource"][0]["triggers"]["x"] = 1
+        base_triggers = prototype_instance.data["resource"][0]["null_resource"][0]["test_resource"][0]["triggers"]
+        assert "x" not in base_triggers and "k" not in base_triggers
+
+    def test_prototype_delta_clone_stores_only_changes(self, prototype_instance):
+        """Verifica que un clon sin mutaciones no guarda rutas propias"""
+        clone = prototype_instance.clone(lambda d: d["resource"][0]["null_resource"], delta=True)
+        root = clone.resource._root
+
+        assert root._changed is None and root._added is None and root._removed is None
+        assert root._base is prototype_instance.data
+        assert clone.resource.count_resources() == 1
+
+    @pytest.mark.parametrize("steps", [
+        [(rename_resource, "test_resource", "web"), (add_trigger, "region", "us"), partial(index_resource, idx=2)],
+        [(add_trigger, "a", 1), (convert_null_to_local_file, "x.txt"), (add_trigger, "b", 2),
+         (rename_resource, "test_resource_file", "f")],
+        [(rename_resource, "otro", "nada"), lambda d: d.update({"extra": True}), (add_trigger, "k", "v")],
+    ])
+    def test_mutator_pipeline_matches_sequential(self, base_resource, steps):
+        """Verifica que el pipeline fusionado equivale a aplicar los mutadores en secuencia"""
+        pipeline = MutatorPipeline(*steps)
+        expected = json_clone(base_resource)
+        pipeline.apply_sequential(expected)
+
+        fused = ResourcePrototype(base_resource).clone(pipeline, copier=json_clone).data
+        delta = ResourcePrototype(base_resource).clone(pipeline, delta=True).data
+        assert json.dumps(fused) == json.dumps(expected)
+        assert json.dumps(delta) == json.dumps(expected)
+
+    def test_mutator_pipeline_batch_and_fallback(self, base_resource):
+        """Verifica la aplicación en lote y el camino secuencial para formas no estándar"""
+        pipeline = MutatorPipeline((add_trigger, "region", "us"), (rename_resource, "test_resource", "web"))
+        batch = pipeline.apply_many(json_clone(base_resource) for _ in range(3))
+        assert all(list(r["resource"][0]["null_resource"][0]) == ["web"] for r in batch)
+
+        # Dos bloques: no se puede ubicar un único recurso, se aplica en secuencia
+        two_blocks = json_clone(base_resource)
+        two_blocks["resource"].append(json_clone(base_resource["resource"][0]))
+        pipeline(two_blocks)
+        assert all(list(block["null_resource"][0]) == ["web"] for block in two_blocks["resource"])
+
+    def test_prototype_clone_with_json_copier(self, prototype_instance):
+        """Verifica clone() con el copiador especializado"""
+        clone = prototype_instance.clone(lambda d: d.update({"x": 1}), copier=json_clone)
+
+        assert clone.data["x"] == 1
+        assert "x" not in prototype_instance.data
+
 
 # ==================== COMPOSITE TESTS ====================
 
@@ -215,6 +445,247 @@ class TestComposite:
         exported = composite_module.export()
         assert len(exported["resource"]) == 0
 
+    def test_composite_incremental_count_and_cache(self):
+        """Verifica que el conteo y la cache se actualizan al agregar en submódulos"""
+        root = CompositeModule(name="root")
+        sub = CompositeModule(name="sub")
+        leaf = CompositeModule(name="leaf")
+        root.add_submodule(sub)
+        sub.add_submodule(leaf)
+
+        first = root.export()
+        assert root._export_cache is not None, "La exportación sin cambios debe venir de cache"
+
+        leaf.add(NullResourceFactory.create("deep"))
+        sub.add(NullResourceFactory.create("mid"))
+
+        assert (root.count_resources(), sub.count_resources(), leaf.count_resources()) == (2, 2, 1)
+        exported = root.export()
+        assert first == {"resource": []}
+        assert [list(b["null_resource"][0])[0] for b in exported["resource"]] == ["deep", "mid"]
+        assert "resources=2" in repr(root)
+
+        # Modificar la lista devuelta no corrompe las exportaciones siguientes
+        exported["resource"].append({"null_resource": [{"intruso": [{}]}]})
+        again = root.export()
+        assert len(again["resource"]) == 2 and again["resource"][0] is exported["resource"][0]
+
+    def test_composite_iter_resources_paths(self):
+        """Verifica que iter_resources produce cada bloque una vez con su ruta"""
+        root = CompositeModule(name="root")
+        root.add(NullResourceFactory.create("top"))
+        sub = CompositeModule(name="sub")
+        sub.add(NullResourceFactory.create("inner"))
+        root.add_submodule(sub)
+        root.add(NullResourceFactory.create("last"))
+
+        entries = [(path.as_tuple(), list(block["null_resource"][0])[0])
+                   for path, block in root.iter_resources()]
+
+        assert entries == [
+            (("root",), "top"),
+            (("root", "sub"), "inner"),
+            (("root",), "last"),
+        ]
+        assert str(next(iter(sub.iter_resources()))[0]) == "sub"
+
+    def test_composite_deeper_than_recursion_limit(self):
+        """Verifica export y conteo en jerarquías más profundas que el límite de recursión"""
+        import sys
+        depth = sys.getrecursionlimit() * 3
+
+        module = CompositeModule(name="level_0")
+        module.add({"resource": [{"null_resource": [{"r0": [{}]}]}]})
+        for level in range(1, depth):
+            parent = CompositeModule(name=f"level_{level}")
+            parent.add_submodule(module)
+            module = parent
+
+        assert module.count_resources() == 1
+        assert len(module.export()["resource"]) == 1
+        path, _ = next(module.iter_resources())
+        assert len(path) == depth
+
+    def test_virtual_fleet_matches_prototype_clones(self, base_resource):
+        """Verifica que la flota virtual produce los mismos bloques que clonar y mutar"""
+        fleet = VirtualFleet(base_resource, 3, columns={"index": [0, 1, 2]})
+        proto = ResourcePrototype(base_resource)
+
+        expected = []
+        for i in range(3):
+            clone = proto.clone(lambda d, i=i: (rename_resource(d, "test_resource", f"test_resource_{i}"),
+                                                add_trigger(d, "index", i)))
+            expected.extend(clone.data["resource"])
+
+        module = CompositeModule(name="virtual")
+        module.add(fleet)
+        assert module.count_resources() == 3
+        assert json.dumps(module.export()["resource"]) == json.dumps(expected)
+
+    def test_virtual_fleet_is_compact(self, base_resource):
+        """Verifica que describir una flota de un millón de recursos ocupa poca memoria"""
+        import tracemalloc
+        tracemalloc.start()
+        fleet = VirtualFleet(base_resource, 1_000_000, columns={"index": range(1_000_000)})
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert retained < 1_000_000
+        assert fleet.count_resources() == 1_000_000
+        assert list(fleet.block_at(999_999)["null_resource"][0]) == ["test_resource_999999"]
+
+    def test_virtual_fleet_rejects_bad_columns(self, base_resource):
+        """Verifica la validación de la plantilla y de las columnas"""
+        with pytest.raises(ValueError):
+            VirtualFleet(base_resource, 2, columns={"index": [0]})
+        with pytest.raises(ValueError):
+            VirtualFleet({"resource": []}, 2)
+
+    def test_composite_invalidate_after_inplace_change(self, composite_module):
+        """Verifica invalidate() tras modificar in-place un recurso ya agregado"""
+        resource = NullResourceFactory.create("a")
+        composite_module.add(resource)
+        composite_module.export()
+
+        resource["resource"].extend(NullResourceFactory.create("b")["resource"])
+        composite_module.invalidate()
+
+        assert composite_module.count_resources() == 2
+        assert len(composite_module.export()["resource"]) == 2
+
+    def test_composite_invalidate_reindexes_only_its_resources(self):
+        """Verifica que invalidate() re-indexa los recursos del módulo y filtra triggers obsoletos"""
+        web = CompositeModule(name="web")
+        resource = NullResourceFactory.create("a", {"tier": "web"})
+        web.add(resource)
+        root = CompositeModule(name="root")
+        root.add(NullResourceFactory.create("solo", {"tier": "web"}))
+        root.add_submodule(web)
+        assert len(root.find_by_trigger("tier", "web")) == 2
+
+        resource["resource"].extend(NullResourceFactory.create("b", {"tier": "web"})["resource"])
+        resource["resource"][0]["null_resource"][0]["a"][0]["triggers"]["tier"] = "api"
+        web.invalidate()
+
+        assert root._index.by_owner[web] == {"null_resource.a", "null_resource.b"}
+        assert root.find("null_resource", "b") is resource["resource"][1]
+        assert root.find("null_resource", "solo") is not None
+        names = [list(block["null_resource"][0])[0] for block in root.find_by_trigger("tier", "web")]
+        assert names == ["solo", "b"]
+        assert root.find_by_trigger("tier", "api") == [resource["resource"][0]]
+
+    def test_composite_index_lookup_and_tags(self):
+        """Verifica búsquedas por (tipo, nombre) y por trigger, incluidos submódulos"""
+        web = CompositeModule(name="web")
+        for resource in NullResourceFactory.create_many(["w1", "w2"], {"group": "web_tier"}):
+            web.add(resource)
+        root = CompositeModule(name="root")
+        root.add(NullResourceFactory.create("solo", {"group": "otro"}))
+        root.add_submodule(web)  # Submódulo ya poblado: su índice se une al del árbol
+        web.add(NullResourceFactory.create("w3", {"group": "web_tier"}, compact=True))
+
+        assert root.find("null_resource", "w1") is web.export()["resource"][0]
+        assert root.find("null_resource", "nada") is None
+        names = [list(block["null_resource"][0])[0] for block in root.find_by_trigger("group", "web_tier")]
+        assert names == ["w1", "w2", "w3"]
+        # Las consultas sobre un submódulo se limitan a su subárbol
+        assert web.find("null_resource", "solo") is None
+        assert web.find_by_trigger("group", "otro") == []
+        assert root.find_by_trigger("group", ["no", "hashable"]) == []
+
+    def test_composite_index_rejects_duplicates(self):
+        """Verifica que los nombres duplicados se rechazan al insertar"""
+        root = CompositeModule(name="root")
+        root.add(NullResourceFactory.create("app"))
+        with pytest.raises(ValueError, match="null_resource.app"):
+            root.add(NullResourceFactory.create("app"))
+
+        sub = CompositeModule(name="sub")
+        sub.add(NullResourceFactory.create("app"))
+        with pytest.raises(ValueError, match="duplicado"):
+            root.add_submodule(sub)
+        assert root.count_resources() == 1 and root._children[-1] is not sub
+
+        empty = CompositeModule(name="empty")
+        root.add_submodule(empty)
+        with pytest.raises(ValueError, match="ya forma parte"):
+            root.add_submodule(empty)
+
+    def test_composite_index_names_lazy_leaves(self, base_resource):
+        """Verifica que las flotas virtuales se indexan por nombre sin materializarse"""
+        fleet = VirtualFleet(base_resource, 1000, columns={"index": range(1000)})
+        built = []
+        block_at = fleet.block_at
+        fleet.block_at = lambda index: built.append(index) or block_at(index)
+        module = CompositeModule(name="root")
+        module.add(fleet)
+        assert module.count_resources() == 1000 and built == []
+
+        assert module.find("null_resource", "test_resource_7") == block_at(7)
+        assert built == [7]
+        assert module.find_by_trigger("index", 42) == [block_at(42)]
+        with pytest.raises(ValueError, match="null_resource.test_resource_0"):
+            module.add(VirtualFleet(base_resource, 5))
+        with pytest.raises(ValueError, match="perezosa"):
+            module.mutate("null_resource", "test_resource_1", lambda d: None)
+        assert module.count_resources() == 1000
+
+    def test_composite_lazy_leaves_keep_bounded_footprint(self, base_resource):
+        """Verifica que una flota virtual grande no agrega sus claves al índice del árbol"""
+        import tracemalloc
+        fleet = VirtualFleet(base_resource, 1_000_000, columns={"index": range(1_000_000)})
+        tracemalloc.start()
+        root = CompositeModule(name="root")
+        root.add(fleet)
+        root.add(NullResourceFactory.create("solo"))
+        sub = CompositeModule(name="sub")
+        sub.add(VirtualFleet(base_resource, 10, name_format="{name}_extra_{index}"))
+        root.add_submodule(sub)
+        found = root.find("null_resource", "test_resource_999999")
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert retained < 1_000_000
+        assert found == fleet.block_at(999_999)
+        assert root.find("null_resource", "test_resource_1000000") is None
+        assert root.find("null_resource", "test_resource_extra_3") is not None
+        with pytest.raises(ValueError, match="null_resource.test_resource_5"):
+            root.add(NullResourceFactory.create("test_resource_5"))
+        other = CompositeModule(name="other")
+        other.add(VirtualFleet(base_resource, 2, names=["x", "test_resource_extra_9"]))
+        with pytest.raises(ValueError, match="null_resource.test_resource_extra_9"):
+            root.add_submodule(other)
+        assert root.count_resources() == 1_000_011
+
+
+    def test_composite_mutate_updates_index_and_caches(self):
+        """Verifica que mutate reindexa el recurso e invalida export, hash y fragmentos"""
+        web = CompositeModule(name="web")
+        for resource in NullResourceFactory.create_many(["w1", "w2"], {"group": "web"}):
+            web.add(resource)
+        web.add(NullResourceFactory.create("c1", {"group": "web"}, compact=True))
+        root = CompositeModule(name="root")
+        root.add(NullResourceFactory.create("solo"))
+        root.add_submodule(web)
+        before_hash = root.subtree_hash()
+        assert len(root.find_by_trigger("group", "web")) == 3
+        list(root.iter_encoded())
+
+        root.mutate("null_resource", "w1", partial(add_trigger, trigger_key="group", trigger_value="api"))
+        root.mutate("null_resource", "c1", partial(rename_resource, old_name="c1", new_name="c9"))
+        assert root.subtree_hash() != before_hash
+        assert len(root.find_by_trigger("group", "web")) == 2
+        assert root.find("null_resource", "c1") is None and root.find("null_resource", "c9")
+        encoded = io.StringIO()
+        write_encoded(root.iter_encoded(), encoded)
+        assert encoded.getvalue() == json.dumps(root.export(), indent=4)
+
+        with pytest.raises(ValueError, match="duplicado"):
+            root.mutate("null_resource", "w2", partial(rename_resource, old_name="w2", new_name="solo"))
+        assert root.find("null_resource", "w2") is not None
+        with pytest.raises(KeyError):
+            web.mutate("null_resource", "solo", lambda d: None)
+
 
 # ==================== BUILDER TESTS ====================
 
@@ -240,6 +711,49 @@ class TestBuilder:
 
             assert len(data["resource"]) == 10
 
+    def test_builder_reproducible_export(self):
+        """Verifica que dos builds deterministas generan los mismos bytes"""
+        contents = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for run in range(2):
+                builder = InfrastructureBuilder(env_name="repro", deterministic=True)
+                (builder
+                    .build_null_fleet(count=2)
+                    .build_group("g", ["a", "b"], {"tier": "x"})
+                    .add_custom_resource("final", {"k": "v"}))
+                path = os.path.join(tmpdir, f"run{run}.tf.json")
+                builder.export(path)
+                with open(path) as f:
+                    contents.append(f.read())
+
+        assert contents[0] == contents[1]
+
+    def test_builder_delta_fleet(self, builder_instance):
+        """Verifica que la flota delta exporta los mismos recursos que la flota completa"""
+        builder_instance.build_null_fleet(count=4, delta=True)
+
+        exported = builder_instance._module.export()
+        assert builder_instance._module.count_resources() == 4
+        for idx, block in enumerate(exported["resource"]):
+            null_res = block["null_resource"][0]
+            assert list(null_res) == [f"placeholder_{idx}"]
+            assert null_res[f"placeholder_{idx}"][0]["triggers"]["index"] == idx
+
+    def test_builder_virtual_fleet(self, builder_instance):
+        """Verifica que la flota virtual exporta igual que la flota completa"""
+        builder_instance.build_null_fleet(count=3, virtual=True)
+        builder_instance.add_custom_resource("final", {"k": "v"})
+
+        assert builder_instance._module.count_resources() == 4
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, "test.tf.json")
+            builder_instance.export(output_path, stream=True)
+            with open(output_path) as f:
+                data = json.load(f)
+
+        names = [list(block["null_resource"][0])[0] for block in data["resource"]]
+        assert names == ["placeholder_0", "placeholder_1", "placeholder_2", "final"]
+
     def test_builder_build_group(self, builder_instance):
         """Verifica construcción de grupos de recursos"""
         builder_instance.build_group(
@@ -281,6 +795,150 @@ class TestBuilder:
 
             assert len(data["resource"]) == 4
 
+    @pytest.mark.parametrize("populate", [True, False])
+    def test_builder_stream_export_identical(self, builder_instance, populate):
+        """Verifica que la exportación en streaming es idéntica byte a byte"""
+        if populate:
+            (builder_instance
+                .build_null_fleet(count=3)
+                .build_group("group1", ["a", "b"], {"tier": "x"})
+                .add_custom_resource("final", {"nota": "ñandú \"citado\"\nlínea"}))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            regular_path = os.path.join(tmpdir, "regular.tf.json")
+            stream_path = os.path.join(tmpdir, "stream.tf.json")
+            builder_instance.export(regular_path)
+            builder_instance.export(stream_path, stream=True)
+
+            with open(regular_path) as f1, open(stream_path) as f2:
+                assert f1.read() == f2.read()
+
+    def test_builder_fragment_cache_reexport(self, tmp_path):
+        """Verifica que la cache de fragmentos re-exporta solo los recursos modificados"""
+        builder = InfrastructureBuilder("cache", deterministic=True, fragment_cache=True)
+        (builder
+            .build_null_fleet(count=3)
+            .build_group("web", ["w1", "w2"], {"tier": "x"})
+            .add_custom_resource("final", {"k": "v"}))
+        builder.export(str(tmp_path / "a.tf.json"))
+        assert json.loads((tmp_path / "a.tf.json").read_text()) == builder._module.export()
+
+        web = builder._module.submodules()[0]
+        cached = dict(web._fragments)
+        builder.mutate_resource("null_resource", "w2", partial(add_trigger, trigger_key="tier", trigger_value="y"))
+        assert len(web._fragments) == 1 and list(web._fragments.values())[0] in cached.values()
+
+        builder.export(str(tmp_path / "b.tf.json"))
+        builder.fragment_cache = False
+        builder.export(str(tmp_path / "c.tf.json"))
+        assert (tmp_path / "b.tf.json").read_text() == (tmp_path / "c.tf.json").read_text()
+        assert builder._module.find("null_resource", "w2")["null_resource"][0]["w2"][0]["triggers"]["tier"] == "y"
+
+    @pytest.mark.parametrize("options", [{"workers": 2}, {"memory_budget": 1 << 20}])
+    def test_builder_rejects_incompatible_export_modes(self, tmp_path, options):
+        """Verifica que las combinaciones de modos que se ignorarían se rechazan"""
+        with pytest.raises(ValueError, match="fragment_cache"):
+            InfrastructureBuilder("x", fragment_cache=True, **options)
+        builder = InfrastructureBuilder("x", deterministic=True, **options).build_null_fleet(count=2)
+        with pytest.raises(ValueError, match="stream y merged"):
+            builder.export(str(tmp_path / "main.tf.json"), stream=True, merged=True)
+        assert not (tmp_path / "main.tf.json").exists()
+
+    def test_builder_merged_export_equivalent(self, tmp_path):
+        """Verifica que el formato compacto agrupa por tipo y describe los mismos recursos"""
+        builder = InfrastructureBuilder("merged", deterministic=True, compact=True)
+        (builder
+            .build_null_fleet(count=3)
+            .build_group("web", ["w1", "w2"], {"tier": "x"})
+            .add_custom_resource("final", {"nota": "ñandú \"citado\""}))
+        builder._module.add({"resource": [
+            {"local_file": [{"notas": [{"filename": "notas.txt", "content": "x"}]}]}]})
+        builder.add_custom_resource("ultimo", {"k": "v"})
+        builder.export(str(tmp_path / "regular.tf.json"))
+        builder.export(str(tmp_path / "merged.tf.json"), merged=True)
+
+        regular = (tmp_path / "regular.tf.json").read_text()
+        merged = (tmp_path / "merged.tf.json").read_text()
+        assert len(merged) < len(regular) / 2 and "\n" not in merged
+        blocks = json.loads(merged)["resource"]
+        assert [list(block) for block in blocks] == [["null_resource"], ["local_file"]]
+        assert list(blocks[0]["null_resource"][0])[-2:] == ["final", "ultimo"]
+        assert validate_file(str(tmp_path / "merged.tf.json")).resources == 8
+        assert desired_resources(str(tmp_path / "merged.tf.json")) == desired_resources(
+            str(tmp_path / "regular.tf.json"))
+
+        empty = tmp_path / "empty.tf.json"
+        InfrastructureBuilder("vacio").export(str(empty), merged=True)
+        assert json.loads(empty.read_text()) == {"resource": []}
+
+    def test_dump_merged_rejects_duplicate_names(self):
+        """Verifica que el formato compacto no colapsa dos recursos con el mismo nombre"""
+        block = {"null_resource": [{"a": [{}]}]}
+        with pytest.raises(ValueError, match="duplicado: null_resource.a"):
+            dump_merged([block, {"local_file": [{"a": [{}]}]}, block], io.StringIO())
+        # El mismo nombre en tipos distintos es válido
+        output = io.StringIO()
+        dump_merged([block, {"local_file": [{"a": [{}]}]}], output)
+        assert len(desired_resources(json.loads(output.getvalue()))) == 2
+
+    @pytest.mark.parametrize("deterministic", [True, False])
+    def test_builder_parallel_export_identical(self, deterministic):
+        """Verifica que el modo paralelo genera los mismos bytes que la exportación secuencial"""
+        def populate(builder):
+            return (builder
+                .build_null_fleet(count=7)
+                .build_group("web", ["w1", "w2", "w3"], {"tier": "frontend"})
+                .add_custom_resource("final", {"k": "v"})
+                .build_group("empty", []))
+
+        parallel = populate(InfrastructureBuilder("par", deterministic, workers=2))
+        assert parallel._module.count_resources() == 11
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            parallel_path = os.path.join(tmpdir, "parallel.tf.json")
+            parallel.export(parallel_path)
+            with open(parallel_path) as f:
+                content = f.read()
+
+        # Las recetas son puras: export() en el proceso principal da los mismos bytes
+        assert content == json.dumps(parallel._module.export(), indent=4)
+        names = [list(block["null_resource"][0])[0] for block in json.loads(content)["resource"]]
+        assert names == [f"placeholder_{i}" for i in range(7)] + ["w1", "w2", "w3", "final"]
+        if deterministic:
+            sequential = populate(InfrastructureBuilder("par", deterministic=True))
+            assert content == json.dumps(sequential._module.export(), indent=4)
+
+    def test_builder_parallel_keeps_compact_model(self, tmp_path):
+        """Verifica que las recetas paralelas construyen CompactResource con compact/shared_triggers"""
+        def populate(builder):
+            return builder.build_null_fleet(count=3).build_group("web", ["w1", "w2"], {"tier": 1})
+
+        parallel = populate(InfrastructureBuilder("par", deterministic=True, workers=2,
+                                                  compact=True, shared_triggers=True))
+        group = parallel._module.submodules()[0]._children[0]
+        assert all(isinstance(resource, CompactResource) for resource in group.build())
+        assert parallel._module.find("null_resource", "placeholder_2") is not None
+
+        parallel.export(str(tmp_path / "par" / "main.tf.json"))
+        populate(InfrastructureBuilder("seq", deterministic=True)).export(str(tmp_path / "seq" / "main.tf.json"))
+        assert (tmp_path / "par" / "main.tf.json").read_text() == (tmp_path / "seq" / "main.tf.json").read_text()
+
+    def test_builder_lazy_leaves_reject_duplicates(self):
+        """Verifica que recetas paralelas y flotas virtuales se indexan como el modo secuencial"""
+        parallel = InfrastructureBuilder("par", deterministic=True, workers=2)
+        parallel.build_group("web", ["a", "b"]).build_null_fleet(count=3)
+        with pytest.raises(ValueError, match="null_resource.a"):
+            parallel.build_group("api", ["a"])
+        assert parallel._module.count_resources() == 5
+        assert parallel._module.find("null_resource", "a")["null_resource"][0]["a"][0]["triggers"]["group"] == "web"
+        assert parallel._module.find("null_resource", "placeholder_2") is not None
+
+        virtual = InfrastructureBuilder("virt", deterministic=True)
+        virtual.build_null_fleet(count=3, virtual=True)
+        with pytest.raises(ValueError, match="null_resource.placeholder_0"):
+            virtual.build_null_fleet(count=3, virtual=True)
+        assert virtual._module.count_resources() == 3
+
 
 # ==================== ADAPTER TESTS ====================
 
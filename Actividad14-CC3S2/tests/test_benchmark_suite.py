@@ -0,0 +1,45 @@
+"""
+Tests de la suite de benchmarks (benchmarks/suite.py) a tamaños mínimos.
+"""
+
+import json
+
+from benchmarks import suite
+
+
+def test_suite_runs_all_cases():
+    """Verifica que todos los casos se ejecutan y reportan tiempo y memoria"""
+    results = suite.run_suite(list(suite.CASES), sizes=[20], depths=[1, 3], repeat=1)
+    assert suite.case_key("composite.export", 20, 3) in results
+    assert len(results) == len(suite.CASES) + 1
+    for result in results.values():
+        assert result["seconds"] >= 0 and result["peak_bytes"] > 0
+
+
+def test_compare_detects_regressions():
+    """Verifica el umbral de tiempo, el de memoria y el piso de ruido"""
+    baseline = {"a": {"seconds": 1.0, "peak_bytes": 100}, "b": {"seconds": 0.001, "peak_bytes": 100}}
+    results = {
+        "a": {"seconds": 1.5, "peak_bytes": 200},
+        "b": {"seconds": 0.005, "peak_bytes": 100},   # 5x, pero por debajo del piso de ruido
+        "nuevo": {"seconds": 9.0, "peak_bytes": 9},   # sin baseline: se ignora
+    }
+    regressions = suite.compare(baseline, results, threshold=0.25, memory_threshold=0.5)
+    assert len(regressions) == 2 and all(line.startswith("a:") for line in regressions)
+    assert suite.compare(baseline, results, threshold=1.0, memory_threshold=1.0) == []
+
+
+def test_main_saves_and_compares_baseline(tmp_path, capsys):
+    """Verifica el ciclo --save / comparación y el código de salida"""
+    path = tmp_path / "baseline.json"
+    argv = ["--cases", "factory.create_many", "--sizes", "10", "--repeat", "1", "--baseline", str(path)]
+    assert suite.main(argv + ["--save"]) == 0
+    assert "factory.create_many[n=10,depth=1]" in json.loads(path.read_text())["results"]
+
+    # Un baseline imposible de igualar provoca una regresión de memoria
+    document = json.loads(path.read_text())
+    for result in document["results"].values():
+        result["peak_bytes"] = 1
+    path.write_text(json.dumps(document))
+    assert suite.main(argv) == 1
+    assert "regresión" in capsys.readouterr().out
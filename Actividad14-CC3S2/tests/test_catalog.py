@@ -0,0 +1,102 @@
+"""
+Tests del catálogo SQLite de recursos (iac_patterns.catalog).
+"""
+
+import pytest
+
+from iac_patterns.builder import InfrastructureBuilder
+from iac_patterns.catalog import ResourceCatalog
+from iac_patterns.factory import NullResourceFactory
+
+
+def _builder(env, groups):
+    builder = InfrastructureBuilder(env, deterministic=True)
+    builder.build_null_fleet(count=3)
+    for group, names in groups.items():
+        builder.build_group(group, names, {"tier": len(names), "meta": {"owner": env, "ports": [80, 443]}})
+    return builder
+
+
+def test_load_and_query_across_builds(tmp_path):
+    """Verifica rutas de módulo, triggers aplanados y consultas entre builds"""
+    catalog = ResourceCatalog(str(tmp_path / "catalog.db"), batch_size=2)
+    prod = _builder("prod", {"web": ["w1", "w2"], "db": ["d1"]})
+    dev = _builder("dev", {"web": ["w1"]})
+    catalog.load(prod._module, build_id="prod-1")
+    catalog.load(dev._module, build_id="dev-1")
+
+    assert [(b["build_id"], b["env"], b["resources"]) for b in catalog.builds()] == [
+        ("prod-1", "prod", 6), ("dev-1", "dev", 4)]
+    assert catalog.builds_containing("null_resource", "w1") == ["prod-1", "dev-1"]
+    assert catalog.builds_containing("null_resource", "d1") == ["prod-1"]
+    assert catalog.count_by_module() == {
+        "prod-1": {"prod": 3, "prod/db": 1, "prod/web": 2},
+        "dev-1": {"dev": 3, "dev/web": 1},
+    }
+    assert catalog.find_by_trigger("meta.owner", "dev") == [("dev-1", "dev/web", "null_resource.w1")]
+    assert len(catalog.find_by_trigger("meta.ports.1", 443, build_id="prod-1")) == 3
+
+    triggers = catalog.triggers("prod-1", "null_resource", "d1")
+    assert triggers["tier"] == 1 and triggers["meta.ports.0"] == 80
+    assert list(catalog.resources("dev-1", module="dev/web")) == [("dev/web", "null_resource", "w1")]
+    assert catalog.query("SELECT COUNT(*) FROM resources") == [(10,)]
+    catalog.close()
+
+    # El catálogo persiste entre conexiones y un build_id repetido se reemplaza
+    with ResourceCatalog(str(tmp_path / "catalog.db")) as reopened:
+        reopened.load(_builder("dev", {})._module, build_id="dev-1")
+        assert reopened.builds(env="dev")[0]["resources"] == 3
+        assert reopened.builds_containing("null_resource", "w1") == ["prod-1"]
+        assert reopened.query("SELECT COUNT(*) FROM resources") == [(9,)]
+        reopened.delete_build("prod-1")
+        assert reopened.builds_containing("null_resource", "w1") == []
+
+
+def test_failed_load_leaves_no_partial_build():
+    """Verifica que un error a mitad de la carga no deja un build incompleto"""
+    catalog = ResourceCatalog(batch_size=1)
+
+    def blocks():
+        yield NullResourceFactory.create("a")["resource"][0]
+        yield NullResourceFactory.create("b")["resource"][0]
+        raise RuntimeError("fallo del generador")
+
+    with pytest.raises(RuntimeError):
+        catalog.load_blocks(blocks(), build_id="roto")
+    assert catalog.builds() == []
+    assert catalog.query("SELECT COUNT(*) FROM resources") == [(0,)]
+    assert catalog.query("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' "
+                         "AND name LIKE '%_by_%'") == [(3,)]
+
+
+def test_small_loads_keep_the_indexes(monkeypatch):
+    """Verifica que solo las cargas grandes frente al catálogo reconstruyen los índices"""
+    catalog = ResourceCatalog(batch_size=10)
+    drops = []
+    original = catalog._drop_indexes
+    monkeypatch.setattr(catalog, "_drop_indexes", lambda: (drops.append(1), original()))
+
+    def blocks(prefix, count):
+        return (NullResourceFactory.create(f"{prefix}{i}", {"i": i})["resource"][0] for i in range(count))
+
+    catalog.load_blocks(blocks("a", 200), build_id="grande")
+    catalog.load_blocks(blocks("b", 30), build_id="chico")
+    assert len(drops) == 1
+    catalog.load_blocks(blocks("c", 100), build_id="otro-grande")
+    assert len(drops) == 2
+
+    assert catalog.builds_containing("null_resource", "b7") == ["chico"]
+    assert len(catalog.find_by_trigger("i", 3)) == 3
+    assert catalog.query("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' "
+                         "AND name LIKE '%_by_%'") == [(3,)]
+
+
+def test_builder_export_sink(tmp_path):
+    """Verifica que export(catalog=...) registra el build junto con el archivo"""
+    builder = _builder("stage", {"api": ["a1", "a2"]})
+    builder.export(str(tmp_path / "main.tf.json"), catalog=str(tmp_path / "catalog.db"),
+                   build_id="stage-7")
+
+    with ResourceCatalog(str(tmp_path / "catalog.db")) as catalog:
+        assert catalog.count_by_module("stage-7") == {"stage-7": {"stage": 3, "stage/api": 2}}
+        assert catalog.builds()[0]["env"] == "stage"
@@ -0,0 +1,141 @@
+"""
+Tests del modelo compacto de recursos (iac_patterns.compact).
+"""
+
+import json
+import sys
+import tracemalloc
+
+import pytest
+
+from iac_patterns.builder import InfrastructureBuilder
+from iac_patterns.compact import CompactResource, SharedTriggers, TriggerLayout
+from iac_patterns.composite import CompositeModule
+from iac_patterns.factory import NullResourceFactory, FixedClock
+from iac_patterns.mutators import add_trigger, convert_null_to_local_file, index_resource, rename_resource
+from iac_patterns.prototype import ResourcePrototype, json_clone
+
+
+def _pair(name="app"):
+    """El mismo recurso en forma de diccionario y compacta."""
+    options = {"deterministic": True, "clock": FixedClock()}
+    regular = NullResourceFactory.create(name, {"env": "prod"}, **options)
+    compact = NullResourceFactory.create(name, {"env": "prod"}, compact=True, **options)
+    return regular, compact
+
+
+def test_compact_materializes_to_factory_shape():
+    """Verifica que el recurso compacto se expande a la misma estructura JSON"""
+    regular, compact = _pair()
+    assert isinstance(compact, CompactResource)
+    assert compact.materialize() == regular
+    assert CompactResource.from_resource(regular) == compact
+
+
+def test_compact_from_resource_keeps_attributes_and_provisioners():
+    """Verifica el orden de emisión: triggers, atributos y provisioner"""
+    resource = {"resource": [{"local_file": [{"f": [{
+        "triggers": {"a": 1}, "filename": "x.txt", "provisioner": [{"local-exec": {}}]
+    }]}]}]}
+    compact = CompactResource.from_resource(resource)
+    assert (compact.type, compact.name, compact.attributes) == ("local_file", "f", {"filename": "x.txt"})
+    assert compact.materialize() == resource
+
+    with pytest.raises(ValueError):
+        CompactResource.from_resource({"resource": []})
+
+
+@pytest.mark.parametrize("mutator", [
+    lambda d: rename_resource(d, "app", "web"),
+    lambda d: add_trigger(d, "region", "us-east-1"),
+    lambda d: convert_null_to_local_file(d, "app.txt", "hola"),
+    lambda d: index_resource(d, 7),
+])
+def test_mutators_accept_compact(mutator):
+    """Verifica que los mutadores producen el mismo resultado sobre ambas representaciones"""
+    regular, compact = _pair()
+    regular_clone = ResourcePrototype(regular).clone(mutator, copier=json_clone).data
+    compact_clone = ResourcePrototype(compact).clone(mutator, copier=json_clone).data
+
+    assert isinstance(compact_clone, CompactResource)
+    assert compact_clone.materialize() == regular_clone
+    assert compact.materialize() == regular, "el prototipo no debe modificarse"
+
+
+@pytest.mark.parametrize("options", [{}, {"virtual": True}, {"delta": True}])
+def test_builder_compact_export_identical(tmp_path, options):
+    """Verifica que el builder compacto exporta los mismos bytes"""
+    contents = []
+    for compact in (False, True):
+        builder = InfrastructureBuilder("compact", deterministic=True, compact=compact)
+        (builder
+            .build_null_fleet(count=3, **options)
+            .build_group("web", ["w1", "w2"], {"tier": "frontend"})
+            .add_custom_resource("final", {"k": "v"}))
+        path = tmp_path / f"{compact}.tf.json"
+        builder.export(str(path))
+        contents.append(path.read_text())
+    assert contents[0] == contents[1]
+
+
+def test_compact_leaf_in_composite():
+    """Verifica que CompositeModule cuenta y recorre recursos compactos"""
+    regular, compact = _pair()
+    module = CompositeModule("root")
+    module.add(compact)
+    assert module.count_resources() == 1
+    assert module.export() == regular
+    assert json.loads(json.dumps(module.export())) == regular
+
+
+def test_compact_uses_less_memory():
+    """Verifica que la representación compacta ocupa menos memoria"""
+    names = [f"res_{i}" for i in range(2000)]
+    sizes = []
+    for compact in (False, True):
+        tracemalloc.start()
+        resources = NullResourceFactory.create_many(names, {"tier": "web"}, compact=compact)
+        sizes.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        del resources
+    assert sizes[1] < sizes[0] * 0.7
+
+
+def test_shared_triggers_copy_on_write():
+    """Verifica que los triggers compartidos se leen como un dict y divergen al modificarse"""
+    tags = {"".join("tier"): "".join("web")}
+    first, second = NullResourceFactory.create_many(["a", "b"], tags, deterministic=True, shared=True)
+    expected = NullResourceFactory.create_many(["a", "b"], tags, deterministic=True, compact=True)
+    assert [first, second] == expected
+    assert [r.materialize() for r in (first, second)] == [r.materialize() for r in expected]
+    assert list(first.triggers) == ["tier", "factory_uuid", "timestamp"]
+
+    layout = first.triggers._layout
+    assert second.triggers._layout is layout and layout.common["tier"] is sys.intern("web") and not first.triggers.diverged
+    add_trigger(first, "extra", 1)
+    assert first.triggers.diverged and first.triggers["extra"] == 1
+    assert "extra" not in second.triggers and not second.triggers.diverged
+
+    clone = ResourcePrototype(second).clone(lambda d: index_resource(d, 3)).data
+    assert clone.triggers["index"] == 3 and "index" not in second.triggers
+    with pytest.raises(ValueError):
+        SharedTriggers(TriggerLayout({"a": 1, "b": None}, ["b"]), ())
+
+
+def test_builder_shared_triggers_export_identical_and_smaller(tmp_path):
+    """Verifica que shared_triggers exporta los mismos bytes con menos memoria por grupo"""
+    contents, sizes = [], []
+    for shared in (False, True):
+        tracemalloc.start()
+        builder = InfrastructureBuilder("shared", deterministic=True, compact=True,
+                                        shared_triggers=shared)
+        for g in range(4):
+            builder.build_group(f"g{g}", [f"r{g}_{i}" for i in range(500)], {"tier": f"t{g % 2}"})
+        sizes.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        assert builder._module.find_by_trigger("tier", "t1")[0]["null_resource"][0]["r1_0"]
+        path = tmp_path / f"{shared}.tf.json"
+        builder.export(str(path))
+        contents.append(path.read_text())
+    assert contents[0] == contents[1]
+    assert sizes[1] < sizes[0] * 0.8
@@ -0,0 +1,191 @@
+"""
+Tests del motor local de plan/apply (iac_patterns.engine).
+"""
+
+import json
+import time
+
+import pytest
+
+from iac_patterns.builder import InfrastructureBuilder
+from iac_patterns.engine import LocalEngine, main
+
+
+def _null(name, triggers=None, **config):
+    return {"null_resource": [{name: [{"triggers": triggers or {}, **config}]}]}
+
+
+def _file(name, filename, content):
+    return {"local_file": [{name: [{"filename": filename, "content": content}]}]}
+
+
+def _exec(command):
+    return [{"local-exec": {"command": command}}]
+
+
+def _actions(plan):
+    return {change.address: change.action for change in plan.changes}
+
+
+def test_lifecycle_create_noop_replace_destroy(tmp_path):
+    """Verifica create -> no-op -> replace por triggers -> destroy de recursos eliminados"""
+    engine = LocalEngine(str(tmp_path / "state.json"), working_dir=str(tmp_path))
+    document = {"resource": [_null("a", {"v": 1}), _null("b", {"v": True}),
+                             _file("f", "out/f.txt", "hola")]}
+
+    result = engine.apply(document)
+    assert result.ok and len(result.applied) == 3
+    assert (tmp_path / "out" / "f.txt").read_text() == "hola"
+    state = engine.load_state()
+    assert state["serial"] == 1
+    assert state["resources"]["null_resource.b"]["triggers"] == {"v": "true"}
+
+    assert not engine.plan(document).has_changes
+    document["resource"][0] = _null("a", {"v": 2})
+    document["resource"][2] = _file("f", "out/f.txt", "adios")
+    del document["resource"][1]
+    assert _actions(engine.plan(document)) == {
+        "null_resource.a": "replace", "local_file.f": "replace", "null_resource.b": "destroy"}
+    assert engine.apply(document).ok
+    assert (tmp_path / "out" / "f.txt").read_text() == "adios"
+    assert sorted(engine.load_state()["resources"]) == ["local_file.f", "null_resource.a"]
+
+    assert engine.destroy().ok
+    assert engine.load_state()["resources"] == {}
+    assert not (tmp_path / "out" / "f.txt").exists()
+
+
+def test_file_drift_is_recreated(tmp_path):
+    """Verifica que un local_file borrado o modificado fuera del motor se vuelve a crear"""
+    engine = LocalEngine(str(tmp_path / "state.json"), working_dir=str(tmp_path))
+    document = {"resource": [_file("f", "f.txt", "hola")]}
+    engine.apply(document)
+
+    (tmp_path / "f.txt").write_text("editado")
+    plan = engine.plan(document)
+    assert _actions(plan) == {"local_file.f": "create"}
+    assert "modificó" in plan.format()
+    engine.apply(plan)
+    (tmp_path / "f.txt").unlink()
+    engine.apply(document)
+    assert (tmp_path / "f.txt").read_text() == "hola"
+
+
+def test_depends_on_order_and_parallelism(tmp_path):
+    """Verifica que depends_on se respeta y que los recursos independientes corren a la vez"""
+    log = tmp_path / "log.txt"
+    resources = [_null(f"slow{i}", provisioner=_exec(f"sleep 0.5; echo slow{i} >> {log}"))
+                 for i in range(4)]
+    resources.append(_null("last", depends_on=[f"null_resource.slow{i}" for i in range(4)],
+                           provisioner=_exec(f"echo last >> {log}; echo listo")))
+    engine = LocalEngine(str(tmp_path / "state.json"), parallelism=4, working_dir=str(tmp_path))
+
+    start = time.perf_counter()
+    result = engine.apply({"resource": resources})
+    elapsed = time.perf_counter() - start
+    assert result.ok and result.applied[-1] == "null_resource.last"
+    assert result.outputs["null_resource.last"] == "listo\n"
+    assert log.read_text().splitlines()[-1] == "last"
+    assert elapsed < 1.5
+    assert engine.load_state()["resources"]["null_resource.last"]["dependencies"] == [
+        f"null_resource.slow{i}" for i in range(4)]
+
+
+def test_failure_skips_dependents_and_keeps_partial_state(tmp_path):
+    """Verifica que un local-exec fallido omite sus dependientes y no pierde lo aplicado"""
+    engine = LocalEngine(str(tmp_path / "state.json"), parallelism=1, working_dir=str(tmp_path))
+    document = {"resource": [
+        _null("ok"),
+        _null("bad", depends_on=["null_resource.ok"], provisioner=_exec("echo fallo >&2; exit 3")),
+        _null("after", depends_on=["null_resource.bad"]),
+    ]}
+    result = engine.apply(document)
+    assert not result.ok
+    assert result.applied == ["null_resource.ok"]
+    assert "código 3: fallo" in result.failed["null_resource.bad"]
+    assert result.skipped == ["null_resource.after"]
+    assert list(engine.load_state()["resources"]) == ["null_resource.ok"]
+
+    document["resource"][1] = _null("bad", depends_on=["null_resource.ok"],
+                                    provisioner=[{"local-exec": {"command": "exit 1",
+                                                                 "on_failure": "continue"}}])
+    assert _actions(engine.plan(document))["null_resource.ok"] == "no-op"
+    assert engine.apply(document).ok
+
+
+def test_invalid_plans_raise(tmp_path):
+    """Verifica plan obsoleto, ciclos, tipos y provisioners no soportados"""
+    engine = LocalEngine(str(tmp_path / "state.json"), working_dir=str(tmp_path))
+    stale = engine.plan({"resource": [_null("a")]})
+    engine.apply({"resource": [_null("b")]})
+    with pytest.raises(ValueError, match="planificar de nuevo"):
+        engine.apply(stale)
+
+    cycle = {"resource": [_null("x", depends_on=["null_resource.y"]),
+                          _null("y", depends_on=["null_resource.x"])]}
+    with pytest.raises(ValueError, match="Ciclo"):
+        engine.apply(cycle)
+    with pytest.raises(ValueError, match="no soportado"):
+        engine.plan({"resource": [{"aws_instance": [{"i": [{}]}]}]})
+    with pytest.raises(ValueError, match="remote-exec"):
+        engine.plan({"resource": [_null("r", provisioner=[{"remote-exec": {"inline": []}}])]})
+    with pytest.raises(ValueError, match="inexistente"):
+        engine.plan({"resource": [_null("d", depends_on=["null_resource.nada"])]})
+
+
+def test_builder_output_and_cli(tmp_path, capsys):
+    """Verifica el motor sobre la salida del builder, desde el módulo y desde la CLI"""
+    builder = InfrastructureBuilder("engine", deterministic=True)
+    builder.build_null_fleet(count=5).build_group("web", ["w1", "w2"], {"tier": 1})
+    engine = LocalEngine(str(tmp_path / "module_state.json"), working_dir=str(tmp_path))
+    assert engine.plan(builder._module).counts()["create"] == 7
+
+    config = tmp_path / "main.tf.json"
+    builder.export(str(config))
+    state = str(tmp_path / "state.json")
+    assert main(["plan", str(config), "--state", state, "--detailed-exitcode"]) == 2
+    assert main(["apply", str(config), "--state", state, "--parallelism", "3"]) == 0
+    assert main(["plan", str(config), "--state", state, "--detailed-exitcode"]) == 0
+    assert main(["destroy", "--state", state]) == 0
+    with open(state) as f:
+        assert json.load(f)["resources"] == {}
+    assert "Apply: 7 aplicados" in capsys.readouterr().out
+
+
+def test_destroy_uses_the_apply_working_dir(tmp_path, monkeypatch):
+    """Verifica que destroy borra los archivos donde se crearon, no en el directorio actual"""
+    (tmp_path / "cfg").mkdir()
+    (tmp_path / "cfg" / "main.tf.json").write_text(
+        json.dumps({"resource": [_file("out", "out.txt", "hola")]}))
+    monkeypatch.chdir(tmp_path)
+    assert main(["apply", "cfg/main.tf.json", "--state", "st.json"]) == 0
+    (tmp_path / "out.txt").write_text("no es del motor")
+
+    assert main(["destroy", "--state", "st.json"]) == 0
+    assert not (tmp_path / "cfg" / "out.txt").exists()
+    assert (tmp_path / "out.txt").read_text() == "no es del motor"
+
+    # Aplicar la misma configuración desde otro directorio mueve el archivo
+    engine = LocalEngine("st.json")
+    engine.apply("cfg/main.tf.json")
+    plan = engine.plan({"resource": [_file("out", "out.txt", "hola")]})
+    assert _actions(plan) == {"local_file.out": "replace"}
+    engine.apply(plan)
+    assert not (tmp_path / "cfg" / "out.txt").exists()
+    assert (tmp_path / "out.txt").read_text() == "hola"
+
+
+def test_destroy_provisioners_use_the_previous_config(tmp_path):
+    """Verifica que los local-exec de destrucción son los del recurso que se destruye"""
+    engine = LocalEngine(str(tmp_path / "state.json"), working_dir=str(tmp_path))
+    log = tmp_path / "destroy.log"
+
+    def resource(version):
+        provisioner = [{"local-exec": {"command": f"echo {version} >> {log}", "when": "destroy"}}]
+        return {"resource": [_null("a", {"v": version}, provisioner=provisioner)]}
+
+    assert engine.apply(resource("v1")).ok and not log.exists()
+    assert engine.apply(resource("v2")).ok
+    assert log.read_text().split() == ["v1"]
+    assert engine.destroy().ok
+    assert log.read_text().split() == ["v1", "v2"]
@@ -0,0 +1,91 @@
+"""
+Tests de la carga perezosa del paquete y presupuesto de tiempo de import.
+
+Cada punto de entrada se importa en un intérprete nuevo con `python -X importtime`. El
+presupuesto es el tiempo acumulado (mejor de varias ejecuciones) de los imports que
+dispara la sentencia, sin contar el arranque del intérprete. En máquinas lentas se
+puede escalar con la variable de entorno IAC_IMPORT_BUDGET_SCALE (por ejemplo 2).
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import iac_patterns
+
+ROOT = str(Path(__file__).parent.parent)
+RUNS = 5
+BUDGET_SCALE = float(os.environ.get("IAC_IMPORT_BUDGET_SCALE", "1"))
+
+# Sentencia -> presupuesto en milisegundos
+IMPORT_BUDGETS_MS = {
+    "import iac_patterns": 40,
+    "from iac_patterns import NullResourceFactory": 60,
+    "from iac_patterns.builder import InfrastructureBuilder": 100,
+    "from iac_patterns.validator import validate_file": 60,
+    "from iac_patterns.engine import LocalEngine": 110,
+}
+
+# Sentencia -> módulos pesados que no debe cargar
+FORBIDDEN_MODULES = {
+    "import iac_patterns": ["iac_patterns.singleton", "iac_patterns.factory", "iac_patterns.builder"],
+    "from iac_patterns import NullResourceFactory": ["iac_patterns.builder", "yaml", "multiprocessing"],
+    "from iac_patterns.builder import InfrastructureBuilder": [
+        "yaml", "sqlite3", "multiprocessing", "concurrent.futures", "tracemalloc", "inspect"],
+    "from iac_patterns.validator import validate_file": ["iac_patterns.builder", "multiprocessing"],
+    "from iac_patterns.engine import LocalEngine": ["iac_patterns.builder", "concurrent.futures"],
+}
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True,
+                          check=True)
+
+
+def _import_time_ms(statement: str) -> float:
+    """Tiempo acumulado (ms) de los imports de primer nivel que dispara `statement`."""
+    startup = {line.rsplit("|", 1)[1].strip()
+               for line in _run("-X", "importtime", "-c", "pass").stderr.splitlines()
+               if line.startswith("import time:")}
+    best = None
+    for _ in range(RUNS):
+        total = 0
+        for line in _run("-X", "importtime", "-c", statement).stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            _, cumulative, name = line.split("|")
+            # Los imports de primer nivel no tienen sangría; los anidados ya están sumados
+            if not name.startswith("  ") and name.strip() not in startup:
+                total += int(cumulative)
+        best = total if best is None else min(best, total)
+    return best / 1000
+
+
+@pytest.mark.parametrize("statement", list(FORBIDDEN_MODULES))
+def test_entry_points_skip_heavy_modules(statement):
+    """Verifica que cada punto de entrada no carga módulos pesados que no usa"""
+    check = f"{statement}; import sys; print(' '.join(sorted(sys.modules)))"
+    loaded = set(_run("-c", check).stdout.split())
+    assert [module for module in FORBIDDEN_MODULES[statement] if module in loaded] == []
+
+
+@pytest.mark.parametrize("statement", list(IMPORT_BUDGETS_MS))
+def test_import_time_budget(statement):
+    """Verifica que el import de cada punto de entrada entra en su presupuesto"""
+    budget = IMPORT_BUDGETS_MS[statement] * BUDGET_SCALE
+    elapsed = _import_time_ms(statement)
+    assert elapsed <= budget, f"{statement}: {elapsed:.1f} ms (presupuesto {budget:.0f} ms)"
+
+
+def test_lazy_attributes():
+    """Verifica que los atributos perezosos resuelven a las clases de sus submódulos"""
+    from iac_patterns.builder import InfrastructureBuilder
+
+    assert iac_patterns.InfrastructureBuilder is InfrastructureBuilder
+    assert "InfrastructureBuilder" in vars(iac_patterns)  # Guardado tras el primer acceso
+    assert {"NullResourceFactory", "CloudFormationToTerraformAdapter"} <= set(dir(iac_patterns))
+    with pytest.raises(AttributeError, match="NoExiste"):
+        iac_patterns.NoExiste
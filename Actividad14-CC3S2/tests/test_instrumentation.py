@@ -0,0 +1,109 @@
+"""
+Tests de la instrumentación por paso (iac_patterns.instrumentation).
+"""
+
+import json
+import threading
+
+import pytest
+
+from iac_patterns.builder import InfrastructureBuilder
+from iac_patterns.composite import CompositeModule
+from iac_patterns.factory import NullResourceFactory
+from iac_patterns.instrumentation import (NULL_INSTRUMENTATION, Instrumentation, StepEvent,
+                                          SummaryReporter, active_instrumentation)
+from iac_patterns.prototype import ResourcePrototype
+
+
+class _Recorder(Instrumentation):
+    def __init__(self):
+        self.events = []
+
+    def on_event(self, event):
+        self.events.append(event)
+
+
+def test_builder_steps_emit_nested_events(tmp_path):
+    """Verifica los eventos del builder y de los clones y el export anidados"""
+    recorder = _Recorder()
+    builder = InfrastructureBuilder("inst", deterministic=True, instrumentation=recorder)
+    builder.build_null_fleet(count=3).build_group("web", ["w1", "w2"]).add_custom_resource("fin", {})
+    builder.export(str(tmp_path / "main.tf.json"))
+
+    by_name = {}
+    for event in recorder.events:
+        by_name.setdefault(event.name, []).append(event)
+    assert len(by_name["prototype.clone"]) == 3
+    assert {e.parent for e in by_name["prototype.clone"]} == {"builder.build_null_fleet"}
+    assert by_name["factory.create_many"][0].parent == "builder.build_group"
+    assert by_name["builder.build_group"][0].attrs == {"group": "web"}
+    assert by_name["composite.export"][0].resources == 6
+    assert by_name["json.dump"][0].parent == "builder.export"
+    assert by_name["builder.export"][0].attrs["mode"] == "json"
+    assert all(e.seconds >= 0 and e.alloc_bytes is None for e in recorder.events)
+
+    # Al terminar cada paso se restaura la instrumentación nula
+    assert active_instrumentation() is NULL_INSTRUMENTATION
+
+
+def test_steps_report_errors_and_restore_state():
+    """Verifica que un paso con excepción se reporta y no deja la pila abierta"""
+    recorder = _Recorder()
+    with pytest.raises(KeyError):
+        with recorder.step("falla", resources=2):
+            raise KeyError("x")
+    assert recorder.events[0].attrs == {"error": "KeyError"}
+    assert active_instrumentation() is NULL_INSTRUMENTATION
+
+    # Fuera de un paso, clone y export no emiten eventos
+    ResourcePrototype(NullResourceFactory.create("a")).clone()
+    CompositeModule("m").export()
+    assert len(recorder.events) == 1
+
+
+def test_summary_reporter_table_and_json(tmp_path):
+    """Verifica los totales por paso, la tabla, el JSON y la medición de memoria"""
+    reporter = SummaryReporter(trace_memory=True, keep_events=True)
+    with reporter.step("outer", resources=1):
+        for _ in range(3):
+            with reporter.step("inner", resources=2):
+                payload = [object() for _ in range(100)]
+
+    rows = {row["step"]: row for row in reporter.summary()}
+    assert rows["inner"]["calls"] == 3 and rows["inner"]["resources"] == 6
+    assert rows["inner"]["parent"] == "outer" and rows["outer"]["alloc_bytes"] is not None
+
+    lines = reporter.format_table().splitlines()
+    assert lines[1].startswith("outer") and lines[2].startswith("  inner")
+
+    path = tmp_path / "profile.json"
+    reporter.write_json(str(path))
+    document = json.loads(path.read_text())
+    assert [row["step"] for row in document["steps"]] == ["inner", "outer"]
+    assert len(document["events"]) == 4 and document["events"][0]["name"] == "inner"
+
+    reporter.reset()
+    assert reporter.summary() == [] and reporter.events == []
+    assert isinstance(StepEvent("x", 0.1).as_dict()["attrs"], dict) and payload
+
+
+def test_steps_are_isolated_per_thread():
+    """Verifica que los pasos de hilos concurrentes no comparten instrumentación ni pila"""
+    reporters = {"A": _Recorder(), "B": _Recorder()}
+    inside = threading.Barrier(2)
+
+    def run(name):
+        with reporters[name].step(name):
+            inside.wait()  # Ambos pasos abiertos a la vez
+            ResourcePrototype(NullResourceFactory.create(name)).clone()
+            inside.wait()
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in reporters]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name, reporter in reporters.items():
+        assert [(e.name, e.parent) for e in reporter.events] == [("prototype.clone", name), (name, None)]
+    assert active_instrumentation() is NULL_INSTRUMENTATION
@@ -0,0 +1,83 @@
+"""
+Tests de los hashes Merkle y la detección de cambios (iac_patterns.merkle).
+"""
+
+import json
+
+from iac_patterns.builder import InfrastructureBuilder
+from iac_patterns.composite import CompositeModule
+from iac_patterns.factory import NullResourceFactory
+from iac_patterns.merkle import block_hash, build_manifest, diff_trees
+
+
+def _build(groups, extra=None):
+    builder = InfrastructureBuilder(env_name="merkle", deterministic=True)
+    builder.add_custom_resource("standalone", extra or {"k": "v"})
+    for name, members in groups.items():
+        builder.build_group(name, members, {"tier": name})
+    return builder
+
+
+def test_block_hash_ignores_key_order():
+    """Verifica que el hash de un bloque no depende del orden de las claves"""
+    a = {"null_resource": [{"x": [{"triggers": {"a": 1, "b": 2}}]}]}
+    b = {"null_resource": [{"x": [{"triggers": {"b": 2, "a": 1}}]}]}
+    assert block_hash(a) == block_hash(b)
+
+
+def test_identical_builds_have_same_hash_and_empty_diff():
+    """Verifica que dos builds iguales tienen el mismo hash raíz y ningún cambio"""
+    groups = {"web": ["w1", "w2"], "db": ["d1"]}
+    old, new = _build(groups), _build(groups)
+    assert old._module.subtree_hash() == new._module.subtree_hash()
+    assert new.diff(old) == {"added": [], "removed": [], "changed": []}
+
+
+def test_diff_reports_added_removed_and_changed():
+    """Verifica la clasificación de cambios y las rutas de módulo"""
+    old = _build({"web": ["w1", "w2"], "db": ["d1"], "cache": ["c1"]})
+    new = _build({"web": ["w1", "w3"], "db": ["d1"], "queue": ["q1"]}, extra={"k": "v2"})
+    changes = new.diff(old)
+    assert changes["added"] == [("merkle/queue", "null_resource.q1"), ("merkle/web", "null_resource.w3")]
+    assert changes["removed"] == [("merkle/cache", "null_resource.c1"), ("merkle/web", "null_resource.w2")]
+    assert changes["changed"] == [("merkle", "null_resource.standalone")]
+
+
+def test_diff_against_saved_manifest():
+    """Verifica que un manifiesto serializado sirve como build anterior"""
+    old = _build({"web": ["w1"]})
+    manifest = json.loads(json.dumps(old.manifest()))
+    new = _build({"web": ["w1", "w2"]})
+    assert diff_trees(manifest, new._module)["added"] == [("merkle/web", "null_resource.w2")]
+    assert diff_trees(manifest, build_manifest(old._module))["added"] == []
+
+
+def test_hash_cache_invalidated_only_on_path_to_root():
+    """Verifica que un cambio solo recalcula los hashes de sus ancestros"""
+    root = CompositeModule("root")
+    left, right = CompositeModule("left"), CompositeModule("right")
+    root.add_submodule(left)
+    root.add_submodule(right)
+    left.add(NullResourceFactory.create("a", {"factory_uuid": "1", "timestamp": "t"}))
+    right.add(NullResourceFactory.create("b", {"factory_uuid": "2", "timestamp": "t"}))
+
+    before = root.subtree_hash()
+    right_hash = right.subtree_hash()
+    left.add(NullResourceFactory.create("c", {"factory_uuid": "3", "timestamp": "t"}))
+
+    assert root._hash_cache is None and left._hash_cache is None
+    assert right._hash_cache == right_hash
+    assert root.subtree_hash() != before
+
+
+def test_deep_tree_hash_is_iterative():
+    """Verifica que el hash de un árbol más profundo que el límite de recursión funciona"""
+    root = CompositeModule("root")
+    current = root
+    for i in range(3000):
+        child = CompositeModule(f"m{i}")
+        current.add_submodule(child)
+        current = child
+    current.add(NullResourceFactory.create("leaf", {"factory_uuid": "1", "timestamp": "t"}))
+    assert len(root.subtree_hash()) == 64
+    assert len(build_manifest(root)["modules"]) == 1
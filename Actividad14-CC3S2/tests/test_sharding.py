@@ -0,0 +1,88 @@
+"""
+Tests de la exportación fragmentada e incremental (iac_patterns.sharding).
+"""
+
+import json
+import os
+from functools import partial
+
+from iac_patterns import sharding
+from iac_patterns.builder import InfrastructureBuilder
+from iac_patterns.mutators import add_trigger
+from iac_patterns.sharding import MANIFEST_NAME, ROOT_SHARD
+
+
+def _build(groups):
+    builder = InfrastructureBuilder(env_name="shards", deterministic=True)
+    builder.add_custom_resource("standalone", {"k": "v"})
+    for name, members in groups.items():
+        builder.build_group(name, members, {"tier": name})
+    return builder
+
+
+def _load_all(directory):
+    resources = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".tf.json"):
+            with open(os.path.join(directory, filename)) as f:
+                resources.extend(json.load(f)["resource"])
+    return resources
+
+
+def test_shards_cover_whole_document(tmp_path):
+    """Verifica que los shards contienen exactamente los recursos del export"""
+    builder = _build({"web": ["w1", "w2"], "db": ["d1"]})
+    report = builder.export_shards(str(tmp_path))
+
+    assert sorted(report["written"]) == sorted([ROOT_SHARD, "web.tf.json", "db.tf.json"])
+    assert (tmp_path / MANIFEST_NAME).exists()
+    expected = builder._module.export()["resource"]
+    assert sorted(map(json.dumps, _load_all(tmp_path))) == sorted(map(json.dumps, expected))
+
+
+def test_shards_only_rewrite_changed(tmp_path):
+    """Verifica que solo se reescribe el shard del grupo modificado"""
+    _build({"web": ["w1"], "db": ["d1"]}).export_shards(str(tmp_path))
+
+    unchanged = _build({"web": ["w1"], "db": ["d1"]}).export_shards(str(tmp_path))
+    assert unchanged["written"] == []
+
+    changed = _build({"web": ["w1", "w2"], "db": ["d1"]}).export_shards(str(tmp_path))
+    assert changed["written"] == ["web.tf.json"]
+    assert sorted(changed["unchanged"]) == sorted([ROOT_SHARD, "db.tf.json"])
+
+
+def test_shards_remove_stale_and_restore_missing(tmp_path):
+    """Verifica la eliminación de shards obsoletos y la reescritura de los borrados"""
+    _build({"web": ["w1"], "db": ["d1"]}).export_shards(str(tmp_path))
+    os.unlink(tmp_path / "web.tf.json")
+
+    report = _build({"web": ["w1"]}).export_shards(str(tmp_path))
+
+    assert report["written"] == ["web.tf.json"]
+    assert report["removed"] == ["db.tf.json"]
+    assert not (tmp_path / "db.tf.json").exists()
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".tmp")]
+
+
+def test_shards_skip_encoding_unchanged_sources(tmp_path, monkeypatch):
+    """Verifica que solo se codifican los shards cuyo hash Merkle de origen cambió"""
+    encoded = []
+    dump_blocks = sharding.dump_blocks
+    monkeypatch.setattr(sharding, "dump_blocks",
+                        lambda blocks, fp: (encoded.append(1), dump_blocks(blocks, fp)))
+    builder = _build({"web": ["w1", "w2"], "db": ["d1"]})
+    builder.export_shards(str(tmp_path))
+    assert len(encoded) == 3
+
+    builder.mutate_resource("null_resource", "w2", partial(add_trigger, trigger_key="owner", trigger_value="ops"))
+    report = builder.export_shards(str(tmp_path))
+    assert report["written"] == ["web.tf.json"] and len(encoded) == 4
+    assert sorted(map(json.dumps, _load_all(tmp_path))) == \
+        sorted(map(json.dumps, builder._module.export()["resource"]))
+
+    # Un manifiesto sin hashes de origen (versión anterior) compara el contenido
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    del manifest["sources"]
+    (tmp_path / MANIFEST_NAME).write_text(json.dumps(manifest))
+    assert builder.export_shards(str(tmp_path))["written"] == []
@@ -0,0 +1,134 @@
+"""
+Tests del volcado a disco bajo presupuesto de memoria (iac_patterns.spill).
+"""
+
+import json
+import os
+
+import pytest
+
+from iac_patterns.builder import InfrastructureBuilder
+from iac_patterns.composite import CompositeModule
+from iac_patterns.factory import NullResourceFactory
+from iac_patterns import spill
+from iac_patterns.spill import SpilledSegment, SpillStore
+
+
+def _tree(memory_budget=None, spill_dir=None):
+    root = CompositeModule("root", memory_budget=memory_budget, spill_dir=spill_dir)
+    root.add(NullResourceFactory.create("standalone", {"k": "v"}, deterministic=True))
+    for g in range(3):
+        group = CompositeModule(f"group_{g}")
+        for resource in NullResourceFactory.create_many(
+                [f"res_{g}_{i}" for i in range(20)], {"group": f"group_{g}"}, deterministic=True):
+            group.add(resource)
+        root.add_submodule(group)
+    root.add(NullResourceFactory.create("tail", deterministic=True))
+    return root
+
+
+def _segments(module):
+    return [child for child in module._children if isinstance(child, SpilledSegment)]
+
+
+def test_spill_preserves_output_structure_and_hashes(tmp_path):
+    """Verifica que volcar a disco no cambia la salida, las rutas ni el hash Merkle"""
+    reference = _tree()
+    spilled = _tree(memory_budget=1, spill_dir=str(tmp_path))
+
+    assert spilled._resident == 0 and len(os.listdir(tmp_path)) == 1
+    assert all(_segments(group) for group in spilled.submodules())
+    assert spilled.export() == reference.export()
+    assert spilled.count_resources() == reference.count_resources() == 62
+    assert [(tuple(path), block) for path, block in spilled.iter_resources()] == \
+        [(tuple(path), block) for path, block in reference.iter_resources()]
+    assert spilled.subtree_hash() == reference.subtree_hash()
+
+
+def test_spill_only_when_budget_exceeded():
+    """Verifica que el volcado ocurre al superar el presupuesto y libera lo estimado"""
+    unlimited = _tree()
+    assert unlimited._resident > 0
+
+    root = _tree(memory_budget=unlimited._resident * 10)
+    assert not any(_segments(module) for module in [root] + root.submodules())
+
+    assert root.spill() == 62
+    assert root._resident == 0 and root.spill() == 0
+    assert root.export() == unlimited.export()
+
+
+def test_spilled_resources_stay_indexed():
+    """Verifica find, find_by_trigger y el rechazo de duplicados tras el volcado"""
+    root = _tree(memory_budget=1)
+    block = root.find("null_resource", "res_1_7")
+    assert block["null_resource"][0]["res_1_7"][0]["triggers"]["group"] == "group_1"
+    assert len(root.find_by_trigger("group", "group_2")) == 20
+    assert root.submodules()[0].find("null_resource", "res_1_7") is None
+
+    with pytest.raises(ValueError, match="duplicado"):
+        root.add(NullResourceFactory.create("res_0_3"))
+
+    # Los recursos agregados después del volcado se exportan a continuación
+    root.add(NullResourceFactory.create("after", deterministic=True))
+    names = [name for _, block in root.iter_resources() for name in block["null_resource"][0]]
+    assert names[-2:] == ["tail", "after"]
+
+
+def test_spilled_keys_leave_resident_index():
+    """Verifica que las claves volcadas pasan al índice compacto de 8 bytes por recurso"""
+    root = _tree(memory_budget=1)
+    index = root._index
+    assert index.keys == {} and index.owners == {}
+    assert len(index.spilled) == 62 and index.spilled.nbytes() == 62 * 8
+
+    root.submodules()[1].invalidate()
+    assert root.count_resources() == 62 and len(index.spilled) == 62
+    assert root.find("null_resource", "res_1_3") is not None
+
+
+def test_spilled_keys_resolve_hash_collisions(monkeypatch):
+    """Verifica que las claves volcadas con el mismo hash se confirman leyendo el segmento"""
+    monkeypatch.setattr(spill, "_HASH_MASK", 0)  # Todas las claves colisionan
+    root = _tree(memory_budget=1)
+
+    assert root.find("null_resource", "res_2_5")["null_resource"][0]["res_2_5"]
+    assert root.find("null_resource", "missing") is None
+    assert len(root.find_by_trigger("group", "group_0")) == 20
+    with pytest.raises(ValueError, match="duplicado: null_resource.res_2_5"):
+        root.add(NullResourceFactory.create("res_2_5"))
+    root.add(NullResourceFactory.create("fresh"))
+    with pytest.raises(ValueError, match="volcada"):
+        root.mutate("null_resource", "res_2_5", lambda resource: None)
+    with pytest.raises(KeyError):
+        root.mutate("null_resource", "missing", lambda resource: None)
+
+
+def test_spill_store_segments_and_cleanup(tmp_path):
+    """Verifica la lectura por segmento y el borrado del archivo temporal"""
+    store = SpillStore(str(tmp_path))
+    first = store.write([{"a": 1}, {"b": [2, 3]}])
+    second = store.write([{"c": "ñ\n"}])
+    assert list(first.iter_blocks()) == [{"a": 1}, {"b": [2, 3]}]
+    assert list(second.iter_blocks()) == [{"c": "ñ\n"}]
+    assert second.count_resources() == 1 and store.size == first.length + second.length
+
+    store.close()
+    assert not os.path.exists(store.path)
+
+
+def test_builder_memory_budget_export_identical(tmp_path):
+    """Verifica que el builder con presupuesto exporta los mismos bytes"""
+    outputs = []
+    for budget in (None, 1):
+        builder = InfrastructureBuilder("spill", deterministic=True, memory_budget=budget,
+                                        spill_dir=str(tmp_path))
+        builder.build_null_fleet(count=5)
+        for g in range(4):
+            builder.build_group(f"group_{g}", [f"g{g}_{i}" for i in range(10)], {"tier": g})
+        path = tmp_path / f"out_{budget}" / "main.tf.json"
+        builder.export(str(path))
+        outputs.append(path.read_text())
+
+    assert outputs[0] == outputs[1]
+    assert len(json.loads(outputs[1])["resource"]) == 45
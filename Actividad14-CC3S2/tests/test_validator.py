@@ -0,0 +1,118 @@
+"""
+Tests del validador de Terraform JSON en proceso (iac_patterns.validator).
+"""
+
+import io
+import json
+
+import pytest
+
+from iac_patterns.adapter import AnsibleToTerraformAdapter
+from iac_patterns.builder import InfrastructureBuilder
+from iac_patterns.composite import CompositeModule
+from iac_patterns.factory import NullResourceFactory
+from iac_patterns.mutators import convert_null_to_local_file
+from iac_patterns.prototype import ResourcePrototype
+from iac_patterns import validator
+from iac_patterns.validator import (validate_blocks, validate_document, validate_file,
+                                    validate_files, validate_stream)
+
+
+def _block(resource_type, name, config):
+    return {resource_type: [{name: [config]}]}
+
+
+def test_generated_documents_are_valid(tmp_path, ansible_playbook_yaml):
+    """Verifica que las salidas de fábrica, prototype, adapter y builder son válidas"""
+    clone = ResourcePrototype(NullResourceFactory.create("app")).clone(
+        lambda d: convert_null_to_local_file(d, "app.txt", "hola"))
+    assert validate_document(NullResourceFactory.create("single")).ok
+    assert validate_document(clone.data).ok
+    assert validate_document(AnsibleToTerraformAdapter(ansible_playbook_yaml).adapt()).ok
+
+    builder = InfrastructureBuilder("valid", deterministic=True)
+    builder.build_null_fleet(count=3).build_group("web", ["w1", "w2"], {"tier": 1})
+    path = tmp_path / "main.tf.json"
+    builder.export(str(path))
+    report = validate_file(str(path))
+    assert report.ok and report.resources == 5
+    assert validate_blocks(builder._module.iter_blocks()).resources == 5
+
+
+def test_structural_errors_are_reported():
+    """Verifica nombres, duplicados, triggers, provisioners, local_file y depends_on"""
+    document = {
+        "resource": [
+            _block("null_resource", "ok", {"triggers": {"a": 1}}),
+            _block("null_resource", "ok", {}),
+            _block("null_resource", "1bad", {}),
+            _block("null_resource", "nested", {"triggers": {"x": {"y": 1}}}),
+            _block("null_resource", "prov", {"provisioner": [{"ssh-exec": {}}]}),
+            _block("local_file", "nofile", {"content": "x"}),
+            _block("null_resource", "dep", {"depends_on": ["null_resource.ok", "null_resource.missing",
+                                                          "local_file.later", "module.net"]}),
+            _block("local_file", "later", {"filename": "a.txt"}),
+            {"null_resource": {"flat": {}}},
+        ],
+        "outputs": {},
+    }
+    report = validate_document(document)
+    messages = "\n".join(report.errors)
+    assert "resource[1] null_resource.ok: recurso duplicado" in messages
+    assert "null_resource.1bad: nombre de recurso inválido" in messages
+    assert "el trigger 'x' debe ser un valor escalar" in messages
+    assert "provisioner desconocido: 'ssh-exec'" in messages
+    assert "local_file requiere 'filename'" in messages
+    assert "inexistente: null_resource.missing" in messages
+    assert "local_file.later" not in messages and "module.net" not in messages
+    assert "resource[8]: 'null_resource' debe ser una lista" in messages
+    assert "sección de primer nivel desconocida: 'outputs'" in messages
+    assert len(report.errors) == 8 and not report.truncated
+
+
+def test_stream_validation_matches_in_memory(monkeypatch):
+    """Verifica el parser incremental con bloques que cruzan el límite de lectura"""
+    monkeypatch.setattr(validator, "_CHUNK_SIZE", 7)
+    module = CompositeModule("stream")
+    for resource in NullResourceFactory.create_many([f"r{i}" for i in range(200)], {"k": "v"}):
+        module.add(resource)
+    blocks = list(module.iter_blocks()) + NullResourceFactory.create("r5")["resource"]  # duplicado
+    document = {"data": [_block("external", "info", {})], "resource": blocks}
+    document["resource"][0]["null_resource"][0]["r0"][0]["depends_on"] = ["data.external.info"]
+
+    for text in (json.dumps(document, indent=4), json.dumps(document, separators=(",", ":"))):
+        report = validate_stream(io.StringIO(text))
+        assert report.resources == 201
+        assert report.errors == validate_document(document).errors == ["resource[200] null_resource.r5: recurso duplicado"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"resource": [{"null_resource": [{"a": [{}]}]}]', "sintaxis: se esperaba '}'"),
+    ('{"resource": [{"null_resource": ', "sintaxis: Expecting value"),
+    ('{"resource": []} []', "sintaxis: datos adicionales"),
+    ('[]', "sintaxis: se esperaba '{'"),
+])
+def test_stream_syntax_errors(text, expected):
+    """Verifica los errores de sintaxis del parser incremental"""
+    report = validate_stream(io.StringIO(text))
+    assert len(report.errors) == 1 and report.errors[0].startswith(expected)
+
+
+def test_max_errors_and_files_in_pool(tmp_path):
+    """Verifica el corte por max_errors y la validación de varios archivos"""
+    bad = {"resource": [_block("null_resource", f"{i}x", {}) for i in range(50)]}
+    report = validate_document(bad, max_errors=5)
+    assert len(report.errors) == 5 and report.truncated
+
+    paths = []
+    for i, document in enumerate([NullResourceFactory.create("a"), bad]):
+        path = tmp_path / f"f{i}.tf.json"
+        path.write_text(json.dumps(document))
+        paths.append(str(path))
+    paths.append(str(tmp_path / "missing.tf.json"))
+
+    reports = validate_files(paths, workers=2)
+    assert [r.path for r in reports] == paths
+    assert [r.ok for r in reports] == [True, False, False]
+    assert reports[2].errors[0].startswith("lectura:")
+    assert validator.main(paths[:1]) == 0 and validator.main(paths) == 1